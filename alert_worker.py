@@ -0,0 +1,101 @@
+import os
+import signal
+import threading
+
+from lib.alert_queue_handler import AlertQueueWorker, get_alert_queue_config
+from lib.config_handler import load_config_file
+from lib.delivery_queue_handler import DeliveryWorker, get_delivery_queue_config
+from lib.config_snapshot_handler import ConfigSnapshot
+from lib.http_session_handler import close_http_sessions
+from lib.webhook_engine_handler import stop_webhook_engine
+from lib.logging_handler import CustomLogger
+from lib.mysql_handler import MySQLDatabase
+from lib.redis_handler import RedisCache
+
+app_name = "icad_alerting_api"
+
+log_level = 1
+
+root_path = os.getcwd()
+config_file = 'config.json'
+log_path = os.path.join(root_path, 'log')
+log_file_name = "icad_alerting_worker.log"
+config_path = os.path.join(root_path, 'etc')
+
+if not os.path.exists(log_path):
+    os.makedirs(log_path)
+
+if not os.path.exists(config_path):
+    os.makedirs(config_path)
+
+logging_instance = CustomLogger(log_level, f'{app_name}',
+                                os.path.join(log_path, log_file_name))
+
+try:
+    config_data = load_config_file(os.path.join(config_path, config_file))
+    logging_instance.set_log_level(config_data["log_level"])
+    logger = logging_instance.logger
+    logger.info("Loaded Config File")
+except Exception as e:
+    print(f'Error while <<loading>> configuration : {e}')
+    exit(1)
+
+if not config_data:
+    logger.error('Failed to load configuration.')
+    exit(1)
+
+try:
+    db = MySQLDatabase(config_data)
+    logger.info("MySQL Database Connection Pool connected successfully.")
+except Exception as e:
+    logger.error(f'Error while <<connecting>> to the <<MySQL Database:>> {e}')
+    exit(1)
+
+try:
+    rd = RedisCache(config_data)
+    logger.info("Redis Pool Connection Pool connected successfully.")
+except Exception as e:
+    logger.error(f'Error while <<connecting>> to the <<Redis Cache:>> {e}')
+    exit(1)
+
+
+def main():
+    alert_queue_config = get_alert_queue_config(config_data)
+    if not alert_queue_config.get("enabled"):
+        logger.warning("Alert queue is disabled in the config, calls will not be queued for this worker.")
+
+    config_snapshot = ConfigSnapshot(db, rd,
+                                     tone_matcher=config_data.get("general", {}).get("tone_matcher", "python"))
+    alert_queue_worker = AlertQueueWorker(db, rd, config_data, config_snapshot)
+    if not alert_queue_worker.start():
+        exit(1)
+
+    delivery_worker = None
+    if get_delivery_queue_config(config_data).get("enabled"):
+        delivery_worker = DeliveryWorker(rd, config_data, config_snapshot)
+        if not delivery_worker.start():
+            exit(1)
+
+    stop_event = threading.Event()
+
+    def handle_signal(signum, frame):
+        logger.info(f"Received signal {signum}, stopping alert workers.")
+        stop_event.set()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    while not stop_event.wait(1):
+        pass
+
+    alert_queue_worker.stop(timeout=30)
+    if delivery_worker:
+        delivery_worker.stop(timeout=30)
+    stop_webhook_engine()
+    close_http_sessions()
+    rd.stop()
+    logger.info("Alert worker stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,6 @@
 import json
 import os
 from functools import wraps
-from threading import Event, Thread
-import time
 
 import redis
 from flask import Flask, request, session, redirect, url_for, render_template, flash, jsonify
@@ -12,18 +10,27 @@ from werkzeug.middleware.proxy_fix import ProxyFix
 
 from lib.alert_filter_handler import get_alert_filters, delete_filter, update_alert_filter_general, \
     update_filter_keyword, add_filter
-from lib.alert_processing_handler import get_active_alerts_cache, delete_active_alerts_cache, process_call_data
+from lib.alert_queue_handler import get_alert_queue_config, enqueue_call, enqueue_calls, get_alert_job, \
+    AlertQueueWorker
+from lib.alert_processing_handler import process_call_data, clear_suppressed_triggers
 from lib.alert_trigger_handler import get_alert_triggers, add_alert_trigger, delete_alert_trigger, \
     update_alert_trigger_general, update_alert_trigger_long_tone, update_alert_trigger_two_tone, \
     update_alert_trigger_hi_low_tone, update_trigger_alert_emails, update_alert_trigger_pushover, \
     update_alert_trigger_alert_filter
+from lib.audio_cache_handler import get_audio_cache
 from lib.config_handler import load_config_file
+from lib.config_snapshot_handler import ConfigSnapshot, bump_config_version
+from lib.delivery_queue_handler import get_delivery_queue_config, get_dead_letter_destinations, get_dead_letters, \
+    replay_dead_letters, DeliveryWorker
+from lib.idempotency_handler import get_idempotency_config, get_idempotency_key, reserve_idempotency_key, \
+    complete_idempotency_key, release_idempotency_key
 from lib.logging_handler import CustomLogger
 from lib.mysql_handler import MySQLDatabase
 from lib.redis_handler import RedisCache
 from lib.system_handler import get_systems, update_system_general, update_system_email_settings, \
     update_system_pushover_settings, update_system_telegram_settings, update_system_alert_emails, add_system, \
-    delete_radio_system, update_system_facebook_settings, get_system_api_key
+    delete_radio_system, update_system_facebook_settings
+from lib.transcode_pool_handler import get_transcode_pool
 from lib.user_handler import authenticate_user, user_change_password
 from lib.webhook_handler import update_system_webhooks, update_trigger_webhooks
 
@@ -37,8 +44,6 @@ log_path = os.path.join(root_path, 'log')
 log_file_name = f"{app_name}.log"
 config_path = os.path.join(root_path, 'etc')
 
-stop_signals = {}
-
 if not os.path.exists(log_path):
     os.makedirs(log_path)
 
@@ -114,79 +119,14 @@ app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
 sess = Session()
 sess.init_app(app)
 
+# System configuration snapshot used by /process_alert
+api_key_cache_config = config_data.get("api_key_cache", {})
+config_snapshot = ConfigSnapshot(db, rd, api_key_ttl=api_key_cache_config.get("ttl", 300),
+                                 api_key_negative_ttl=api_key_cache_config.get("negative_ttl", 30),
+                                 tone_matcher=config_data.get("general", {}).get("tone_matcher", "python"))
 
-def clear_loop_manager(system_short_name, action="start"):
-    try:
-        if action == "start":
-            logger.info(f"Starting Clear Loop for {system_short_name}")
-            if system_short_name not in stop_signals:
-                stop_signals[system_short_name] = Event()
-            Thread(target=clear_old_items, args=(system_short_name,), daemon=True).start()
-        elif action == "restart":
-            logger.info(f"Restarting Clear Loop for {system_short_name}")
-            if system_short_name in stop_signals:
-                stop_signals[system_short_name].set()
-                time.sleep(2)
-                del stop_signals[system_short_name]
-
-            if system_short_name not in stop_signals:
-                stop_signals[system_short_name] = Event()
-
-            Thread(target=clear_old_items, args=(system_short_name,), daemon=True).start()
-        elif action == "stop":
-            logger.info(f"Stopping Clear Loop for {system_short_name}")
-            if system_short_name in stop_signals:
-                stop_signals[system_short_name].set()
-                time.sleep(2)
-                del stop_signals[system_short_name]
-        else:
-            logger.error(f"Unknown Loop Management Action {action}")
-
-    except Exception as e:
-        logger.error(f"An error occurred in clear_loop_management: {str(e)}")
-
-
-# Loop to run that clears old detections.
-def clear_old_items(system_short_name):
-    stop_signal = stop_signals.get(system_short_name, Event())
-    while not stop_signal.is_set():
-        try:
-            time.sleep(1)  # Sleep to prevent a tight loop that hogs the CPU
-
-            # Fetch the current list of detections
-            qc_detector_list = get_active_alerts_cache(rd, f"icad_current_alerts:{system_short_name}")
-            current_time = time.time()
-            if len(qc_detector_list) == 0:
-                continue  # Skip this iteration if list is empty
-
-            updated_list = []
-            for item in qc_detector_list:
-                try:
-                    # Calculate the expiration time for each item
-                    expire_time = item['last_detected'] + item['ignore_seconds']
-                    if current_time < expire_time:
-                        # If the item hasn't expired, add it to the updated list
-                        updated_list.append(item)
-                except KeyError as e:
-                    logger.error(f"KeyError in item processing: {e}")
-                except Exception as e:
-                    logger.error(f"Unexpected error in item processing: {e}")
-
-            # If the updated list is shorter, some items were removed
-            if len(updated_list) < len(qc_detector_list):
-                logger.warning(f"Removing {len(qc_detector_list) - len(updated_list)} items")
-                # Clear the old list
-                delete_active_alerts_cache(rd, f"icad_current_alerts:{system_short_name}")
-
-                # Add the updated items back, if any
-                if updated_list:
-                    # Push all items at once to the list
-                    rd.lpush(f"icad_current_alerts:{system_short_name}", *updated_list)
-
-        except Exception as e:
-            logger.error(f"Unexpected error in clear_old_items loop: {e}")
-
-    logger.info(f"Stopped Clear Loop for {system_short_name}")
+alert_queue_config = get_alert_queue_config(config_data)
+delivery_queue_config = get_delivery_queue_config(config_data)
 
 
 def login_required(f):
@@ -206,28 +146,38 @@ def login_required(f):
     return decorated_function
 
 
-def require_api_key(db):
-    def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            # Retrieve API key from request headers
-            api_key = request.headers.get('Authorization')
-            if not api_key:
-                return jsonify({"success": False, "message": "API key is missing."}), 403
+def config_change(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        response = f(*args, **kwargs)
+
+        # Bump the config version so every worker rebuilds its system snapshot
+        bump_config_version(rd)
+
+        return response
+
+    return decorated_function
+
 
-            # Get system ID using the API key
-            system_id = get_system_api_key(db, api_key)
-            logger.warning(system_id)
-            if not system_id.get("success") or not system_id.get("result", {}):
-                return jsonify({"success": False, "message": "Invalid API key."}), 403
+def require_api_key(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        # Retrieve API key from request headers
+        api_key = request.headers.get('Authorization')
+        if not api_key:
+            return jsonify({"success": False, "message": "API key is missing."}), 403
 
-            logger.debug("API Key Valid")
-            # If system_id is found, proceed with the original function
-            return func(*args, **kwargs)
+        # Get the system the API key belongs to
+        system_data = config_snapshot.get_system_by_api_key(api_key)
+        if not system_data:
+            return jsonify({"success": False, "message": "Invalid API key."}), 403
 
-        return wrapper
+        logger.debug("API Key Valid")
+        # Pass the resolved system to the original function
+        kwargs["api_system_data"] = system_data
+        return func(*args, **kwargs)
 
-    return decorator
+    return wrapper
 
 
 @app.route('/login', methods=['POST'])
@@ -272,11 +222,11 @@ def admin_edit_system():
 
 @app.route('/admin/add_system', methods=['GET', 'POST'])
 @login_required
+@config_change
 def admin_add_system():
     logger.debug(request.form)
     update_result = add_system(db, request.form)
     if update_result.get("success"):
-        clear_loop_manager(request.form.get('system_short_name'), action='start')
         flash(f"Added System {request.form.get('system_name')}", 'success')
     else:
         flash(update_result.get("message"), 'danger')
@@ -286,6 +236,7 @@ def admin_add_system():
 
 @app.route('/admin/delete_system', methods=['POST'])
 @login_required
+@config_change
 def admin_delete_system():
     try:
         # Validate incoming JSON data
@@ -296,7 +247,6 @@ def admin_delete_system():
 
         system_id = int(request_dict.get("system_id"))
         system_name = request_dict.get("system_name")
-        system_short_name = request_dict.get('system_short_name')
 
         if system_id is None:
             logger.error("Missing system ID in the request.")
@@ -304,7 +254,7 @@ def admin_delete_system():
                 {"success": False, "message": "Missing necessary information (system ID)."}), 400
         result = delete_radio_system(db, system_id)
         if result.get("success"):
-            clear_loop_manager(system_short_name, action="stop")
+            clear_suppressed_triggers(rd, system_id)
             logger.debug("System successfully deleted")
             flash(f"System {system_name} successfully deleted.", "success")
             return jsonify({"success": True, "message": f"System {system_name} successfully deleted."}), 200
@@ -326,19 +276,12 @@ def admin_delete_system():
 
 @app.route('/admin/save_system_general', methods=['POST'])
 @login_required
+@config_change
 def admin_save_system_general():
     result = {"success": False, "message": "This is a message", "result": []}
     logger.debug(request.form)
-    # if update changes short name stop clear thread and start new with new shortname
 
     update_result = update_system_general(db, request.form)
-    if request.form.get("system_short_name").strip().lower() != request.form.get(
-            "system_short_name_orig").strip().lower():
-        logger.debug("System Name Changed")
-        clear_loop_manager(request.form.get(
-            "system_short_name_orig"), action="stop")
-        clear_loop_manager(request.form.get(
-            "system_short_name"), action="start")
 
     if update_result.get("success"):
         result["success"] = True
@@ -352,6 +295,7 @@ def admin_save_system_general():
 
 @app.route('/admin/save_system_email_settings', methods=['POST'])
 @login_required
+@config_change
 def admin_save_system_email_settings():
     result = {"success": False, "message": "This is a message", "result": []}
     logger.debug(request.form)
@@ -368,6 +312,7 @@ def admin_save_system_email_settings():
 
 @app.route('/admin/save_system_emails', methods=['POST'])
 @login_required
+@config_change
 def admin_save_system_emails():
     try:
         # Validate incoming JSON data
@@ -402,6 +347,7 @@ def admin_save_system_emails():
 
 @app.route('/admin/save_system_pushover', methods=['POST'])
 @login_required
+@config_change
 def admin_save_system_pushover():
     result = {"success": False, "message": "This is a message", "result": []}
     logger.debug(request.form)
@@ -418,6 +364,7 @@ def admin_save_system_pushover():
 
 @app.route('/admin/save_system_facebook', methods=['POST'])
 @login_required
+@config_change
 def admin_save_system_facebook():
     result = {"success": False, "message": "This is a message", "result": []}
     logger.debug(request.form)
@@ -434,6 +381,7 @@ def admin_save_system_facebook():
 
 @app.route('/admin/save_system_telegram', methods=['POST'])
 @login_required
+@config_change
 def admin_save_system_telegram():
     result = {"success": False, "message": "This is a message", "result": []}
     logger.debug(request.form)
@@ -450,6 +398,7 @@ def admin_save_system_telegram():
 
 @app.route('/admin/save_system_webhooks', methods=['POST'])
 @login_required
+@config_change
 def admin_save_system_webhooks():
     try:
         # Extract JSON data from request
@@ -493,6 +442,7 @@ def admin_edit_trigger():
 
 @app.route('/admin/add_trigger', methods=['POST'])
 @login_required
+@config_change
 def admin_add_trigger():
     logger.debug(request.form)
     update_result = add_alert_trigger(db, request.form)
@@ -506,6 +456,7 @@ def admin_add_trigger():
 
 @app.route('/admin/delete_trigger', methods=['POST'])
 @login_required
+@config_change
 def admin_delete_trigger():
     try:
         # Validate incoming JSON data
@@ -545,6 +496,7 @@ def admin_delete_trigger():
 
 @app.route('/admin/save_trigger_general', methods=['POST'])
 @login_required
+@config_change
 def admin_save_trigger_general():
     try:
         # Validate incoming JSON data
@@ -575,6 +527,7 @@ def admin_save_trigger_general():
 
 @app.route('/admin/save_trigger_two_tone', methods=['POST'])
 @login_required
+@config_change
 def admin_save_trigger_two_tone():
     try:
         # Validate incoming JSON data
@@ -605,6 +558,7 @@ def admin_save_trigger_two_tone():
 
 @app.route('/admin/save_trigger_long_tone', methods=['POST'])
 @login_required
+@config_change
 def admin_save_trigger_long_tone():
     try:
         # Validate incoming JSON data
@@ -634,6 +588,7 @@ def admin_save_trigger_long_tone():
 
 @app.route('/admin/save_trigger_hi_low_tone', methods=['POST'])
 @login_required
+@config_change
 def admin_save_trigger_hi_low_tone():
     try:
         # Validate incoming JSON data
@@ -663,6 +618,7 @@ def admin_save_trigger_hi_low_tone():
 
 @app.route('/admin/save_trigger_alert_filter', methods=['POST'])
 @login_required
+@config_change
 def admin_save_trigger_alert_filter():
     try:
         # Validate incoming JSON data
@@ -692,6 +648,7 @@ def admin_save_trigger_alert_filter():
 
 @app.route('/admin/save_trigger_emails', methods=['POST'])
 @login_required
+@config_change
 def admin_save_trigger_emails():
     try:
         # Validate incoming JSON data
@@ -726,6 +683,7 @@ def admin_save_trigger_emails():
 
 @app.route('/admin/save_trigger_pushover', methods=['POST'])
 @login_required
+@config_change
 def admin_save_trigger_pushover():
     try:
         # Validate incoming JSON data
@@ -755,6 +713,7 @@ def admin_save_trigger_pushover():
 
 @app.route('/admin/save_trigger_webhooks', methods=['POST'])
 @login_required
+@config_change
 def admin_save_trigger_webhooks():
     try:
         # Extract JSON data from request
@@ -789,6 +748,37 @@ def admin_save_trigger_webhooks():
         return jsonify({"success": False, "message": "An unexpected error occurred."}), 500
 
 
+@app.route('/admin/replay_dead_letters', methods=['POST'])
+@login_required
+def admin_replay_dead_letters():
+    try:
+        # Validate incoming JSON data
+        request_dict = request.get_json()
+        if not request_dict:
+            logger.error("No JSON data provided.")
+            return jsonify({"success": False, "message": "No data provided."}), 400
+
+        destination = request_dict.get("destination")
+        if not destination:
+            logger.error("Missing destination in the request.")
+            return jsonify(
+                {"success": False, "message": "Missing necessary information (destination)."}), 400
+
+        result = replay_dead_letters(rd, config_data, destination)
+        if result.get("success"):
+            return jsonify(result), 200
+        else:
+            logger.debug(result.get('message'))
+            return jsonify(result), 400
+
+    except json.JSONDecodeError:
+        logger.error("Error decoding JSON.")
+        return jsonify({"success": False, "message": "Invalid JSON format."}), 400
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        return jsonify({"success": False, "message": "Unexpected Error Occurred"}), 400
+
+
 @app.route('/admin/filters', methods=['GET'])
 @login_required
 def admin_edit_filter():
@@ -801,6 +791,7 @@ def admin_edit_filter():
 
 @app.route('/admin/add_filter', methods=['POST'])
 @login_required
+@config_change
 def admin_add_filter():
     logger.debug(request.form)
     update_result = add_filter(db, request.form)
@@ -814,6 +805,7 @@ def admin_add_filter():
 
 @app.route('/admin/delete_filter', methods=['POST'])
 @login_required
+@config_change
 def admin_delete_filter():
     try:
         # Validate incoming JSON data
@@ -853,6 +845,7 @@ def admin_delete_filter():
 
 @app.route('/admin/save_filter_general', methods=['POST'])
 @login_required
+@config_change
 def admin_save_filter_general():
     try:
         # Validate incoming JSON data
@@ -882,6 +875,7 @@ def admin_save_filter_general():
 
 @app.route('/admin/save_filter_keywords', methods=['POST'])
 @login_required
+@config_change
 def admin_save_filter_keywords():
     try:
         # Extract JSON data from request
@@ -950,10 +944,66 @@ def admin_change_password():
         return redirect(url_for('admin_index'))
 
 
+def resolve_call_system(call_data, api_system_data, system_cache=None):
+    # Use the system the API key resolved to unless the call is for another system
+    system_short_name = call_data.get('short_name')
+    if not system_short_name or system_short_name == api_system_data.get('system_short_name'):
+        return api_system_data
+
+    if system_cache is None:
+        return config_snapshot.get_system(system_short_name=system_short_name)
+
+    if system_short_name not in system_cache:
+        system_cache[system_short_name] = config_snapshot.get_system(system_short_name=system_short_name)
+    return system_cache[system_short_name]
+
+
+def get_batch_call_data():
+    # Accepts a JSON array of calls or one call per line when sent as NDJSON
+    if request.mimetype in ("application/x-ndjson", "application/jsonl"):
+        calls = []
+        for line in request.get_data(as_text=True).splitlines():
+            if not line.strip():
+                continue
+            try:
+                calls.append(json.loads(line))
+            except ValueError:
+                calls.append(None)
+        return calls
+
+    calls = request.get_json(silent=True)
+    if not isinstance(calls, list):
+        return None
+    return calls
+
+
+def reserve_call(system_data, call_data, request_key=None):
+    # Returns the reserved idempotency key and, for a duplicate call, the record of the first request
+    if not get_idempotency_config(config_data).get("enabled"):
+        return None, None
+
+    idempotency_key = get_idempotency_key(system_data, call_data, request_key)
+    if not idempotency_key:
+        return None, None
+
+    reserve_result = reserve_idempotency_key(rd, config_data, idempotency_key)
+    if not reserve_result.get("success"):
+        return None, None
+
+    return idempotency_key, reserve_result.get("result")
+
+
+def duplicate_response(duplicate_record):
+    if duplicate_record.get("status") == "complete":
+        return duplicate_record.get("response")
+
+    return {"success": False, "message": "Call is already being processed.", "result": []}
+
+
 # Endpoint to receive the JSON file with the audio URL
 @app.route('/process_alert', methods=['POST'])
-@require_api_key(db)
-def process_alert():
+@require_api_key
+def process_alert(api_system_data):
     # Create Result Dict
     result = {
         "success": False,
@@ -964,15 +1014,46 @@ def process_alert():
     call_data = request.get_json()
 
     if call_data:
-        system_data = get_systems(db, system_short_name=call_data.get('short_name'))
-        if system_data.get('success') and system_data.get("result", {}):
-            logger.debug(system_data.get('result', {}))
-            ## Start alert check to see if we match any of the alert triggers
-            process_result = process_call_data(db, rd, config_data, system_data.get("result")[0], call_data)
-            result["success"] = True
-            result["message"] = "Alert Triggers Checked."
-            result["result"] = process_result
-            return jsonify(result), 200
+        system_data = resolve_call_system(call_data, api_system_data)
+
+        if system_data:
+            logger.debug(system_data)
+            idempotency_key, duplicate_record = reserve_call(system_data, call_data,
+                                                             request.headers.get('Idempotency-Key'))
+            if duplicate_record:
+                return jsonify(duplicate_response(duplicate_record)), duplicate_record.get("status_code", 409)
+
+            try:
+                if alert_queue_config.get("enabled"):
+                    # Queue the call for the alert workers and return right away
+                    queue_result = enqueue_call(rd, config_data, system_data, call_data,
+                                                api_system_data.get("system_id"))
+                    if not queue_result.get("success"):
+                        if idempotency_key:
+                            release_idempotency_key(rd, idempotency_key)
+                        result["message"] = queue_result.get("message")
+                        return jsonify(result), 500
+
+                    result["success"] = True
+                    result["message"] = "Call Queued."
+                    result["result"] = {"job_id": queue_result.get("result", {}).get("job_id")}
+                    status_code = 202
+                else:
+                    ## Start alert check to see if we match any of the alert triggers
+                    process_result = process_call_data(db, rd, config_data, system_data, call_data)
+                    result["success"] = True
+                    result["message"] = "Alert Triggers Checked."
+                    result["result"] = process_result
+                    status_code = 200
+            except Exception:
+                # Let a retry process the call again
+                if idempotency_key:
+                    release_idempotency_key(rd, idempotency_key)
+                raise
+
+            if idempotency_key:
+                complete_idempotency_key(rd, config_data, idempotency_key, result, status_code)
+            return jsonify(result), status_code
         else:
             result["message"] = f"Unable to retrieve system data for {call_data.get('short_name')}"
             return jsonify(result), 400
@@ -981,6 +1062,122 @@ def process_alert():
         return jsonify(result), 400
 
 
+# Endpoint to receive a batch of calls, such as calls buffered by a recorder during an outage
+@app.route('/process_alerts', methods=['POST'])
+@require_api_key
+def process_alerts(api_system_data):
+    result = {
+        "success": False,
+        "message": "Unknown Error",
+        "result": []
+    }
+
+    batch_calls = get_batch_call_data()
+    if not batch_calls:
+        result["message"] = "Call data not provided"
+        return jsonify(result), 400
+
+    batch_config = config_data.get("batch_ingest", {})
+    if alert_queue_config.get("enabled"):
+        max_calls = batch_config.get("max_calls", 500)
+    else:
+        # Without the queue every call is processed before responding, keep that within the worker timeout
+        max_calls = batch_config.get("max_sync_calls", 5)
+    if len(batch_calls) > max_calls:
+        result["message"] = f"Batch contains {len(batch_calls)} calls, the maximum is {max_calls}"
+        return jsonify(result), 413
+
+    # Systems are resolved once per batch
+    system_cache = {}
+    call_results = []
+    valid_calls = []
+    for index, call_data in enumerate(batch_calls):
+        if not isinstance(call_data, dict) or not call_data:
+            call_results.append({"index": index, "success": False, "message": "Call data not provided", "result": []})
+            continue
+
+        system_data = resolve_call_system(call_data, api_system_data, system_cache)
+        if not system_data:
+            call_results.append({"index": index, "success": False,
+                                 "message": f"Unable to retrieve system data for {call_data.get('short_name')}",
+                                 "result": []})
+            continue
+
+        call_results.append(None)
+        valid_calls.append((index, system_data, call_data))
+
+    # Keys sent with a batch are made unique per call
+    request_key = request.headers.get('Idempotency-Key')
+
+    def reserve_batch_call(index, system_data, call_data):
+        # Returns the reserved idempotency key, or records the response of a duplicate call and returns False
+        idempotency_key, duplicate_record = reserve_call(system_data, call_data,
+                                                         f"{request_key}:{index}" if request_key else None)
+        if duplicate_record:
+            call_results[index] = dict(duplicate_response(duplicate_record), index=index)
+            return False
+        return idempotency_key
+
+    if alert_queue_config.get("enabled"):
+        queued_calls = []
+        for index, system_data, call_data in valid_calls:
+            idempotency_key = reserve_batch_call(index, system_data, call_data)
+            if idempotency_key is not False:
+                queued_calls.append((index, system_data, call_data, idempotency_key))
+
+        # Queue the whole batch in one Redis round trip
+        queue_results = enqueue_calls(rd, config_data, [(system_data, call_data) for _, system_data, call_data, _ in
+                                                        queued_calls], api_system_data.get("system_id"))
+        for (index, _, _, idempotency_key), queue_result in zip(queued_calls, queue_results):
+            call_results[index] = {"index": index, "success": queue_result.get("success"),
+                                   "message": queue_result.get("message"),
+                                   "result": {"job_id": queue_result.get("result", {}).get("job_id")}
+                                   if queue_result.get("success") else []}
+            if idempotency_key:
+                if queue_result.get("success"):
+                    complete_idempotency_key(rd, config_data, idempotency_key, call_results[index], 202)
+                else:
+                    release_idempotency_key(rd, idempotency_key)
+        status_code = 202
+    else:
+        for index, system_data, call_data in valid_calls:
+            # Reserved just before processing so the key can't expire while earlier calls are processed
+            idempotency_key = reserve_batch_call(index, system_data, call_data)
+            if idempotency_key is False:
+                continue
+
+            try:
+                process_result = process_call_data(db, rd, config_data, system_data, call_data)
+            except Exception as e:
+                logger.error(f"Unexpected error processing call {index} of batch: {e}")
+                call_results[index] = {"index": index, "success": False, "message": str(e), "result": []}
+                if idempotency_key:
+                    release_idempotency_key(rd, idempotency_key)
+                continue
+
+            call_results[index] = {"index": index, "success": True, "message": "Alert Triggers Checked.",
+                                   "result": process_result}
+            if idempotency_key:
+                complete_idempotency_key(rd, config_data, idempotency_key, call_results[index], 200)
+        status_code = 200
+
+    result["success"] = True
+    result["message"] = f"Processed {len(batch_calls)} calls."
+    result["result"] = call_results
+    return jsonify(result), status_code
+
+
+@app.route("/api/alert_status/<job_id>")
+@require_api_key
+def api_alert_status(job_id, api_system_data):
+    job_data = get_alert_job(rd, job_id)
+    # Jobs are visible to the API key that submitted them, which may queue calls for other systems
+    if not job_data or job_data.get("submitted_by", job_data.get("system_id")) != api_system_data.get("system_id"):
+        return jsonify({"success": False, "message": "Alert job not found.", "result": []}), 404
+
+    return jsonify({"success": True, "message": f"Alert job {job_data.get('status')}.", "result": job_data}), 200
+
+
 @app.route("/api/get_triggers")
 @login_required
 def api_get_triggers():
@@ -1012,11 +1209,41 @@ def api_get_filters():
     return jsonify(filter_data_result)
 
 
-systems = get_systems(db)
-if systems.get("result", []):
-    for system in systems.get("result"):
-        system_short_name = system.get("system_short_name")
-        clear_loop_manager(system_short_name, action="start")
+@app.route("/api/get_dead_letters")
+@login_required
+def api_get_dead_letters():
+    destination = request.args.get('destination', None)
+
+    if destination:
+        dead_letter_result = get_dead_letters(rd, destination)
+    else:
+        dead_letter_result = get_dead_letter_destinations(rd)
+
+    return jsonify(dead_letter_result)
+
+
+@app.route("/api/get_transcode_metrics")
+@login_required
+def api_get_transcode_metrics():
+    try:
+        metrics = get_transcode_pool(config_data).get_metrics()
+        audio_cache = get_audio_cache(config_data)
+        if audio_cache:
+            metrics["conversion_paths"] = dict(audio_cache.conversion_counts)
+        return jsonify({"success": True, "message": "Transcode Metrics Found", "result": metrics})
+    except Exception as e:
+        return jsonify({"success": False, "message": f"Unable to get transcode metrics: {e}", "result": {}})
+
+
+# Queued calls are processed here unless a separate alert_worker.py tier is used
+if alert_queue_config.get("enabled") and alert_queue_config.get("embedded_workers"):
+    alert_queue_worker = AlertQueueWorker(db, rd, config_data, config_snapshot)
+    alert_queue_worker.start()
+
+# Queued alert actions are delivered here unless a separate alert_worker.py tier is used
+if delivery_queue_config.get("enabled") and delivery_queue_config.get("embedded_workers"):
+    delivery_worker = DeliveryWorker(rd, config_data, config_snapshot)
+    delivery_worker.start()
 
 # if __name__ == '__main__':
 #     app.run(host="0.0.0.0", port=8002, debug=False)
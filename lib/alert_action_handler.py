@@ -1,105 +1,376 @@
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 
 from lib.email_handler import EmailSender, generate_trigger_alert_email, generate_system_alert_email
 from lib.facebook_handler import FacebookAPI
+from lib.helper_handler import RenderContext, ACTION_DELIVERED, ACTION_SKIPPED, ACTION_FAILED
 from lib.pushover_handler import PushoverSender
 from lib.telegram_handler import TelegramAPI
 from lib.webhook_handler import WebHook
 
 module_logger = logging.getLogger('icad_alerting_api.alert_actions')
 
+_action_executor = None
+_action_executor_lock = threading.Lock()
 
-def run_trigger_actions(global_config_data, system_config_data, trigger_config, alert_data, call_data):
-    module_logger.info(f"Running Trigger Actions for {trigger_config.get('trigger_name')}")
 
-    module_logger.debug(f"Call Data: {call_data}")
-    module_logger.debug(f"Alert Data: {alert_data}")
+def get_action_config(global_config_data):
+    """
+    Get the alert action configuration with defaults applied.
+
+    :param global_config_data: Dictionary containing global configuration data
+    :return: Dictionary containing the alert action configuration
+    """
+    action_config = {
+        "max_workers": 16,
+        "total_timeout": 150,
+        "timeouts": {
+            "email": 30,
+            "pushover": 15,
+            "facebook": 30,
+            "telegram": 120,
+            "webhook": 15
+        }
+    }
+    configured = global_config_data.get("alert_actions", {})
+    action_config.update({key: value for key, value in configured.items() if key != "timeouts"})
+    action_config["timeouts"].update(configured.get("timeouts", {}))
+    return action_config
+
+
+def get_action_executor(global_config_data):
+    """
+    Get the process wide executor used to send alert actions, creating it on first use.
+
+    :param global_config_data: Dictionary containing global configuration data
+    :return: ThreadPoolExecutor shared by every call processed in this process
+    """
+    global _action_executor
+    with _action_executor_lock:
+        if _action_executor is None:
+            max_workers = int(get_action_config(global_config_data).get("max_workers", 16))
+            _action_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="alert_action")
+        return _action_executor
+
+
+def action_result(channel, target, result, message=None):
+    """
+    Build a delivery outcome entry for an alert action.
+
+    :param channel: Name of the notification channel
+    :param target: Trigger name or System the action was run for
+    :param result: Return value of the sender, ACTION_DELIVERED, ACTION_SKIPPED or ACTION_FAILED, a bool or a result
+                   dictionary
+    :param message: Optional message describing a failure
+    :return: Dictionary describing the delivery outcome, its status is one of the action results
+    """
+    if result in (ACTION_DELIVERED, ACTION_SKIPPED, ACTION_FAILED):
+        status = result
+    elif isinstance(result, dict):
+        status = ACTION_DELIVERED if result.get("success") else ACTION_FAILED
+    else:
+        status = ACTION_DELIVERED if result else ACTION_FAILED
+
+    outcome = {"channel": channel, "target": target, "success": status != ACTION_FAILED, "status": status}
+    if message:
+        outcome["message"] = message
+    return outcome
+
+
+def run_actions(global_config_data, actions):
+    """
+    Send alert actions concurrently and collect their outcomes.
+
+    Every action is submitted to the shared executor at once. Each one is given the timeout of its channel, counted
+    from when it starts running, and the whole set is bounded by total_timeout. An action still running when its time
+    is up is reported as timed out and left to finish in the background, an action still waiting for an executor
+    thread is cancelled and reported as not started. Webhooks are submitted to the asyncio webhook engine when it is
+    enabled so they don't hold an executor thread.
+
+    :param global_config_data: Dictionary containing global configuration data
+    :param actions: List of action dictionaries from build_trigger_actions and build_global_actions
+    :return: List of delivery outcome dictionaries in the same order as the actions
+    """
+    if not actions:
+        return []
+
+    action_config = get_action_config(global_config_data)
+    executor = get_action_executor(global_config_data)
+
+    start_time = time.monotonic()
+    total_deadline = start_time + action_config.get("total_timeout", 150)
+
+    futures = []
+    for action in actions:
+        channel_timeout = action_config["timeouts"].get(action.get("channel"), action_config.get("total_timeout", 150))
+        timing = {}
+        future = None
+        if action.get("channel") == "webhook":
+            future = submit_webhook_action(global_config_data, action)
+            # The webhook engine starts every request right away
+            timing["started_at"] = start_time
+        if future is None:
+            future = executor.submit(_run_timed_action, timing, global_config_data, action)
+        futures.append((action, future, timing, channel_timeout))
+
+    results = []
+    for action, future, timing, channel_timeout in futures:
+        channel, target = action.get("channel"), action.get("target")
+        try:
+            results.append(action_result(channel, target,
+                                         _wait_for_action(future, timing, channel_timeout, total_deadline)))
+        except FutureTimeoutError:
+            if future.cancel():
+                module_logger.error(f"<<{channel.capitalize()}>> Alert for {target} not started, no sender was free "
+                                    f"before the timeout")
+                results.append(action_result(channel, target, False, "Not started"))
+            else:
+                module_logger.error(f"<<{channel.capitalize()}>> Timed out sending alert for {target}")
+                results.append(action_result(channel, target, False, "Timed out while sending"))
+        except Exception as e:
+            module_logger.error(f"<<{channel.capitalize()}>> Unexpected error sending alert for {target}: {e}")
+            results.append(action_result(channel, target, False, str(e)))
+
+    return results
+
+
+def _run_timed_action(timing, global_config_data, action):
+    timing["started_at"] = time.monotonic()
+    return send_action(global_config_data, action.get("system"), action.get("trigger"), action.get("channel"),
+                       action.get("args", ()), action.get("render_context"))
+
+
+def _wait_for_action(future, timing, channel_timeout, total_deadline):
+    # The channel timeout only runs once the action has started, until then it is polled so the start is noticed
+    while True:
+        started_at = timing.get("started_at")
+        deadline = total_deadline if started_at is None else min(started_at + channel_timeout, total_deadline)
+        remaining = deadline - time.monotonic()
+        try:
+            return future.result(timeout=max(0, min(remaining, 1) if started_at is None else remaining))
+        except FutureTimeoutError:
+            if started_at is not None or time.monotonic() >= deadline:
+                raise
+
+
+def submit_webhook_action(global_config_data, action):
+    """
+    Submit a webhook action to the asyncio webhook engine.
+
+    :param global_config_data: Dictionary containing global configuration data
+    :param action: Webhook action dictionary
+    :return: Future of the webhook, or None when the engine isn't enabled or the webhook couldn't be submitted
+    """
+    try:
+        webhook_id, alert_data, call_data = action.get("args")
+        webhook = get_action_webhook(action.get("system"), action.get("trigger"), webhook_id)
+        if not webhook:
+            # send_action reports the missing webhook
+            return None
+        return WebHook(global_config_data, action.get("system"), action.get("trigger"),
+                       action.get("render_context")).submit_webhook(
+            webhook.get("webhook_url"), webhook.get("webhook_headers", {}), webhook.get("webhook_body", {}),
+            alert_data, call_data)
+    except Exception as e:
+        module_logger.error(f"<<Webhook>> Unable to submit webhook for {action.get('target')}: {e}")
+        return None
+
+
+def get_action_webhook(system_config_data, trigger_config, webhook_id):
+    """
+    Look up the enabled webhook of a webhook action.
+
+    :param system_config_data: Dictionary containing the system configuration
+    :param trigger_config: Dictionary containing the trigger configuration or None for system webhooks
+    :param webhook_id: ID of the webhook
+    :return: The webhook dictionary, or None if it was deleted or disabled
+    """
+    if trigger_config:
+        webhooks = trigger_config.get("trigger_webhooks", [])
+    else:
+        webhooks = system_config_data.get("system_webhooks", [])
+
+    return next((webhook for webhook in webhooks
+                 if webhook.get("webhook_id") == webhook_id and webhook.get("enabled")), None)
 
-    # Send Alert Emails
-    if system_config_data.get("email_enabled", False):
-        em = EmailSender(global_config_data, system_config_data)
 
+def send_email_action(global_config_data, system_config_data, trigger_config, alert_data, call_data,
+                      render_context=None):
+    """
+    Render and send the alert email of a trigger, or of the system when no trigger is given.
+
+    :param global_config_data: Dictionary containing global configuration data
+    :param system_config_data: Dictionary containing the system configuration
+    :param trigger_config: Dictionary containing the trigger configuration or None for system emails
+    :param alert_data: List of triggered alert dictionaries
+    :param call_data: Dictionary containing data about the call
+    :param render_context: RenderContext shared with the other senders of the alert
+    :return: Result dictionary of the email sender, a failed result dictionary when the email couldn't be rendered, or
+             ACTION_SKIPPED when there is no email address to send to
+    """
+    if trigger_config:
+        target = f"Trigger {trigger_config.get('trigger_name')}"
+        emails = trigger_config.get("trigger_emails", [])
+    else:
+        target = f"System {system_config_data.get('system_name')}"
+        emails = system_config_data.get("system_emails", [])
+
+    email_list = [email.get("email_address") for email in emails if email.get("enabled")]
+    if not email_list:
+        module_logger.warning(f"Skipping Sending <<Email>> for {target} No alert emails set")
+        return ACTION_SKIPPED
+
+    if trigger_config:
         subject, body = generate_trigger_alert_email(global_config_data, system_config_data, trigger_config, alert_data,
-                                                     call_data)
+                                                     call_data, render_context)
+    else:
+        subject, body = generate_system_alert_email(global_config_data, system_config_data, alert_data, call_data,
+                                                    render_context)
 
-        if not subject or not body:
-            module_logger.warning(
-                f"Skipping Sending Email for Trigger {trigger_config.get('trigger_name')} Unable to get email body or subject.")
+    if not subject or not body:
+        module_logger.error(f"<<Email>> <<Failed>> for {target} Unable to render email body or subject.")
+        return {"success": False, "message": "Unable to render email body or subject."}
+
+    return EmailSender(global_config_data, system_config_data).send_email(email_list, subject, body)
+
+
+def send_action(global_config_data, system_config_data, trigger_config, channel, args, render_context=None):
+    """
+    Send a single alert action with the sender of its channel.
+
+    :param global_config_data: Dictionary containing global configuration data
+    :param system_config_data: Dictionary containing the system configuration
+    :param trigger_config: Dictionary containing the trigger configuration or None for system actions
+    :param channel: Name of the notification channel
+    :param args: Arguments of the action, the webhook ID for webhooks followed by the alert and call data
+    :param render_context: RenderContext of the alert and call shared by the actions built together, queued actions
+                           are sent without one and render with a context of their own
+    :return: Return value of the sender, an action result, a bool or a result dictionary
+    """
+    if channel == "email":
+        return send_email_action(global_config_data, system_config_data, trigger_config, *args,
+                                 render_context=render_context)
+    elif channel == "pushover":
+        return PushoverSender(global_config_data, system_config_data, trigger_config,
+                              render_context).send_text_alert_push(*args)
+    elif channel == "facebook":
+        return FacebookAPI(global_config_data, system_config_data, render_context=render_context).post_message(*args)
+    elif channel == "telegram":
+        return TelegramAPI(global_config_data, system_config_data, render_context=render_context).post_audio(*args)
+    elif channel == "webhook":
+        webhook_id, alert_data, call_data = args
+        webhook = get_action_webhook(system_config_data, trigger_config, webhook_id)
+        if not webhook:
+            module_logger.warning(f"Skipping <<Webhook>> {webhook_id}, it was deleted or disabled.")
+            return ACTION_SKIPPED
+        return WebHook(global_config_data, system_config_data, trigger_config, render_context).send_webhook(
+            webhook.get("webhook_url"), webhook.get("webhook_headers", {}), webhook.get("webhook_body", {}),
+            alert_data, call_data)
+
+    module_logger.error(f"Unknown alert action channel {channel}")
+    return False
+
+
+def new_action(channel, target, destination, system_config_data, trigger_config, args):
+    """
+    Describe an alert action to send.
+
+    :param channel: Name of the notification channel
+    :param target: Trigger name or System the action is run for
+    :param destination: Name identifying where the action is delivered, used for dead letters
+    :param system_config_data: Dictionary containing the system configuration
+    :param trigger_config: Dictionary containing the trigger configuration or None for system actions
+    :param args: Arguments of the action, must be JSON serializable so the action can be queued. They hold IDs rather
+                 than URLs, headers or rendered bodies so no credentials are queued, senders look them up in the system
+                 and trigger configuration when the action is sent
+    :return: Dictionary describing the action
+    """
+    return {"channel": channel, "target": target, "destination": destination, "system": system_config_data,
+            "trigger": trigger_config, "args": args}
+
+
+def with_render_context(actions, alert_data, call_data):
+    """
+    Give actions built for the same alerts one RenderContext so their placeholder values are computed once.
+
+    The context isn't queued with the actions, it only lives as long as the action dictionaries of this call.
+
+    :param actions: List of action dictionaries
+    :param alert_data: List of triggered alert dictionaries the actions were built for
+    :param call_data: Dictionary containing data about the call
+    :return: The actions
+    """
+    render_context = RenderContext(alert_data, call_data)
+    for action in actions:
+        action["render_context"] = render_context
+    return actions
+
+
+def build_trigger_actions(global_config_data, system_config_data, trigger_config, alert_data, call_data):
+    trigger_name = trigger_config.get('trigger_name')
+    destination = f"{system_config_data.get('system_short_name')}:{trigger_config.get('trigger_id')}"
+    actions = []
+
+    # Send Alert Emails, rendered when they are sent
+    if system_config_data.get("email_enabled", False):
+        if any(email.get("enabled") for email in trigger_config.get("trigger_emails", [])):
+            actions.append(new_action("email", trigger_name, f"email:{destination}", system_config_data,
+                                      trigger_config, [alert_data, call_data]))
         else:
-            email_list = []
-            for email in trigger_config.get("trigger_emails", []):
-                if email.get("enabled"):
-                    email_list.append(email.get("email_address"))
-
-            if len(email_list) >= 1:
-                email_result = em.send_email(email_list, subject, body)
-                if email_result:
-                    module_logger.info("<<Trigger>> <<Email>> Sent Successfully")
-            else:
-                module_logger.warning(
-                    f"Skipping Sending Email for Trigger {system_config_data.get('system_name')} No alert emails set")
+            module_logger.warning(
+                f"Skipping Sending Email for Trigger {system_config_data.get('system_name')} No alert emails set")
 
-    # Send Trigger Alert Pushover
-    if system_config_data.get("pushover_enabled", False):
-        PushoverSender(global_config_data, system_config_data, trigger_config).send_text_alert_push(alert_data,
-                                                                                                    call_data)
+    # Send Trigger Alert Pushover, triggers without their own tokens don't push
+    if system_config_data.get("pushover_enabled", False) and trigger_config.get("pushover_app_token") and \
+            trigger_config.get("pushover_group_token"):
+        actions.append(new_action("pushover", trigger_name, f"pushover:{destination}", system_config_data,
+                                  trigger_config, [alert_data, call_data]))
 
     # Send to Trigger Webhooks
     for webhook in trigger_config.get("trigger_webhooks", []):
         if webhook.get("enabled"):
-            WebHook(global_config_data, system_config_data, trigger_config).send_webhook(webhook.get("webhook_url"),
-                                                                                         webhook.get("webhook_headers",
-                                                                                                     {}),
-                                                                                         webhook.get("webhook_body",
-                                                                                                     {}), alert_data,
-                                                                                         call_data)
+            actions.append(new_action("webhook", trigger_name, f"webhook:{destination}:{webhook.get('webhook_id')}",
+                                      system_config_data, trigger_config,
+                                      [webhook.get("webhook_id"), alert_data, call_data]))
 
+    return with_render_context(actions, alert_data, call_data)
 
-def run_global_actions(global_config_data, system_config_data, alert_data, call_data):
-    module_logger.info(f"Running System Actions for {system_config_data.get('system_name')}")
 
-    module_logger.debug(f"Call Data: {call_data}")
-    module_logger.debug(f"Alert Data: {alert_data}")
+def build_global_actions(global_config_data, system_config_data, alert_data, call_data):
+    destination = f"{system_config_data.get('system_short_name')}:system"
+    actions = []
 
-    # Send Alert Emails
+    # Send Alert Emails, rendered when they are sent
     if system_config_data.get("email_enabled", False):
-        em = EmailSender(global_config_data, system_config_data)
-
-        subject, body = generate_system_alert_email(global_config_data, system_config_data, alert_data, call_data)
-
-        if not subject or not body:
-            module_logger.warning(
-                f"Skipping Sending Email for System {system_config_data.get('system_name')} Unable to get email body or subject.")
+        if any(email.get("enabled") for email in system_config_data.get("system_emails", [])):
+            actions.append(new_action("email", "System", f"email:{destination}", system_config_data, None,
+                                      [alert_data, call_data]))
         else:
-            email_list = []
-            for email in system_config_data.get("system_emails", []):
-                if email.get("enabled"):
-                    email_list.append(email.get("email_address"))
-
-            if len(email_list) >= 1:
-                email_result = em.send_email(email_list, subject, body)
-                if email_result:
-                    module_logger.info("<<System>> <<Email>> Sent Successfully")
-            else:
-                module_logger.warning(
-                    f"Skipping Sending <<Email>> for <<System>> {system_config_data.get('system_name')} No alert emails set")
+            module_logger.warning(
+                f"Skipping Sending <<Email>> for <<System>> {system_config_data.get('system_name')} No alert emails set")
 
     # Send Global Alert Pushover
     if system_config_data.get("pushover_enabled", False):
-        PushoverSender(global_config_data, system_config_data).send_text_alert_push(alert_data, call_data)
+        actions.append(new_action("pushover", "System", f"pushover:{destination}", system_config_data, None,
+                                  [alert_data, call_data]))
 
     # Send Alert Facebook
     if system_config_data.get("facebook_enabled", False):
-        FacebookAPI(global_config_data, system_config_data).post_message(alert_data, call_data)
+        actions.append(new_action("facebook", "System", f"facebook:{destination}", system_config_data, None,
+                                  [alert_data, call_data]))
 
     # Send Alert Telegram
     if system_config_data.get("telegram_enabled", False):
-        TelegramAPI(global_config_data, system_config_data).post_audio(alert_data, call_data)
+        actions.append(new_action("telegram", "System", f"telegram:{destination}", system_config_data, None,
+                                  [alert_data, call_data]))
 
     # Send to System Webhooks
     for webhook in system_config_data.get("system_webhooks", []):
         if webhook.get("enabled"):
-            WebHook(global_config_data, system_config_data).send_webhook(webhook.get("webhook_url"),
-                                                                         webhook.get("webhook_headers", {}),
-                                                                         webhook.get("webhook_body", {}), alert_data,
-                                                                         call_data)
+            actions.append(new_action("webhook", "System", f"webhook:{destination}:{webhook.get('webhook_id')}",
+                                      system_config_data, None,
+                                      [webhook.get("webhook_id"), alert_data, call_data]))
+
+    return with_render_context(actions, alert_data, call_data)
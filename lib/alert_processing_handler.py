@@ -2,172 +2,242 @@ import logging
 import re
 import time
 
-import redis
-
-from lib.alert_action_handler import run_global_actions, run_trigger_actions
+from lib.alert_action_handler import build_global_actions, build_trigger_actions, run_actions
 from lib.alert_filter_handler import get_alert_filters
+from lib.audio_cache_handler import get_audio_cache, get_audio_cache_config
+from lib.audio_file_handler import get_audio_source_url
+from lib.delivery_queue_handler import enqueue_deliveries, get_delivery_queue_config
+from lib.alert_trigger_handler import compile_alert_triggers, TRIGGER_TWO_TONE, TRIGGER_LONG_TONE, \
+    TRIGGER_HI_LOW_TONE, TRIGGER_ALERT_FILTER
 
 module_logger = logging.getLogger('icad_alerting_api.alert_processing')
 
+SUPPRESSED_TRIGGERS_PREFIX = "icad_suppressed_triggers:"
+
+# Suppressed triggers are members of KEYS[1] scored by the time their suppression expires. ARGV holds trigger id and
+# ignore seconds pairs, the ids that weren't suppressed are claimed and returned. The set expires with its last
+# suppression so sets of deleted systems don't linger.
+CLAIM_TRIGGERS_SCRIPT = """
+local now = redis.call('TIME')
+local current_time = tonumber(now[1]) + tonumber(now[2]) / 1000000
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', current_time)
+local claimed = {}
+for i = 1, #ARGV, 2 do
+    if not redis.call('ZSCORE', KEYS[1], ARGV[i]) then
+        redis.call('ZADD', KEYS[1], current_time + tonumber(ARGV[i + 1]), ARGV[i])
+        table.insert(claimed, ARGV[i])
+    end
+end
+local last = redis.call('ZRANGE', KEYS[1], -1, -1, 'WITHSCORES')
+if last[2] then
+    redis.call('PEXPIREAT', KEYS[1], math.ceil(tonumber(last[2]) * 1000))
+end
+return claimed
+"""
+
 
 def process_call_data(db, rd, global_config_data, system_data, call_data):
-    process_result = {"alert_result": []}
-    alert_result = check_alert_triggers(db, rd, global_config_data, system_data, call_data)
+    process_result = {"alert_result": [], "action_result": []}
+    call_context = CallContext(call_data)
+
+    # The audio downloads while the tones are matched so it's already cached when the Telegram post starts
+    audio_prefetch = start_audio_prefetch(global_config_data, system_data, call_data)
+    try:
+        alert_result = check_alert_triggers(db, rd, global_config_data, system_data, call_data, call_context)
+    except Exception:
+        if audio_prefetch:
+            audio_prefetch.cancel()
+        raise
+
+    if audio_prefetch and not any(alert_data.get("telegram_enabled") for alert_data in alert_result):
+        audio_prefetch.cancel()
+
     process_result["alert_result"] = alert_result
     module_logger.debug(alert_result)
     if len(alert_result) >= 1:
-        # Process Global System Alerts
-        run_global_actions(global_config_data, system_data, alert_result, call_data)
+        alert_triggers = {trigger.get("trigger_id"): trigger for trigger in system_data.get("alert_triggers", [])}
+
+        # Collect the actions of each triggered alert and the global system actions so they are all sent at once
+        actions = []
+        for alert_data in alert_result:
+            trigger = alert_triggers.get(alert_data.get("trigger_id"))
+            module_logger.info(f"Running Trigger Actions for {trigger.get('trigger_name')}")
+            actions.extend(build_trigger_actions(global_config_data, system_data, trigger, [alert_data], call_data))
+
+        module_logger.info(f"Running System Actions for {system_data.get('system_name')}")
+        actions.extend(build_global_actions(global_config_data, system_data, alert_result, call_data))
+
+        if get_delivery_queue_config(global_config_data).get("enabled"):
+            # Queued actions are sent by the delivery workers and retried until they succeed or are dead lettered
+            process_result["action_result"] = enqueue_deliveries(rd, global_config_data, actions)
+        else:
+            process_result["action_result"] = run_actions(global_config_data, actions)
 
     return process_result
 
 
-def get_tolerance(trigger, tone_key):
-    """Calculate the tolerance for a tone."""
-    return trigger.get("tone_tolerance", 2) / 100.0 * trigger.get(tone_key)
+def start_audio_prefetch(global_config_data, system_data, call_data):
+    """
+    Start downloading the call audio when a channel that posts it could fire for the system.
 
+    :param global_config_data: Dictionary containing global configuration data
+    :param system_data: Dictionary containing the system configuration and its alert triggers
+    :param call_data: Dictionary containing data about the call
+    :return: AudioPrefetch, or None when the audio isn't prefetched
+    """
+    audio_url = get_audio_source_url(call_data)
+    if not audio_url or not system_data.get("telegram_enabled"):
+        return None
 
-def is_within_range(tone, tone_range):
-    """Check if the tone is within the given range."""
-    return tone_range[0] <= tone <= tone_range[1]
+    if not any(trigger.get("enabled") and trigger.get("enable_telegram")
+               for trigger in system_data.get("alert_triggers", [])):
+        return None
 
+    if not get_audio_cache_config(global_config_data).get("prefetch"):
+        return None
 
-def are_all_tone_conditions_met(conditions_required, conditions_met):
-    # Check each condition in conditions_required
-    for condition, is_required in conditions_required.items():
-        # If it's required but not met, return False
-        if is_required and not conditions_met[condition]:
-            return False
-    # If all required conditions are met, return True
-    return True
+    # Deliveries sent by a separate alert_worker.py tier can't use audio cached by this process
+    delivery_queue_config = get_delivery_queue_config(global_config_data)
+    if delivery_queue_config.get("enabled") and not delivery_queue_config.get("embedded_workers"):
+        return None
 
+    audio_cache = get_audio_cache(global_config_data)
+    if not audio_cache:
+        return None
 
-def get_alert_filter_status(trigger):
-    # Check if 'alert_filter_id' is present and not None
-    if trigger.get('alert_filter_id') is not None:
-        # Safely get 'trigger_alert_filters' list
-        alert_filters = trigger.get('trigger_alert_filters', [])
+    return audio_cache.prefetch(audio_url)
 
-        # Check if there is at least one filter and it has 'enabled' key
-        if alert_filters and 'enabled' in alert_filters[0]:
-            return alert_filters[0]['enabled']
 
-    return False
+def is_within_range(tone, tone_window):
+    """Check if the tone is within the given window."""
+    return tone_window[0] <= tone <= tone_window[1]
 
 
-def check_alert_triggers(db, rd, global_config_data, system_data, call_data):
+def check_alert_triggers(db, rd, global_config_data, system_data, call_data, call_context=None):
     triggered_alerts = []
 
+    if call_context is None:
+        call_context = CallContext(call_data)
+
     alert_triggers = system_data.get('alert_triggers')
     if not len(alert_triggers):
         module_logger.warning("No Alert Triggers in System Data. Skipping Tone Check")
         return triggered_alerts
 
-    # Get the list of excluded trigger ids once for this system
-    triggered_alert_list = get_active_alerts_cache(rd, f"icad_current_alerts:{call_data.get('short_name')}")
-    excluded_id_list = [t["trigger_id"] for t in triggered_alert_list]
-
-    for trigger in alert_triggers:
-        if not trigger.get("enabled"):
-            continue
-
-        if trigger.get("trigger_id") in excluded_id_list:
-            module_logger.warning(f"Ignoring {trigger.get('trigger_name')}")
+    # Triggers are compiled with the config snapshot, compile them here for systems loaded elsewhere
+    compiled_triggers = system_data.get("compiled_triggers")
+    if compiled_triggers is None:
+        compiled_triggers = compile_alert_triggers(alert_triggers)
+
+    # Only check the triggers whose tone ranges contain a detected tone
+    trigger_index = system_data.get("trigger_index")
+    if trigger_index is not None:
+        candidate_positions = trigger_index.get_candidates(call_data)
+    else:
+        candidate_positions = range(len(compiled_triggers))
+
+    # Match every trigger at once when the system uses the vectorized tone matcher
+    tone_matcher = system_data.get("tone_matcher")
+    tone_matches = tone_matcher.match(call_data) if tone_matcher is not None else None
+
+    matched_alerts = []
+    for position in candidate_positions:
+        trigger = compiled_triggers[position]
+        if not trigger.enabled:
             continue
 
-        alert_data = {"trigger_id": trigger.get('trigger_id'), "trigger_name": trigger.get('trigger_name'),
-                      "timestamp": time.time(), "facebook_enabled": trigger.get("enable_facebook", False),
-                      "telegram_enabled": trigger.get("enable_telegram", False),
+        alert_data = {"trigger_id": trigger.trigger_id, "trigger_name": trigger.trigger_name,
+                      "timestamp": time.time(), "facebook_enabled": trigger.enable_facebook,
+                      "telegram_enabled": trigger.enable_telegram,
                       "two_tone": [], "long_tone": [], "hi_low_tone": [], "alert_filter": []}
 
-        alert_filter_condition = get_alert_filter_status(trigger)
-
-        conditions_required = {
-            "two_tone": True if trigger.get('two_tone_a') is not None and trigger.get(
-                'two_tone_b') is not None else False,
-            "long_tone": True if trigger.get('long_tone') is not None else False,
-            "hi_low_tone": True if trigger.get('hi_low_tone_a') is not None and trigger.get(
-                'hi_low_tone_b') is not None else False,
-            "alert_filter": alert_filter_condition
-        }
-        conditions_met = {"two_tone": False, "long_tone": False, "hi_low_tone": False, "alert_filter": False}
+        conditions_required = trigger.conditions
+        conditions_met = 0
 
         # Check if no conditions are required
-        if not any(conditions_required.values()):
-            module_logger.warning(f"Skipping tone alert trigger {trigger.get('trigger_name')}. No conditions required.")
+        if not conditions_required:
+            module_logger.warning(f"Skipping tone alert trigger {trigger.trigger_name}. No conditions required.")
             continue
 
-        if conditions_required.get('two_tone'):
-            two_tone_matches = check_two_tone_triggers(trigger, call_data)
+        if conditions_required & TRIGGER_TWO_TONE:
+            two_tone_matches = get_tone_matches(tone_matches, position, "two_tone") if tone_matches is not None \
+                else check_two_tone_triggers(trigger, call_data)
             if len(two_tone_matches) >= 1:
-                conditions_met["two_tone"] = True
+                conditions_met |= TRIGGER_TWO_TONE
                 alert_data["two_tone"].extend(two_tone_matches)
 
-        if conditions_required.get('long_tone'):
-            long_tone_matches = check_long_tone_triggers(trigger, call_data)
+        if conditions_required & TRIGGER_LONG_TONE:
+            long_tone_matches = get_tone_matches(tone_matches, position, "long_tone") if tone_matches is not None \
+                else check_long_tone_triggers(trigger, call_data)
             if len(long_tone_matches) >= 1:
-                conditions_met["long_tone"] = True
+                conditions_met |= TRIGGER_LONG_TONE
                 alert_data["long_tone"].extend(long_tone_matches)
 
-        if conditions_required.get('hi_low_tone'):
-            high_low_matches = check_hi_low_tone_triggers(trigger, call_data)
+        if conditions_required & TRIGGER_HI_LOW_TONE:
+            high_low_matches = get_tone_matches(tone_matches, position, "hi_low_tone") if tone_matches is not None \
+                else check_hi_low_tone_triggers(trigger, call_data)
             if len(high_low_matches) >= 1:
-                conditions_met["hi_low_tone"] = True
+                conditions_met |= TRIGGER_HI_LOW_TONE
                 alert_data["hi_low_tone"].extend(high_low_matches)
 
-        if conditions_required.get('alert_filter'):
-            alert_filter_matches = check_alert_filter_triggers(db, trigger, call_data)
+        if conditions_required & TRIGGER_ALERT_FILTER:
+            alert_filter_matches = check_alert_filter_triggers(db, trigger.trigger, call_data,
+                                                               system_data.get("alert_filters"), call_context)
             if len(alert_filter_matches) >= 1:
-                conditions_met["alert_filter"] = True
+                conditions_met |= TRIGGER_ALERT_FILTER
                 alert_data["alert_filter"].extend(alert_filter_matches)
 
-        all_conditions_met = are_all_tone_conditions_met(conditions_required, conditions_met)
-        if all_conditions_met:
-            module_logger.info(f"Alert triggered for {trigger.get('trigger_name')}")
-            active_dict = {
-                "last_detected": time.time(),
-                "ignore_seconds": trigger.get("ignore_time", 300),
-                "trigger_id": trigger.get("trigger_id")
-            }
-            add_active_alerts_cache(rd, f"icad_current_alerts:{call_data.get('short_name')}", active_dict)
-            excluded_id_list.append(trigger.get("trigger_id"))
-            triggered_alerts.append(alert_data)
-
-            # Start Alerting Process For Tones
-            module_logger.debug(alert_data)
-            run_trigger_actions(global_config_data, system_data, trigger, [alert_data], call_data)
+        if conditions_met == conditions_required:
+            matched_alerts.append((trigger, alert_data))
+
+    # Suppression is checked and claimed for every matched trigger in one atomic script so concurrent calls for the
+    # same system can't both alert
+    claimed_ids = claim_triggers(rd, system_data.get("system_id"),
+                                 [(trigger.trigger_id, trigger.ignore_time) for trigger, _ in matched_alerts])
+
+    for trigger, alert_data in matched_alerts:
+        if trigger.trigger_id not in claimed_ids:
+            module_logger.warning(f"Ignoring {trigger.trigger_name}")
+            continue
+
+        module_logger.info(f"Alert triggered for {trigger.trigger_name}")
+        triggered_alerts.append(alert_data)
+        module_logger.debug(alert_data)
 
     return triggered_alerts
 
 
+def get_tone_matches(tone_matches, position, tone_type):
+    """Get the tones the vectorized tone matcher matched to a trigger."""
+    return tone_matches.get(position, {}).get(tone_type, [])
+
+
 def check_two_tone_triggers(alert_trigger, call_data):
     matches_found = []
 
-    a_tone, b_tone = alert_trigger.get("two_tone_a"), alert_trigger.get("two_tone_b")
+    window_a, window_b = alert_trigger.two_tone_a, alert_trigger.two_tone_b
     # Skip the trigger if either two_tone_a or tow_tone_b is missing
-    if not a_tone or not b_tone:
+    if window_a is None or window_b is None:
         return matches_found
 
-    tolerance_a, tolerance_b = get_tolerance(alert_trigger, "two_tone_a"), get_tolerance(alert_trigger, "two_tone_b")
-    detector_ranges = [(a_tone - tolerance_a, a_tone + tolerance_a), (b_tone - tolerance_b, b_tone + tolerance_b)]
-
-    tone_a_length = alert_trigger.get("two_tone_a_length", 0.8)
-    tone_b_length = alert_trigger.get("two_tone_b_length", 2.3)
+    wildcard_a, wildcard_b = window_a[2], window_b[2]
+    tone_a_length = alert_trigger.two_tone_a_length
+    tone_b_length = alert_trigger.two_tone_b_length
 
     for tone in call_data.get("tones", {}).get("two_tone", []):
-        if a_tone == -1 and b_tone == -1:
+        if wildcard_a and wildcard_b:
             match_a, match_b = True, True
             length_match = True
         else:
-            match_a = is_within_range(tone['detected'][0], detector_ranges[0]) if a_tone != -1 else True
-            match_b = is_within_range(tone['detected'][1], detector_ranges[1]) if b_tone != -1 else True
+            match_a = is_within_range(tone['detected'][0], window_a) if not wildcard_a else True
+            match_b = is_within_range(tone['detected'][1], window_b) if not wildcard_b else True
             length_match = tone['tone_a_length'] >= tone_a_length and tone['tone_b_length'] >= tone_b_length
 
         if match_a and match_b and length_match:
 
             matches_found.append(tone)
 
-            module_logger.debug(f"Two Tone Match found for {alert_trigger.get('trigger_name')}")
+            module_logger.debug(f"Two Tone Match found for {alert_trigger.trigger_name}")
 
     return matches_found
 
@@ -175,27 +245,24 @@ def check_two_tone_triggers(alert_trigger, call_data):
 def check_long_tone_triggers(alert_trigger, call_data):
     matches_found = []
 
-
-    long_tone = alert_trigger.get("long_tone")
-    if not long_tone:
+    window = alert_trigger.long_tone
+    if window is None:
         return matches_found
 
-    tolerance = get_tolerance(alert_trigger, "long_tone")
-    required_length = alert_trigger.get("long_tone_length", 0)
-    tone_range = (long_tone - tolerance, long_tone + tolerance)
+    required_length = alert_trigger.long_tone_length
 
     for tone in call_data.get("tones", {}).get("long_tone", []):
-        if long_tone == -1:
+        if window[2]:
             match_tone = True
             length_match = True
         else:
-            match_tone = is_within_range(tone["detected"], tone_range)
+            match_tone = is_within_range(tone["detected"], window)
             length_match = tone["long_tone_length"] >= required_length
 
         if match_tone and length_match:
             matches_found.append(tone)
 
-            module_logger.debug(f"Match found for {alert_trigger.get('trigger_name')}")
+            module_logger.debug(f"Match found for {alert_trigger.trigger_name}")
 
     return matches_found
 
@@ -203,40 +270,32 @@ def check_long_tone_triggers(alert_trigger, call_data):
 def check_hi_low_tone_triggers(alert_trigger, call_data):
     matches_found = []
 
-    # Extract high-low tones detected from call_data
-    match_list = [(tone['detected'][0], tone['detected'][1], tone["tone_id"], tone["alternations"])
-                  for tone in call_data.get("tones", {}).get("hl_tone", [])]
-
-    hi_tone, low_tone = alert_trigger.get("hi_low_tone_a"), alert_trigger.get("hi_low_tone_b")
-    if not hi_tone or not low_tone:
+    window_hi, window_low = alert_trigger.hi_low_tone_a, alert_trigger.hi_low_tone_b
+    if window_hi is None or window_low is None:
         return matches_found
 
-    min_alternations = alert_trigger.get("hi_low_alternations", 4)
-
-    tolerance_hi, tolerance_low = get_tolerance(alert_trigger, "hi_low_tone_a"), get_tolerance(alert_trigger,
-                                                                                               "hi_low_tone_b")
-    tone_range = [(hi_tone - tolerance_hi, hi_tone + tolerance_hi),
-                  (low_tone - tolerance_low, low_tone + tolerance_low)]
+    wildcard_hi, wildcard_low = window_hi[2], window_low[2]
+    min_alternations = alert_trigger.hi_low_alternations
 
     for tone in call_data.get("tones", {}).get("hl_tone", []):
-        if hi_tone == -1 and low_tone == -1:
+        if wildcard_hi and wildcard_low:
             match_hi, match_low = True, True
             alternations_match = True
         else:
-            match_hi = is_within_range(tone['detected'][0], tone_range[0]) if hi_tone != -1 else True
-            match_low = is_within_range(tone['detected'][1], tone_range[1]) if low_tone != -1 else True
+            match_hi = is_within_range(tone['detected'][0], window_hi) if not wildcard_hi else True
+            match_low = is_within_range(tone['detected'][1], window_low) if not wildcard_low else True
             alternations_match = tone['alternations'] >= min_alternations
 
         if match_hi and match_low and alternations_match:
 
             matches_found.append(tone)
 
-            module_logger.debug(f"Match found for {alert_trigger.get('trigger_name')}")
+            module_logger.debug(f"Match found for {alert_trigger.trigger_name}")
 
     return matches_found
 
 
-def check_alert_filter_triggers(db, alert_trigger, call_data):
+def check_alert_filter_triggers(db, alert_trigger, call_data, alert_filters=None, call_context=None):
     # Initialize lists for matched keywords and exclusion keywords
     matches_found = []
     exclusion_detected = False
@@ -245,34 +304,52 @@ def check_alert_filter_triggers(db, alert_trigger, call_data):
     if not alert_filter_id:
         return matches_found
 
-    # Get Alert Filter Data For Trigger from Database
-    alert_filter_data = get_alert_filters(db, alert_filter_id=alert_filter_id)
-
-    keywords = alert_filter_data.get("result", [])[0].get("filter_keywords")
-    alert_filter_id = alert_filter_data.get("result", [])[0].get("alert_filter_id")
-    alert_filter_name = alert_filter_data.get("result", [])[0].get("alert_filter_name")
+    if alert_filters is not None:
+        # Use the alert filter loaded with the system config snapshot
+        alert_filter = alert_filters.get(alert_filter_id)
+        if not alert_filter:
+            module_logger.warning(f"Alert Filter {alert_filter_id} not found for {alert_trigger.get('trigger_name')}")
+            return matches_found
+    else:
+        # Get Alert Filter Data For Trigger from Database
+        alert_filter = get_alert_filters(db, alert_filter_id=alert_filter_id).get("result", [])[0]
+
+    keywords = alert_filter.get("filter_keywords")
+    alert_filter_id = alert_filter.get("alert_filter_id")
+    alert_filter_name = alert_filter.get("alert_filter_name")
     module_logger.debug(keywords)
 
-    transcript = call_data.get("transcript", []).get("transcript", "")
+    if call_context is None:
+        call_context = CallContext(call_data)
 
-    if not transcript:
+    if not call_context.transcript:
         return matches_found
 
-    # Normalize the input text
-    normalized_text = normalize(transcript)
+    # The transcript is normalized once per call
+    normalized_text = call_context.normalized_transcript
     module_logger.debug(normalized_text)
 
-    # Iterate through keywords
-    for keyword in keywords:
-        if keyword['enabled']:
-            # Normalize the keyword
-            normalized_keyword = normalize(keyword['keyword'])
-            # Check if the keyword is in the text
-            if normalized_keyword in normalized_text:
-                if keyword['is_excluded']:
-                    exclusion_detected = True
-                elif not keyword['is_excluded']:
-                    matches_found.append({'keyword': keyword['keyword'], "alert_filter_id": alert_filter_id, "alert_filter_name": alert_filter_name})
+    keyword_automaton = alert_filter.get("keyword_automaton")
+    if keyword_automaton is not None:
+        # Match every keyword in one pass with the automaton compiled with the config snapshot, triggers sharing a
+        # filter reuse the result
+        if alert_filter_id not in call_context.filter_matches:
+            call_context.filter_matches[alert_filter_id] = keyword_automaton.match(normalized_text)
+        matched_keywords, exclusion_detected = call_context.filter_matches[alert_filter_id]
+        for keyword in matched_keywords:
+            matches_found.append({'keyword': keyword['keyword'], "alert_filter_id": alert_filter_id, "alert_filter_name": alert_filter_name})
+    else:
+        # Iterate through keywords
+        for keyword in keywords:
+            if keyword['enabled']:
+                # Normalize the keyword
+                normalized_keyword = normalize(keyword['keyword'])
+                # Check if the keyword is in the text
+                if normalized_keyword in normalized_text:
+                    if keyword['is_excluded']:
+                        exclusion_detected = True
+                    elif not keyword['is_excluded']:
+                        matches_found.append({'keyword': keyword['keyword'], "alert_filter_id": alert_filter_id, "alert_filter_name": alert_filter_name})
 
     # Check if exclusion was detected, if so, return an empty list
     if exclusion_detected:
@@ -281,75 +358,92 @@ def check_alert_filter_triggers(db, alert_trigger, call_data):
     return matches_found
 
 
-def add_active_alerts_cache(rd, list_name, dict_data):
+def get_suppressed_triggers_key(system_id):
+    """Get the name of the sorted set holding the suppressed triggers of a system, kept across renames."""
+    return f"{SUPPRESSED_TRIGGERS_PREFIX}{system_id}"
+
+
+def claim_triggers(rd, system_id, matched_triggers):
     """
-    Add a dictionary to a Redis list.
+    Atomically claim the matched triggers that aren't currently suppressed and suppress them for their ignore time.
 
     Args:
         rd (RedisCache): An instance of the RedisCache class.
-        list_name (str): The name of the Redis list.
-        dict_data (dict): The dictionary to add to the list.
+        system_id (int): The ID of the system.
+        matched_triggers (list): A list of (trigger_id, ignore_seconds) tuples.
 
     Returns:
-        bool: True if successful, False otherwise.
+        set: The claimed trigger IDs. All matched triggers are claimed if Redis is unavailable.
     """
+    if not matched_triggers:
+        return set()
 
-    try:
-        rd.rpush(list_name, dict_data)
-        return True
-    except redis.RedisError as error:
-        module_logger.error(f"Error adding dict to list {list_name}: {error}")
-        return False
+    script_args = []
+    for trigger_id, ignore_seconds in matched_triggers:
+        script_args.extend([trigger_id, float(ignore_seconds or 0)])
+
+    result = rd.run_script(CLAIM_TRIGGERS_SCRIPT, keys=[get_suppressed_triggers_key(system_id)],
+                           args=script_args)
+    if not result.get("success"):
+        # Alerting without suppression is better than dropping the alert
+        module_logger.error(f"Unable to claim triggers for system {system_id}: {result.get('message')}")
+        return {trigger_id for trigger_id, _ in matched_triggers}
 
+    return set(result.get("result") or [])
 
-def delete_active_alerts_cache(rd, list_name):
+
+def clear_suppressed_triggers(rd, system_id):
     """
-    Clear a Redis list.
+    Remove every suppressed trigger of a system.
 
     Args:
         rd (RedisCache): An instance of the RedisCache class.
-        list_name (str): The name of the Redis list to clear.
+        system_id (int): The ID of the system.
 
     Returns:
         bool: True if successful, False otherwise.
     """
-    try:
-        rd.delete(list_name)
-        return True
-    except redis.RedisError as error:
-        module_logger.error(f"Error clearing list {list_name}: {error}")
-        return False
+    result = rd.delete(get_suppressed_triggers_key(system_id))
+    return result.get("success", False)
 
 
-def get_active_alerts_cache(rd, list_name):
-    """
-    Get all dictionaries from a Redis list.
+NON_WORD_PATTERN = re.compile(r'\W+')
 
-    Args:
-        rd (RedisCache): An instance of the RedisCache class.
-        list_name (str): The name of the Redis list.
 
-    Returns:
-        list: A list of dictionaries, or an empty list if an error occurs.
+class CallContext:
     """
-    try:
-        result = rd.lrange(list_name, 0, -1)
-        if result['success']:
-            return result.get("result", [])
-        else:
-            return []
-    except redis.RedisError as error:
-        module_logger.error(f"Error retrieving list {list_name}: {error}")
-    except Exception as e:
-        module_logger.error(f"Unexpected error in get_active_alerts_cache: {e}")
-    return []
+    Call data prepared once per call and shared by every trigger evaluation.
+
+    Attributes:
+        call_data (dict): The call metadata.
+        transcript (str): The raw transcript.
+        normalized_transcript (str): The normalized transcript.
+        filter_matches (dict): Alert filter ID mapped to its keyword match result for this call.
+    """
+
+    def __init__(self, call_data):
+        """
+        Prepare the call context.
+
+        Args:
+            call_data (dict): The call metadata.
+        """
+        self.call_data = call_data
+
+        transcript_data = call_data.get("transcript") or {}
+        if not isinstance(transcript_data, dict):
+            transcript_data = {}
+
+        self.transcript = transcript_data.get("transcript") or ""
+        self.normalized_transcript = normalize(self.transcript) if self.transcript else ""
+
+        self.filter_matches = {}
 
 
 # Helper function to normalize text
 def normalize(s):
     # Remove apostrophes to prevent contractions from splitting incorrectly
     s = s.replace("'", "")
-    # Replace one or more non-word characters (including multiple spaces) with a single space
-    s = re.sub(r'\W+', ' ', s.lower())
-    # Replace multiple spaces with a single space
-    return re.sub(r'\s+', ' ', s).strip()
+    # Replace one or more non-word characters (including multiple spaces) with a single space, whitespace is a
+    # non-word character so no runs of spaces are left behind
+    return NON_WORD_PATTERN.sub(' ', s.lower()).strip()
@@ -0,0 +1,307 @@
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+import uuid
+
+import redis
+
+from lib.alert_action_handler import get_action_config
+from lib.alert_processing_handler import process_call_data
+
+module_logger = logging.getLogger('icad_alerting_api.alert_queue')
+
+ALERT_QUEUE_STREAM = "icad_alert_queue"
+ALERT_QUEUE_GROUP = "icad_alert_workers"
+ALERT_JOB_PREFIX = "icad_alert_job:"
+
+# Time allowed for matching and everything else a call does besides sending its actions, in seconds
+PROCESSING_MARGIN = 60
+
+
+def get_alert_queue_config(global_config_data):
+    """
+    Get the alert queue configuration with defaults applied.
+
+    :param global_config_data: Dictionary containing global configuration data
+    :return: Dictionary containing the alert queue configuration
+    """
+    queue_config = {
+        "enabled": False,
+        "embedded_workers": True,
+        "workers": 2,
+        "job_ttl": 86400,
+        "max_length": 10000,
+        "block_ms": 2000,
+        "claim_idle_ms": 300000,
+        "claim_interval": 15
+    }
+    queue_config.update(global_config_data.get("alert_queue", {}))
+    return queue_config
+
+
+def enqueue_call(rd, global_config_data, system_data, call_data, submitted_by=None):
+    """
+    Persist a call to the alert queue stream and create its job status record.
+
+    Args:
+        rd (RedisCache): An instance of the RedisCache class.
+        global_config_data (dict): Global configuration data.
+        system_data (dict): The system the call belongs to.
+        call_data (dict): The call metadata.
+        submitted_by (int, optional): System ID of the API key that submitted the call.
+
+    Returns:
+        dict: A dictionary containing 'success' (bool), 'message' (str), and 'result' (job dict).
+    """
+    return enqueue_calls(rd, global_config_data, [(system_data, call_data)], submitted_by)[0]
+
+
+def enqueue_calls(rd, global_config_data, calls, submitted_by=None):
+    """
+    Persist calls to the alert queue stream and create their job status records using a single pipeline.
+
+    Args:
+        rd (RedisCache): An instance of the RedisCache class.
+        global_config_data (dict): Global configuration data.
+        calls (list): A list of (system_data, call_data) tuples.
+        submitted_by (int, optional): System ID of the API key that submitted the calls, it can poll their jobs.
+
+    Returns:
+        list: A result dictionary for each call containing 'success' (bool), 'message' (str), and 'result' (job dict).
+    """
+    queue_config = get_alert_queue_config(global_config_data)
+    max_length = queue_config.get("max_length")
+
+    jobs = []
+    pipeline = rd.get_pipeline()
+    for system_data, call_data in calls:
+        job_data = {
+            "job_id": str(uuid.uuid4()),
+            "status": "queued",
+            "system_id": system_data.get("system_id"),
+            "system_short_name": system_data.get("system_short_name"),
+            "submitted_by": submitted_by if submitted_by is not None else system_data.get("system_id"),
+            "queued_at": time.time(),
+            "started_at": None,
+            "completed_at": None,
+            "result": None
+        }
+        jobs.append(job_data)
+
+        pipeline.setex(f"{ALERT_JOB_PREFIX}{job_data['job_id']}", queue_config.get("job_ttl"),
+                       rd.serialize_for_redis(job_data))
+        pipeline.xadd(ALERT_QUEUE_STREAM, {"job_id": job_data["job_id"],
+                                           "system_id": rd.serialize_for_redis(system_data.get("system_id")),
+                                           "call_data": rd.serialize_for_redis(call_data)},
+                      maxlen=max_length, approximate=True if max_length else False)
+
+    try:
+        pipeline.execute()
+    except redis.RedisError as error:
+        module_logger.error(f"<<Alert>> <<Queue>> Unable to queue {len(jobs)} calls: {error}")
+        return [{"success": False, "message": "Unable to queue call.", "result": []} for _ in jobs]
+
+    for job_data in jobs:
+        module_logger.info(
+            f"<<Alert>> <<Queue>> Queued call for {job_data.get('system_short_name')} as job {job_data.get('job_id')}")
+
+    return [{"success": True, "message": "Call Queued.", "result": job_data} for job_data in jobs]
+
+
+def get_alert_job(rd, job_id):
+    """
+    Get the status record of a queued call.
+
+    Args:
+        rd (RedisCache): An instance of the RedisCache class.
+        job_id (str): The job ID returned when the call was queued.
+
+    Returns:
+        dict or None: The job record or None if it doesn't exist or has expired.
+    """
+    result = rd.get(f"{ALERT_JOB_PREFIX}{job_id}")
+    if not result.get("success"):
+        return None
+    return result.get("result")
+
+
+def update_alert_job(rd, global_config_data, job_id, **fields):
+    """
+    Update fields of a job status record.
+
+    Args:
+        rd (RedisCache): An instance of the RedisCache class.
+        global_config_data (dict): Global configuration data.
+        job_id (str): The job ID.
+        **fields: Fields to update on the job record.
+
+    Returns:
+        bool: True if successful, False otherwise.
+    """
+    job_data = get_alert_job(rd, job_id) or {"job_id": job_id}
+    job_data.update(fields)
+    result = rd.set(f"{ALERT_JOB_PREFIX}{job_id}", job_data,
+                    ttl=get_alert_queue_config(global_config_data).get("job_ttl"))
+    return result.get("success", False)
+
+
+def process_queued_call(db, rd, global_config_data, config_snapshot, entry_fields):
+    """
+    Process a call taken from the alert queue and record the outcome on its job.
+
+    Args:
+        db (MySQLDatabase): An instance of the MySQLDatabase class.
+        rd (RedisCache): An instance of the RedisCache class.
+        global_config_data (dict): Global configuration data.
+        config_snapshot (ConfigSnapshot): The system config snapshot.
+        entry_fields (dict): The fields of the stream entry.
+
+    Returns:
+        bool: True if the call was processed, False otherwise.
+    """
+    job_id = entry_fields.get("job_id")
+    call_data = entry_fields.get("call_data")
+
+    update_alert_job(rd, global_config_data, job_id, status="processing", started_at=time.time())
+
+    system_data = config_snapshot.get_system(system_id=entry_fields.get("system_id"))
+    if not system_data or not isinstance(call_data, dict):
+        module_logger.error(f"<<Alert>> <<Queue>> Unable to process job {job_id}, system or call data missing.")
+        update_alert_job(rd, global_config_data, job_id, status="failed", completed_at=time.time(),
+                         result={"message": "System or call data missing."})
+        return False
+
+    try:
+        process_result = process_call_data(db, rd, global_config_data, system_data, call_data)
+    except Exception as e:
+        traceback.print_exc()
+        module_logger.error(f"<<Alert>> <<Queue>> Unexpected error processing job {job_id}: {e}")
+        update_alert_job(rd, global_config_data, job_id, status="failed", completed_at=time.time(),
+                         result={"message": str(e)})
+        return False
+
+    update_alert_job(rd, global_config_data, job_id, status="complete", completed_at=time.time(),
+                     result=process_result)
+    module_logger.info(f"<<Alert>> <<Queue>> Job {job_id} complete.")
+    return True
+
+
+class AlertQueueWorker:
+    """
+    Pool of threads consuming queued calls from the alert queue stream with a consumer group.
+
+    Consumers are named after the host and process so workers can run on any number of hosts. Entries left pending
+    by a crashed consumer are claimed with XAUTOCLAIM once they have been idle for claim_idle_ms, which has to be
+    longer than a call can take to process. A claimed entry whose job started processing less than the action
+    total_timeout plus PROCESSING_MARGIN ago is left alone as its consumer may still be running it.
+
+    Attributes:
+        db (MySQLDatabase): An instance of the MySQLDatabase class.
+        rd (RedisCache): An instance of the RedisCache class.
+        global_config_data (dict): Global configuration data.
+        config_snapshot (ConfigSnapshot): The system config snapshot.
+        worker_count (int): Number of consumer threads.
+    """
+
+    def __init__(self, db, rd, global_config_data, config_snapshot, worker_count=None):
+        self.db = db
+        self.rd = rd
+        self.global_config_data = global_config_data
+        self.config_snapshot = config_snapshot
+        self.queue_config = get_alert_queue_config(global_config_data)
+        self.worker_count = worker_count if worker_count is not None else int(self.queue_config.get("workers", 2))
+        self.consumer_prefix = f"{socket.gethostname()}-{os.getpid()}"
+        self.processing_timeout = get_action_config(global_config_data).get("total_timeout", 150) + PROCESSING_MARGIN
+        self.stop_event = threading.Event()
+        self.threads = []
+
+    def start(self):
+        if self.queue_config["claim_idle_ms"] / 1000 <= self.processing_timeout:
+            module_logger.warning(f"<<Alert>> <<Queue>> claim_idle_ms is shorter than the {self.processing_timeout} "
+                                  f"seconds a call can take, running calls will be claimed and checked again.")
+
+        create_result = self.rd.xgroup_create(ALERT_QUEUE_STREAM, ALERT_QUEUE_GROUP)
+        if not create_result.get("success"):
+            module_logger.error("<<Alert>> <<Queue>> Unable to create consumer group, workers not started.")
+            return False
+
+        for index in range(self.worker_count):
+            consumer_name = f"{self.consumer_prefix}-{index}"
+            thread = threading.Thread(target=self._run, args=(consumer_name,), daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+        module_logger.info(f"<<Alert>> <<Queue>> Started {self.worker_count} alert queue workers.")
+        return True
+
+    def stop(self, timeout=None):
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join(timeout)
+        self.threads = []
+
+    def _run(self, consumer_name):
+        last_claim = 0
+        while not self.stop_event.is_set():
+            try:
+                if time.time() - last_claim >= self.queue_config.get("claim_interval", 15):
+                    last_claim = time.time()
+                    self._claim_stale_entries(consumer_name)
+
+                read_result = self.rd.xreadgroup(ALERT_QUEUE_STREAM, ALERT_QUEUE_GROUP, consumer_name, count=1,
+                                                 block=self.queue_config.get("block_ms", 2000))
+                if not read_result.get("success"):
+                    time.sleep(1)
+                    continue
+
+                for entry_id, entry_fields in read_result.get("result", []):
+                    self._handle_entry(entry_id, entry_fields)
+
+            except Exception as e:
+                module_logger.error(f"<<Alert>> <<Queue>> Unexpected error in worker {consumer_name}: {e}")
+                time.sleep(1)
+
+        module_logger.info(f"<<Alert>> <<Queue>> Stopped worker {consumer_name}")
+
+    def _claim_stale_entries(self, consumer_name):
+        start_id = "0-0"
+        while not self.stop_event.is_set():
+            claim_result = self.rd.xautoclaim(ALERT_QUEUE_STREAM, ALERT_QUEUE_GROUP, consumer_name,
+                                              self.queue_config["claim_idle_ms"], start_id=start_id,
+                                              count=10)
+            if not claim_result.get("success"):
+                return
+
+            for entry_id, entry_fields in claim_result.get("result", []):
+                job_data = get_alert_job(self.rd, (entry_fields or {}).get("job_id")) or {}
+                if job_data.get("status") in ("complete", "failed"):
+                    # The previous consumer finished the call but died before acknowledging it
+                    self.rd.xack(ALERT_QUEUE_STREAM, ALERT_QUEUE_GROUP, entry_id)
+                    continue
+
+                if job_data.get("status") == "processing" and \
+                        time.time() - (job_data.get("started_at") or 0) < self.processing_timeout:
+                    # Still within the time its consumer may take, it's claimed again later if that consumer died
+                    module_logger.debug(f"<<Alert>> <<Queue>> Entry {entry_id} is still processing, not claimed")
+                    continue
+
+                module_logger.warning(f"<<Alert>> <<Queue>> Claimed stale entry {entry_id} for {consumer_name}")
+
+                self._handle_entry(entry_id, entry_fields)
+
+            start_id = claim_result.get("cursor")
+            if not start_id or start_id == "0-0":
+                return
+
+    def _handle_entry(self, entry_id, entry_fields):
+        if not entry_fields:
+            # The entry was trimmed from the stream while pending
+            self.rd.xack(ALERT_QUEUE_STREAM, ALERT_QUEUE_GROUP, entry_id)
+            return
+
+        process_queued_call(self.db, self.rd, self.global_config_data, self.config_snapshot, entry_fields)
+        # Calls are acknowledged even when processing failed, the outcome is recorded on the job.
+        self.rd.xack(ALERT_QUEUE_STREAM, ALERT_QUEUE_GROUP, entry_id)
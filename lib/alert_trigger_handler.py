@@ -456,3 +456,133 @@ def update_alert_trigger_pushover(db, trigger_data, config_data):
     update_result = db.execute_commit(query, params)
 
     return update_result
+
+
+TRIGGER_TWO_TONE = 1
+TRIGGER_LONG_TONE = 2
+TRIGGER_HI_LOW_TONE = 4
+TRIGGER_ALERT_FILTER = 8
+
+
+def get_alert_filter_status(trigger):
+    # Check if 'alert_filter_id' is present and not None
+    if trigger.get('alert_filter_id') is not None:
+        # Safely get 'trigger_alert_filters' list
+        alert_filters = trigger.get('trigger_alert_filters', [])
+
+        # Check if there is at least one filter and it has 'enabled' key
+        if alert_filters and 'enabled' in alert_filters[0]:
+            return alert_filters[0]['enabled']
+
+    return False
+
+
+class CompiledTrigger:
+    """
+    Alert trigger prepared for matching, built once per config version.
+
+    Tone windows are (low, high, is_wildcard) tuples with the tolerance already applied, or None when the tone can
+    never match because it is missing or zero. A two tone or hi-low window pair is None as a whole when either tone
+    of the pair can't match.
+
+    Attributes:
+        position (int): Position of the trigger in the system alert triggers.
+        trigger_id (int): The trigger ID.
+        trigger_name (str): The trigger name.
+        enabled (bool): Whether the trigger is enabled.
+        conditions (int): Bitmask of the TRIGGER_* conditions that must be met.
+        alert_filter_id (int): The alert filter ID or None.
+        two_tone_a (tuple): Window of the two tone A tone.
+        two_tone_b (tuple): Window of the two tone B tone.
+        two_tone_a_length (float): Minimum A tone length.
+        two_tone_b_length (float): Minimum B tone length.
+        long_tone (tuple): Window of the long tone.
+        long_tone_length (float): Minimum long tone length.
+        hi_low_tone_a (tuple): Window of the hi tone.
+        hi_low_tone_b (tuple): Window of the low tone.
+        hi_low_alternations (float): Minimum number of hi-low alternations.
+        ignore_time (float): Seconds the trigger is suppressed after alerting.
+        enable_facebook (bool): Whether the trigger posts to Facebook.
+        enable_telegram (bool): Whether the trigger posts to Telegram.
+        trigger (dict): The original trigger configuration, used by the alert actions.
+    """
+
+    __slots__ = ("position", "trigger_id", "trigger_name", "enabled", "conditions", "alert_filter_id", "two_tone_a",
+                 "two_tone_b", "two_tone_a_length", "two_tone_b_length", "long_tone", "long_tone_length",
+                 "hi_low_tone_a", "hi_low_tone_b", "hi_low_alternations", "ignore_time", "enable_facebook",
+                 "enable_telegram", "trigger")
+
+    def __init__(self, position, trigger):
+        """
+        Compile a trigger.
+
+        Args:
+            position (int): Position of the trigger in the system alert triggers.
+            trigger (dict): The trigger configuration from get_alert_triggers.
+        """
+        self.position = position
+        self.trigger = trigger
+        self.trigger_id = trigger.get("trigger_id")
+        self.trigger_name = trigger.get("trigger_name")
+        self.enabled = bool(trigger.get("enabled"))
+        self.alert_filter_id = trigger.get("alert_filter_id")
+        self.ignore_time = trigger.get("ignore_time", 300)
+        self.enable_facebook = trigger.get("enable_facebook", False)
+        self.enable_telegram = trigger.get("enable_telegram", False)
+
+        conditions = 0
+        if trigger.get("two_tone_a") is not None and trigger.get("two_tone_b") is not None:
+            conditions |= TRIGGER_TWO_TONE
+        if trigger.get("long_tone") is not None:
+            conditions |= TRIGGER_LONG_TONE
+        if trigger.get("hi_low_tone_a") is not None and trigger.get("hi_low_tone_b") is not None:
+            conditions |= TRIGGER_HI_LOW_TONE
+        if get_alert_filter_status(trigger):
+            conditions |= TRIGGER_ALERT_FILTER
+        self.conditions = conditions
+
+        tolerance = float(trigger.get("tone_tolerance", 2) or 0)
+
+        self.two_tone_a, self.two_tone_b = self._tone_pair(trigger.get("two_tone_a"), trigger.get("two_tone_b"),
+                                                           tolerance)
+        self.two_tone_a_length = self._to_float(trigger.get("two_tone_a_length", 0.8))
+        self.two_tone_b_length = self._to_float(trigger.get("two_tone_b_length", 2.3))
+
+        self.long_tone = self._tone_window(trigger.get("long_tone"), tolerance)
+        self.long_tone_length = self._to_float(trigger.get("long_tone_length", 0))
+
+        self.hi_low_tone_a, self.hi_low_tone_b = self._tone_pair(trigger.get("hi_low_tone_a"),
+                                                                 trigger.get("hi_low_tone_b"), tolerance)
+        self.hi_low_alternations = self._to_float(trigger.get("hi_low_alternations", 4))
+
+    @staticmethod
+    def _to_float(value):
+        # A missing minimum never matches, like comparing against None would fail
+        return float(value) if value is not None else float("inf")
+
+    @classmethod
+    def _tone_pair(cls, tone_a, tone_b, tolerance):
+        if not tone_a or not tone_b:
+            return None, None
+        return cls._tone_window(tone_a, tolerance), cls._tone_window(tone_b, tolerance)
+
+    @staticmethod
+    def _tone_window(tone, tolerance):
+        if not tone:
+            return None
+        tone = float(tone)
+        tone_tolerance = tolerance / 100.0 * tone
+        return tone - tone_tolerance, tone + tone_tolerance, tone == -1
+
+
+def compile_alert_triggers(alert_triggers):
+    """
+    Compile the alert triggers of a system for matching.
+
+    Args:
+        alert_triggers (list): The alert triggers of the system.
+
+    Returns:
+        list: A CompiledTrigger for each trigger, in the same order.
+    """
+    return [CompiledTrigger(position, trigger) for position, trigger in enumerate(alert_triggers or [])]
@@ -0,0 +1,425 @@
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+
+from lib.audio_file_handler import download_audio, convert_audio, remux_audio, probe_audio, get_audio_extension, \
+    AudioDownloadCancelled
+from lib.transcode_pool_handler import get_transcode_pool, estimate_clip_seconds
+
+module_logger = logging.getLogger('icad_alerting_api.audio_cache')
+
+# Encoding name mapped to the file extension and the ffmpeg codec arguments
+AUDIO_ENCODINGS = {
+    "opus": ("ogg", ['-codec:a', 'opus', '-b:a', '128k']),
+    "mp3": ("mp3", ['-codec:a', 'libmp3lame', '-b:a', '64k']),
+    "m4a": ("m4a", ['-codec:a', 'aac', '-b:a', '64k'])
+}
+
+# Encoding name mapped to the codec and the ffprobe container name a source needs to be used without re-encoding
+AUDIO_ENCODING_STREAMS = {
+    "opus": ("opus", "ogg"),
+    "mp3": ("mp3", "mp3"),
+    "m4a": ("aac", "m4a")
+}
+
+CONVERSION_COPY = "copy"
+CONVERSION_REMUX = "remux"
+CONVERSION_TRANSCODE = "transcode"
+
+_audio_cache = None
+_audio_cache_lock = threading.Lock()
+
+
+def get_audio_cache_config(global_config_data):
+    """
+    Get the audio cache configuration with defaults applied.
+
+    :param global_config_data: Dictionary containing global configuration data
+    :return: Dictionary containing the audio cache configuration
+    """
+    cache_config = {
+        "enabled": True,
+        "path": os.path.join(os.getcwd(), "var", "audio_cache"),
+        "max_size_mb": 1024,
+        "max_entries": 2000,
+        "transcode_timeout": 600,
+        "prefetch": True,
+        "prefetch_workers": 4
+    }
+    cache_config.update(global_config_data.get("audio_cache", {}))
+    return cache_config
+
+
+def get_conversion_path(probe, encoding):
+    """
+    Choose the cheapest way to turn a source into an encoding.
+
+    :param probe: The source probe returned by probe_audio, or None if it couldn't be probed
+    :param encoding: One of AUDIO_ENCODINGS
+    :return: CONVERSION_COPY when the source already is the encoding, CONVERSION_REMUX when only its container differs,
+        CONVERSION_TRANSCODE otherwise
+    """
+    codec, container = AUDIO_ENCODING_STREAMS[encoding]
+    # Converted audio is mono, a source with more channels is downmixed
+    if not probe or probe.get("codec") != codec or (probe.get("channels") or 1) > 1:
+        return CONVERSION_TRANSCODE
+
+    if container in probe.get("format_names", []):
+        return CONVERSION_COPY
+    return CONVERSION_REMUX
+
+
+def get_audio_cache(global_config_data):
+    """
+    Get the shared audio cache, creating it the first time it is used.
+
+    :param global_config_data: Dictionary containing global configuration data
+    :return: AudioCache, or None when the cache is disabled
+    """
+    global _audio_cache
+    if not get_audio_cache_config(global_config_data).get("enabled"):
+        return None
+
+    if _audio_cache is None:
+        with _audio_cache_lock:
+            if _audio_cache is None:
+                _audio_cache = AudioCache(global_config_data)
+    return _audio_cache
+
+
+class AudioCache:
+    """
+    Content addressed on disk cache of downloaded call audio and its derived encodings.
+
+    A source is downloaded once per audio URL and stored under the SHA-256 of its content, derived encodings are
+    stored under the content hash and encoding, so two URLs serving the same recording share their transcodes.
+    Concurrent requests for an artifact that is being downloaded or transcoded wait on the same job. Files are evicted
+    least recently used first once the cache is over max_size_mb or max_entries, artifacts checked out with
+    artifact() are never evicted while in use.
+
+    Attributes:
+        cache_config (dict): The audio cache configuration.
+        cache_path (str): Directory the artifacts are stored in.
+        entries (OrderedDict): File name mapped to its size, in least recently used order.
+        url_hashes (dict): Audio URL mapped to the content hash of its source.
+        conversion_counts (dict): Number of encodings made by copying, remuxing and transcoding their source.
+    """
+
+    def __init__(self, global_config_data):
+        self.global_config_data = global_config_data
+        self.cache_config = get_audio_cache_config(global_config_data)
+        self.cache_path = self.cache_config.get("path")
+        self.max_size = int(self.cache_config.get("max_size_mb", 1024)) * 1024 * 1024
+        self.max_entries = int(self.cache_config.get("max_entries", 2000))
+
+        self.entries = OrderedDict()
+        self.total_size = 0
+        self.url_hashes = {}
+        self.in_use = {}
+        self.in_flight = {}
+        self.in_flight_waiters = {}
+        self.conversion_counts = {CONVERSION_COPY: 0, CONVERSION_REMUX: 0, CONVERSION_TRANSCODE: 0}
+        self.lock = threading.Lock()
+        self.prefetch_executor = ThreadPoolExecutor(max_workers=int(self.cache_config.get("prefetch_workers", 4)),
+                                                    thread_name_prefix="audio-prefetch")
+
+        os.makedirs(self.cache_path, exist_ok=True)
+        self._load_entries()
+
+    def _load_entries(self):
+        # Artifacts left by a previous run count against the bounds, oldest first
+        files = []
+        for file_name in os.listdir(self.cache_path):
+            file_path = os.path.join(self.cache_path, file_name)
+            if file_name.startswith(".tmp-"):
+                os.remove(file_path)
+            elif os.path.isfile(file_path):
+                stat = os.stat(file_path)
+                files.append((stat.st_mtime, file_name, stat.st_size))
+
+        for _, file_name, size in sorted(files):
+            self.entries[file_name] = size
+            self.total_size += size
+
+        expired = self._evict()
+        self._remove_files(expired)
+
+    @contextmanager
+    def artifact(self, audio_url, encoding=None, priority=None):
+        """
+        Check out the cached source or a derived encoding of a call recording.
+
+        Usage:
+            with audio_cache.artifact(audio_url, "opus") as opus_file:
+                ...
+
+        Args:
+            audio_url (str): The URL of the call audio.
+            encoding (str, optional): One of AUDIO_ENCODINGS, or None for the downloaded source.
+            priority (float, optional): Clip length in seconds used to queue the transcode, estimated from the
+                source size when not given.
+
+        Yields:
+            str: Path of the artifact, valid until the with block exits.
+        """
+        # The source stays checked out while it's transcoded
+        source_file_name = self._checkout_artifact(self._get_source, audio_url)
+        try:
+            if not encoding:
+                yield os.path.join(self.cache_path, source_file_name)
+                return
+
+            file_name = self._checkout_artifact(self._get_encoding, source_file_name, encoding, priority)
+            try:
+                yield os.path.join(self.cache_path, file_name)
+            finally:
+                self._checkin(file_name)
+        finally:
+            self._checkin(source_file_name)
+
+    def prefetch(self, audio_url):
+        """
+        Start downloading the source of a call recording in the background.
+
+        Args:
+            audio_url (str): The URL of the call audio.
+
+        Returns:
+            AudioPrefetch: Handle used to cancel the download when the audio turns out not to be needed.
+        """
+        cancel_event = threading.Event()
+        future = self.prefetch_executor.submit(self._prefetch, audio_url, cancel_event)
+        return AudioPrefetch(audio_url, future, cancel_event)
+
+    def _prefetch(self, audio_url, cancel_event):
+        if cancel_event.is_set():
+            return None
+        try:
+            return self._get_source(audio_url, cancel_event)
+        except AudioDownloadCancelled:
+            module_logger.debug(f"<<Audio>> <<Cache>> Prefetch of {audio_url} cancelled")
+        except Exception as e:
+            # The download is tried again when the audio is used
+            module_logger.warning(f"<<Audio>> <<Cache>> Prefetch of {audio_url} failed: {e}")
+        return None
+
+    def _checkout_artifact(self, get_artifact, *args):
+        # An artifact can be evicted between being stored and checked out when the cache is full, it's fetched again
+        for _ in range(2):
+            file_name = get_artifact(*args)
+            with self.lock:
+                if file_name in self.entries:
+                    self.in_use[file_name] = self.in_use.get(file_name, 0) + 1
+                    return file_name
+        raise RuntimeError(f"Audio cache is too small to hold {file_name}")
+
+    def _get_source(self, audio_url, cancel_event=None):
+        with self.lock:
+            content_hash = self.url_hashes.get(audio_url)
+        if content_hash:
+            file_name = self._find_entry(content_hash, "source")
+            if file_name:
+                return file_name
+
+        try:
+            return self._run_once(f"source:{audio_url}", self._download, audio_url, cancel_event)
+        except AudioDownloadCancelled:
+            if cancel_event is not None:
+                raise
+            # Joined a prefetch just as it was cancelled, download it again
+            return self._run_once(f"source:{audio_url}", self._download, audio_url, None)
+
+    def _get_encoding(self, source_file_name, encoding, priority=None):
+        if encoding not in AUDIO_ENCODINGS:
+            raise ValueError(f"Unsupported audio encoding: {encoding}")
+
+        content_hash = source_file_name.split(".", 1)[0]
+        file_name = self._find_entry(content_hash, encoding)
+        if file_name:
+            return file_name
+
+        return self._run_once(f"{encoding}:{content_hash}", self._transcode, source_file_name, encoding,
+                             priority)
+
+    def _find_entry(self, content_hash, kind):
+        with self.lock:
+            for file_name in (f"{content_hash}.{kind}.{extension}" for extension in self._get_extensions(kind)):
+                if file_name in self.entries:
+                    if not os.path.exists(os.path.join(self.cache_path, file_name)):
+                        # Removed by another process sharing the cache directory
+                        self.total_size -= self.entries.pop(file_name)
+                        return None
+                    self.entries.move_to_end(file_name)
+                    return file_name
+        return None
+
+    @staticmethod
+    def _get_extensions(kind):
+        if kind == "source":
+            return ("wav", "m4a", "mp3", "audio")
+        return (AUDIO_ENCODINGS[kind][0],)
+
+    def _run_once(self, job_key, function, *args):
+        with self.lock:
+            future = self.in_flight.get(job_key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self.in_flight[job_key] = future
+
+        if not owner:
+            with self.lock:
+                self.in_flight_waiters[job_key] = self.in_flight_waiters.get(job_key, 0) + 1
+            try:
+                return future.result()
+            finally:
+                with self.lock:
+                    self.in_flight_waiters[job_key] -= 1
+                    if not self.in_flight_waiters[job_key]:
+                        del self.in_flight_waiters[job_key]
+
+        try:
+            future.set_result(function(*args))
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            with self.lock:
+                self.in_flight.pop(job_key, None)
+        return future.result()
+
+    def _download(self, audio_url, cancel_event=None):
+        def cancel_check():
+            # A cancelled prefetch keeps downloading once another request is waiting on it
+            if cancel_event is None or not cancel_event.is_set():
+                return False
+            with self.lock:
+                return not self.in_flight_waiters.get(f"source:{audio_url}")
+
+        extension = get_audio_extension(audio_url) or "audio"
+
+        temp_path = os.path.join(self.cache_path, f".tmp-{uuid.uuid4().hex}")
+        try:
+            content_hash = download_audio(audio_url, temp_path, self.global_config_data, cancel_check)
+            file_name = f"{content_hash}.source.{extension}"
+            self._store(temp_path, file_name)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        with self.lock:
+            self.url_hashes[audio_url] = content_hash
+            if len(self.url_hashes) > self.max_entries:
+                # Forget the oldest URL, its source is found again by downloading it
+                del self.url_hashes[next(iter(self.url_hashes))]
+        return file_name
+
+    def _transcode(self, source_file_name, encoding, priority=None):
+        content_hash = source_file_name.split(".", 1)[0]
+        extension, codec_args = AUDIO_ENCODINGS[encoding]
+        file_name = f"{content_hash}.{encoding}.{extension}"
+
+        source_path = os.path.join(self.cache_path, source_file_name)
+        probe = probe_audio(source_path)
+        if priority is None:
+            priority = probe.get("duration") if probe and probe.get("duration") else \
+                estimate_clip_seconds(file_path=source_path)
+
+        conversion_path = get_conversion_path(probe, encoding)
+        transcode_timeout = self.cache_config.get("transcode_timeout", 600)
+
+        temp_path = os.path.join(self.cache_path, f".tmp-{uuid.uuid4().hex}.{extension}")
+        try:
+            start_time = time.monotonic()
+            if conversion_path == CONVERSION_COPY:
+                shutil.copyfile(source_path, temp_path)
+            else:
+                # ffmpeg runs on the transcoding pool, this thread only waits for it
+                transcode_pool = get_transcode_pool(self.global_config_data)
+                if conversion_path == CONVERSION_REMUX:
+                    transcode_future = transcode_pool.submit(remux_audio, source_path, temp_path,
+                                                             timeout=transcode_timeout, priority=priority)
+                else:
+                    transcode_future = transcode_pool.submit(convert_audio, source_path, temp_path, codec_args,
+                                                             timeout=transcode_timeout, priority=priority)
+                if not transcode_future.result():
+                    raise RuntimeError(f"Conversion of {source_file_name} to {encoding} failed.")
+
+            with self.lock:
+                self.conversion_counts[conversion_path] += 1
+            module_logger.info(f"<<Audio>> <<Cache>> Converted {content_hash} to {encoding} by {conversion_path} in "
+                               f"{time.monotonic() - start_time:.2f} seconds")
+            self._store(temp_path, file_name)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        return file_name
+
+    def _store(self, temp_path, file_name):
+        size = os.path.getsize(temp_path)
+        os.replace(temp_path, os.path.join(self.cache_path, file_name))
+
+        with self.lock:
+            if file_name in self.entries:
+                self.total_size -= self.entries.pop(file_name)
+            self.entries[file_name] = size
+            self.total_size += size
+            expired = self._evict()
+        self._remove_files(expired)
+
+    def _checkin(self, file_name):
+        with self.lock:
+            self.in_use[file_name] -= 1
+            if not self.in_use[file_name]:
+                del self.in_use[file_name]
+            expired = self._evict()
+        self._remove_files(expired)
+
+    def _evict(self):
+        # Called with the lock held, the caller removes the returned files once it's released
+        expired = []
+        for file_name in list(self.entries):
+            if self.total_size <= self.max_size and len(self.entries) <= self.max_entries:
+                break
+            if file_name in self.in_use:
+                continue
+            self.total_size -= self.entries.pop(file_name)
+            expired.append(file_name)
+        return expired
+
+    def _remove_files(self, file_names):
+        for file_name in file_names:
+            try:
+                os.remove(os.path.join(self.cache_path, file_name))
+                module_logger.debug(f"<<Audio>> <<Cache>> Evicted {file_name}")
+            except FileNotFoundError:
+                pass
+
+
+class AudioPrefetch:
+    """
+    Handle of a background download started with AudioCache.prefetch.
+
+    Attributes:
+        audio_url (str): The URL being downloaded.
+        future (concurrent.futures.Future): Resolves to the cached source file name, or None if the download failed
+            or was cancelled.
+    """
+
+    def __init__(self, audio_url, future, cancel_event):
+        self.audio_url = audio_url
+        self.future = future
+        self.cancel_event = cancel_event
+
+    def cancel(self):
+        """
+        Cancel the download, it is left to finish when another request is already waiting on it.
+        """
+        self.cancel_event.set()
+        self.future.cancel()
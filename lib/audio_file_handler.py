@@ -1,43 +1,85 @@
+import hashlib
+import json
 import logging
+import os
 import tempfile
 
 import requests
 
-from lib.shell_handler import run_command
+from lib.http_session_handler import get_http_session, get_http_timeout
+from lib.shell_handler import run_command, run_command_stream
 
 module_logger = logging.getLogger('icad_alerting_api.alert_actions')
 
 
-def download_wav_to_temp(url):
+# Call data keys of the call audio URLs, smallest download first
+AUDIO_SOURCE_KEYS = ("audio_m4a_url", "audio_wav_url")
+
+AUDIO_SOURCE_EXTENSIONS = ("wav", "m4a", "mp3")
+
+
+class AudioDownloadCancelled(Exception):
+    """Raised when a download is stopped by its cancel check."""
+
+
+def get_audio_source_url(call_data):
+    """
+    Get the URL of the smallest audio source of a call.
+
+    :param call_data: Dictionary containing data about the call
+    :return: The audio URL, or None if the call has no audio
+    """
+    for source_key in AUDIO_SOURCE_KEYS:
+        if call_data.get(source_key):
+            return call_data.get(source_key)
+    return None
+
+
+def get_audio_extension(url):
+    """
+    Get the audio file extension of a URL.
+
+    :param url: The URL of the audio file
+    :return: One of AUDIO_SOURCE_EXTENSIONS, or None if the URL isn't a supported audio file
     """
-    Downloads a WAV file from the given URL to a temporary file path in memory.
+    extension = os.path.splitext(url.split("?", 1)[0])[1].lstrip(".").lower()
+    return extension if extension in AUDIO_SOURCE_EXTENSIONS else None
+
+
+def download_wav_to_temp(url, global_config_data=None):
+    """
+    Downloads a WAV, M4A or MP3 file from the given URL to a temporary file path in memory.
 
     Parameters:
-    - url (str): The URL of the WAV file.
+    - url (str): The URL of the audio file.
+    - global_config_data (dict, optional): Global configuration data used for the HTTP session and timeouts.
 
     Returns:
-    - str: The path to the temporary WAV file.
+    - str: The path to the temporary audio file.
 
     Raises:
-    - ValueError: If the URL does not point to a WAV file.
+    - ValueError: If the URL does not point to a supported audio file.
     - requests.exceptions.RequestException: For network-related errors.
     """
     try:
-        # Check if the URL points to a WAV file
-        if not url.lower().endswith('.wav'):
-            raise ValueError("The URL does not point to a WAV file.")
+        # Check if the URL points to a supported audio file
+        extension = get_audio_extension(url)
+        if not extension:
+            raise ValueError("The URL does not point to a WAV, M4A or MP3 file.")
 
         # Download the file
-        response = requests.get(url, stream=True)
+        global_config_data = global_config_data or {}
+        response = get_http_session(global_config_data, "audio").get(
+            url, stream=True, timeout=get_http_timeout(global_config_data, "audio"))
         response.raise_for_status()  # Raise an exception for HTTP errors
 
         # Create a temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_file:
+        with tempfile.NamedTemporaryFile(delete=False, suffix=f'.{extension}') as temp_file:
             for chunk in response.iter_content(chunk_size=8192):
                 temp_file.write(chunk)
             temp_file_path = temp_file.name
 
-        module_logger.info("WAV File Downloaded Successfully")
+        module_logger.info(f"{extension.upper()} File Downloaded Successfully")
         return temp_file_path
 
     except requests.exceptions.RequestException as e:
@@ -51,6 +93,144 @@ def download_wav_to_temp(url):
         raise
 
 
+def download_audio(url, file_path, global_config_data=None, cancel_check=None):
+    """
+    Downloads an audio file from the given URL to a file path and hashes its content.
+
+    Parameters:
+    - url (str): The URL of the audio file.
+    - file_path (str): The path the audio is written to.
+    - global_config_data (dict, optional): Global configuration data used for the HTTP session and timeouts.
+    - cancel_check (callable, optional): Called between chunks, the download stops when it returns True.
+
+    Returns:
+    - str: The SHA-256 hex digest of the downloaded content.
+
+    Raises:
+    - requests.exceptions.RequestException: For network-related errors.
+    - AudioDownloadCancelled: If the download was cancelled.
+    """
+    global_config_data = global_config_data or {}
+    content_hash = hashlib.sha256()
+    with get_http_session(global_config_data, "audio").get(
+            url, stream=True, timeout=get_http_timeout(global_config_data, "audio")) as response:
+        response.raise_for_status()  # Raise an exception for HTTP errors
+
+        with open(file_path, 'wb') as audio_file:
+            for chunk in response.iter_content(chunk_size=65536):
+                if cancel_check and cancel_check():
+                    raise AudioDownloadCancelled(f"Download of {url} cancelled.")
+                audio_file.write(chunk)
+                content_hash.update(chunk)
+
+    module_logger.info(f"Audio File Downloaded Successfully: {url}")
+    return content_hash.hexdigest()
+
+
+def convert_audio(source_file_path, output_file_path, codec_args, timeout=600):
+    """
+    Converts an audio file with ffmpeg to a mono file with the given codec arguments.
+
+    Parameters:
+    - source_file_path (str): The path of the source audio file.
+    - output_file_path (str): The path of the converted file, its extension selects the container.
+    - codec_args (list): ffmpeg codec arguments such as ['-codec:a', 'opus', '-b:a', '128k'].
+    - timeout (int, optional): Seconds before ffmpeg is killed.
+
+    Returns:
+    - bool: True if the conversion succeeded, False otherwise.
+    """
+    command = ['ffmpeg', '-y', '-i', source_file_path, '-ac', '1', '-map', '0:a', '-strict', '-2'] + \
+              list(codec_args) + [output_file_path]
+    return run_command(command, timeout=timeout)
+
+
+def remux_audio(source_file_path, output_file_path, timeout=600):
+    """
+    Copies the audio stream of a file into the container of the output file without re-encoding it.
+
+    Parameters:
+    - source_file_path (str): The path of the source audio file.
+    - output_file_path (str): The path of the remuxed file, its extension selects the container.
+    - timeout (int, optional): Seconds before ffmpeg is killed.
+
+    Returns:
+    - bool: True if the remux succeeded, False otherwise.
+    """
+    command = ['ffmpeg', '-y', '-i', source_file_path, '-map', '0:a', '-codec:a', 'copy', output_file_path]
+    return run_command(command, timeout=timeout)
+
+
+def probe_audio(file_path, timeout=30):
+    """
+    Probes the container and first audio stream of a file with ffprobe.
+
+    Parameters:
+    - file_path (str): The path of the audio file.
+    - timeout (int, optional): Seconds before ffprobe is killed.
+
+    Returns:
+    - dict: The 'format_names', 'codec', 'channels' and 'duration' of the audio, or None if it couldn't be probed.
+    """
+    command = ['ffprobe', '-v', 'error', '-print_format', 'json', '-show_format', '-show_streams',
+               '-select_streams', 'a:0', file_path]
+    output = run_command_stream(command, timeout=timeout)
+    if output is None:
+        return None
+
+    try:
+        probe_data = json.loads(output)
+    except ValueError as e:
+        module_logger.error(f"Unable to parse ffprobe output for {file_path}: {e}")
+        return None
+
+    streams = probe_data.get("streams") or []
+    if not streams:
+        module_logger.warning(f"No audio stream found in {file_path}")
+        return None
+
+    format_data = probe_data.get("format", {})
+    duration = streams[0].get("duration") or format_data.get("duration")
+    return {
+        "format_names": format_data.get("format_name", "").split(","),
+        "codec": streams[0].get("codec_name"),
+        "channels": streams[0].get("channels"),
+        "duration": float(duration) if duration else None
+    }
+
+
+def stream_convert_audio(url, codec_args, output_format, global_config_data=None, timeout=600,
+                         max_output_size=None):
+    """
+    Converts the audio at a URL with ffmpeg without temporary files, piping the HTTP body into ffmpeg and reading the
+    converted audio from its stdout.
+
+    Parameters:
+    - url (str): The URL of the source audio.
+    - codec_args (list): ffmpeg codec arguments such as ['-codec:a', 'opus', '-b:a', '128k'].
+    - output_format (str): The ffmpeg output container, such as 'ogg'.
+    - global_config_data (dict, optional): Global configuration data used for the HTTP session and timeouts.
+    - timeout (int, optional): Seconds before ffmpeg is killed.
+    - max_output_size (int, optional): Maximum size of the converted audio in bytes.
+
+    Returns:
+    - bytes: The converted audio, or None if the download or conversion failed.
+    """
+    global_config_data = global_config_data or {}
+    command = ['ffmpeg', '-y', '-i', 'pipe:0', '-ac', '1', '-map', '0:a', '-strict', '-2'] + list(codec_args) + \
+              ['-f', output_format, 'pipe:1']
+
+    try:
+        with get_http_session(global_config_data, "audio").get(
+                url, stream=True, timeout=get_http_timeout(global_config_data, "audio")) as response:
+            response.raise_for_status()  # Raise an exception for HTTP errors
+            return run_command_stream(command, response.iter_content(chunk_size=65536), timeout=timeout,
+                                      max_output_size=max_output_size)
+    except requests.exceptions.RequestException as e:
+        module_logger.error(f"Network error: {e}")
+        return None
+
+
 def convert_wav_opus(wav_file_path):
     ogg_file = wav_file_path.replace(".wav", ".ogg")
     command = ['ffmpeg', '-y', '-i', wav_file_path, '-ac', '1', '-map', '0:a', '-strict', '-2', '-codec:a',
@@ -17,12 +17,98 @@ default_config = {
         "cookie_domain": "localhost",
         "cookie_secure": False,
         "cookie_name": "icad_alerting",
-        "cookie_path": "/"
+        "cookie_path": "/",
+        "tone_matcher": "python"
     },
     "audio_upload": {
         "allowed_mimetypes": ["audio/x-wav", "audio/x-m4a", "audio/mpeg"],
         "max_audio_length": 300,
         "max_file_size": 3
+    },
+    "api_key_cache": {
+        "ttl": 300,
+        "negative_ttl": 30
+    },
+    "alert_queue": {
+        "enabled": False,
+        "embedded_workers": True,
+        "workers": 2,
+        "job_ttl": 86400,
+        "max_length": 10000,
+        "block_ms": 2000,
+        "claim_idle_ms": 300000,
+        "claim_interval": 15
+    },
+    "batch_ingest": {
+        "max_calls": 500,
+        "max_sync_calls": 5
+    },
+    "idempotency": {
+        "enabled": True,
+        "ttl": 86400,
+        "processing_ttl": 300
+    },
+    "alert_actions": {
+        "max_workers": 16,
+        "total_timeout": 150,
+        "timeouts": {
+            "email": 30,
+            "pushover": 15,
+            "facebook": 30,
+            "telegram": 120,
+            "webhook": 15
+        }
+    },
+    "http": {
+        "pool_connections": 20,
+        "pool_maxsize": 32,
+        "timeouts": {
+            "default": {"connect": 5, "read": 30},
+            "webhook": {"connect": 5, "read": 10},
+            "pushover": {"connect": 5, "read": 10},
+            "facebook": {"connect": 5, "read": 30},
+            "telegram": {"connect": 5, "read": 110},
+            "audio": {"connect": 5, "read": 60}
+        }
+    },
+    "audio_cache": {
+        "enabled": True,
+        "path": "var/audio_cache",
+        "max_size_mb": 1024,
+        "max_entries": 2000,
+        "transcode_timeout": 600,
+        "prefetch": True,
+        "prefetch_workers": 4
+    },
+    "transcode_pool": {
+        "workers": None,
+        "max_queue": 100
+    },
+    "smtp_pool": {
+        "enabled": True,
+        "max_connections": 4,
+        "idle_timeout": 60,
+        "health_check_after": 10,
+        "timeout": 30
+    },
+    "webhook_engine": {
+        "engine": "requests",
+        "max_connections": 500,
+        "max_connections_per_host": 20
+    },
+    "delivery_queue": {
+        "enabled": False,
+        "embedded_workers": True,
+        "workers": 4,
+        "max_attempts": 6,
+        "base_delay": 5,
+        "max_delay": 900,
+        "job_ttl": 604800,
+        "max_length": 100000,
+        "dead_letter_max_length": 1000,
+        "block_ms": 2000,
+        "claim_idle_ms": 300000,
+        "claim_interval": 30
     }
 }
 
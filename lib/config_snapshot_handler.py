@@ -0,0 +1,270 @@
+import logging
+import threading
+import time
+
+from lib.alert_filter_handler import get_alert_filters
+from lib.alert_trigger_handler import compile_alert_triggers
+from lib.helper_handler import compile_json_template
+from lib.keyword_matcher_handler import KeywordAutomaton
+from lib.system_handler import get_systems, get_system_api_key
+from lib.tone_index_handler import TriggerIndex
+from lib.tone_matcher_handler import get_tone_matcher
+
+module_logger = logging.getLogger('icad_alerting_api.config_snapshot')
+
+CONFIG_VERSION_KEY = "icad_config_version"
+
+
+def get_config_version(rd):
+    """
+    Get the current configuration version from Redis.
+
+    Args:
+        rd (RedisCache): An instance of the RedisCache class.
+
+    Returns:
+        int or None: The configuration version, 0 if never bumped, or None if Redis is unavailable.
+    """
+    result = rd.get(CONFIG_VERSION_KEY)
+    if not result.get("success"):
+        return None
+    return result.get("result") or 0
+
+
+def bump_config_version(rd):
+    """
+    Increment the configuration version so every worker rebuilds its snapshot on the next call.
+
+    Args:
+        rd (RedisCache): An instance of the RedisCache class.
+
+    Returns:
+        bool: True if successful, False otherwise.
+    """
+    result = rd.incrby(CONFIG_VERSION_KEY)
+    if not result.get("success"):
+        module_logger.error(f"<<Config>> <<Snapshot>> Unable to bump config version: {result.get('message')}")
+        return False
+
+    module_logger.debug(f"<<Config>> <<Snapshot>> Config version bumped to {result.get('result')}")
+    return True
+
+
+class ConfigSnapshot:
+    """
+    Process local snapshot of radio system configuration used when processing calls.
+
+    Each system is loaded from MySQL the first time it is requested together with its triggers, webhooks, the alert
+    filters those triggers reference with their keyword automatons, the compiled triggers and an index of their tone
+    ranges. Webhook body templates are compiled when the system is loaded. API keys are resolved to their system and
+    kept for a short TTL, unknown keys are cached for a shorter negative TTL. Everything is discarded whenever the
+    configuration version stored in Redis changes.
+
+    Attributes:
+        db (MySQLDatabase): An instance of the MySQLDatabase class.
+        rd (RedisCache): An instance of the RedisCache class.
+        api_key_ttl (int): Seconds a resolved API key is kept.
+        api_key_negative_ttl (int): Seconds an unknown API key is kept.
+        api_key_max_entries (int): Maximum number of cached API keys before the cache is reset.
+        tone_matcher (str): The tone matching engine, "python" or "numpy".
+    """
+
+    def __init__(self, db, rd, api_key_ttl=300, api_key_negative_ttl=30, api_key_max_entries=10000,
+                 tone_matcher="python"):
+        """
+        Initialize the ConfigSnapshot.
+
+        Args:
+            db (MySQLDatabase): An instance of the MySQLDatabase class.
+            rd (RedisCache): An instance of the RedisCache class.
+            api_key_ttl (int, optional): Seconds a resolved API key is kept.
+            api_key_negative_ttl (int, optional): Seconds an unknown API key is kept.
+            api_key_max_entries (int, optional): Maximum number of cached API keys before the cache is reset.
+            tone_matcher (str, optional): The tone matching engine, "python" or "numpy".
+        """
+        self.db = db
+        self.rd = rd
+        self.api_key_ttl = api_key_ttl
+        self.api_key_negative_ttl = api_key_negative_ttl
+        self.api_key_max_entries = api_key_max_entries
+        self.tone_matcher = tone_matcher
+        self._lock = threading.Lock()
+        self._version = None
+        self._systems_by_id = {}
+        self._systems_by_short_name = {}
+        self._api_keys = {}
+
+    def get_system(self, system_short_name=None, system_id=None):
+        """
+        Get a system from the snapshot, loading it from the database if it isn't cached for the current version.
+
+        Args:
+            system_short_name (str, optional): The short name of the system.
+            system_id (int, optional): The ID of the system.
+
+        Returns:
+            dict, None or False: The system configuration, None if the system doesn't exist or False if it couldn't be
+            loaded from the database.
+        """
+        if not system_short_name and not system_id:
+            return None
+
+        version = get_config_version(self.rd)
+        if version is None:
+            # Without the version we can't tell if the snapshot is stale, go to the database.
+            module_logger.warning("<<Config>> <<Snapshot>> Config version unavailable, loading system from database.")
+            return self._load_system(system_short_name, system_id)
+
+        return self._get_system(version, system_short_name, system_id)
+
+    def get_system_by_api_key(self, api_key):
+        """
+        Resolve an API key to the system it belongs to.
+
+        Args:
+            api_key (str): The system API key.
+
+        Returns:
+            dict or None: The system configuration or None if the API key is invalid.
+        """
+        if not api_key:
+            return None
+
+        version = get_config_version(self.rd)
+        if version is None:
+            module_logger.warning("<<Config>> <<Snapshot>> Config version unavailable, resolving API key from database.")
+            system_id = self._load_api_key(api_key)
+            return self._load_system(None, system_id) if system_id else None
+
+        current_time = time.time()
+        with self._lock:
+            self._check_version(version)
+            cached_key = self._api_keys.get(api_key)
+
+        if cached_key and cached_key[1] > current_time:
+            system_id = cached_key[0]
+        else:
+            system_id = self._load_api_key(api_key)
+            if system_id is False:
+                # Database error, don't cache the failure
+                return None
+
+            ttl = self.api_key_ttl if system_id else self.api_key_negative_ttl
+            with self._lock:
+                if self._version == version:
+                    if len(self._api_keys) >= self.api_key_max_entries:
+                        self._api_keys = {}
+                    self._api_keys[api_key] = (system_id, current_time + ttl)
+
+        if not system_id:
+            return None
+
+        return self._get_system(version, None, system_id)
+
+    def _get_system(self, version, system_short_name, system_id):
+        with self._lock:
+            self._check_version(version)
+            system = self._lookup(system_short_name, system_id)
+            if system is not None:
+                return system
+
+        system = self._load_system(system_short_name, system_id)
+        if not system:
+            # Missing systems and database errors aren't cached
+            return system
+
+        with self._lock:
+            # Only keep the system if the config didn't change while it was loading
+            if self._version == version:
+                self._systems_by_id[system.get("system_id")] = system
+                self._systems_by_short_name[system.get("system_short_name")] = system
+
+        return system
+
+    def _check_version(self, version):
+        # Must be called with the lock held
+        if version != self._version:
+            if self._version is not None:
+                module_logger.info(f"<<Config>> <<Snapshot>> Config version changed to {version}, rebuilding.")
+            self._systems_by_id = {}
+            self._systems_by_short_name = {}
+            self._api_keys = {}
+            self._version = version
+
+    def clear(self):
+        """Discard every cached system."""
+        with self._lock:
+            self._version = None
+            self._systems_by_id = {}
+            self._systems_by_short_name = {}
+            self._api_keys = {}
+
+    def _lookup(self, system_short_name, system_id):
+        if system_id:
+            system = self._systems_by_id.get(int(system_id))
+            if system is not None and (not system_short_name or system.get("system_short_name") == system_short_name):
+                return system
+            return None
+
+        return self._systems_by_short_name.get(system_short_name)
+
+    def _load_api_key(self, api_key):
+        api_key_result = get_system_api_key(self.db, api_key)
+        if not api_key_result.get("success"):
+            module_logger.error(f"<<Config>> <<Snapshot>> Unable to resolve API key: {api_key_result.get('message')}")
+            return False
+
+        return (api_key_result.get("result") or {}).get("system_id")
+
+    def _load_system(self, system_short_name, system_id):
+        system_result = get_systems(self.db, system_id=system_id, system_short_name=system_short_name)
+        if not system_result.get("success"):
+            module_logger.error(f"<<Config>> <<Snapshot>> Unable to load system {system_short_name or system_id}: "
+                                f"{system_result.get('message')}")
+            return False
+
+        if not system_result.get("result"):
+            module_logger.warning(f"<<Config>> <<Snapshot>> System {system_short_name or system_id} not found")
+            return None
+
+        system = system_result.get("result")[0]
+        system["alert_filters"] = self._load_alert_filters(system.get("alert_triggers", []))
+        system["compiled_triggers"] = compile_alert_triggers(system.get("alert_triggers", []))
+        system["trigger_index"] = TriggerIndex(system["compiled_triggers"])
+        system["tone_matcher"] = get_tone_matcher(system["compiled_triggers"], self.tone_matcher)
+        self._compile_webhook_templates(system)
+
+        module_logger.debug(f"<<Config>> <<Snapshot>> Loaded system {system.get('system_short_name')}")
+        return system
+
+    @staticmethod
+    def _compile_webhook_templates(system):
+        webhooks = list(system.get("system_webhooks", []))
+        for trigger in system.get("alert_triggers", []):
+            webhooks.extend(trigger.get("trigger_webhooks", []))
+
+        for webhook in webhooks:
+            if not webhook.get("enabled") or webhook.get("webhook_body") is None:
+                continue
+            try:
+                compile_json_template(webhook.get("webhook_body"))
+            except Exception as e:
+                module_logger.warning(f"<<Config>> <<Snapshot>> Unable to compile webhook {webhook.get('webhook_id')} "
+                                      f"body for {system.get('system_short_name')}: {e}")
+
+    def _load_alert_filters(self, alert_triggers):
+        filter_ids = {trigger.get("alert_filter_id") for trigger in alert_triggers if trigger.get("alert_filter_id")}
+        if not filter_ids:
+            return {}
+
+        filter_result = get_alert_filters(self.db)
+        if not filter_result.get("success"):
+            module_logger.error("<<Config>> <<Snapshot>> Unable to load alert filters.")
+            return {}
+
+        alert_filters = {alert_filter.get("alert_filter_id"): alert_filter for alert_filter in
+                         filter_result.get("result", []) if alert_filter.get("alert_filter_id") in filter_ids}
+        for alert_filter in alert_filters.values():
+            alert_filter["keyword_automaton"] = KeywordAutomaton(alert_filter.get("filter_keywords"))
+
+        return alert_filters
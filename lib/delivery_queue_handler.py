@@ -0,0 +1,384 @@
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+import uuid
+
+import redis
+
+from lib.alert_action_handler import action_result, send_action
+from lib.helper_handler import ACTION_SKIPPED
+
+module_logger = logging.getLogger('icad_alerting_api.delivery_queue')
+
+DELIVERY_QUEUE_STREAM = "icad_delivery_queue"
+DELIVERY_QUEUE_GROUP = "icad_delivery_workers"
+DELIVERY_JOB_PREFIX = "icad_delivery_job:"
+DELIVERY_RETRY_KEY = "icad_delivery_retry"
+DEAD_LETTER_PREFIX = "icad_delivery_dead:"
+DEAD_LETTER_DESTINATIONS_KEY = "icad_delivery_dead_destinations"
+
+# Removes ARGV[1] from the destination set KEYS[1] only while its dead letter list KEYS[2] is empty, so letters added
+# during a replay keep their destination listed. Workers push the letter before adding the destination.
+FORGET_DEAD_LETTER_DESTINATION_SCRIPT = """
+if redis.call('LLEN', KEYS[2]) == 0 then
+    return redis.call('SREM', KEYS[1], ARGV[1])
+end
+return 0
+"""
+
+
+def get_delivery_queue_config(global_config_data):
+    """
+    Get the delivery queue configuration with defaults applied.
+
+    :param global_config_data: Dictionary containing global configuration data
+    :return: Dictionary containing the delivery queue configuration
+    """
+    queue_config = {
+        "enabled": False,
+        "embedded_workers": True,
+        "workers": 4,
+        "max_attempts": 6,
+        "base_delay": 5,
+        "max_delay": 900,
+        "job_ttl": 604800,
+        "max_length": 100000,
+        "dead_letter_max_length": 1000,
+        "block_ms": 2000,
+        "claim_idle_ms": 300000,
+        "claim_interval": 30
+    }
+    queue_config.update(global_config_data.get("delivery_queue", {}))
+    return queue_config
+
+
+def get_retry_delay(queue_config, attempts):
+    """
+    Get the delay before the next delivery attempt using exponential backoff with jitter.
+
+    :param queue_config: Dictionary containing the delivery queue configuration
+    :param attempts: Number of attempts made so far
+    :return: Delay in seconds
+    """
+    delay = min(queue_config.get("max_delay", 900), queue_config.get("base_delay", 5) * 2 ** (attempts - 1))
+    # Half of the delay is fixed, the other half is random so retries for a degraded provider spread out
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def enqueue_deliveries(rd, global_config_data, actions):
+    """
+    Write alert actions to the delivery queue using a single pipeline.
+
+    Args:
+        rd (RedisCache): An instance of the RedisCache class.
+        global_config_data (dict): Global configuration data.
+        actions (list): Action dictionaries from build_trigger_actions and build_global_actions.
+
+    Returns:
+        list: A delivery outcome dictionary for each action with the delivery ID it was queued as.
+    """
+    queue_config = get_delivery_queue_config(global_config_data)
+    max_length = queue_config.get("max_length")
+
+    jobs = []
+    pipeline = rd.get_pipeline()
+    for action in actions:
+        trigger_config = action.get("trigger") or {}
+        job_data = {
+            "delivery_id": str(uuid.uuid4()),
+            "channel": action.get("channel"),
+            "target": action.get("target"),
+            "destination": action.get("destination"),
+            "system_id": action.get("system", {}).get("system_id"),
+            "trigger_id": trigger_config.get("trigger_id"),
+            "args": action.get("args"),
+            "attempts": 0,
+            "queued_at": time.time(),
+            "last_error": None
+        }
+        jobs.append(job_data)
+
+        pipeline.setex(f"{DELIVERY_JOB_PREFIX}{job_data['delivery_id']}", queue_config.get("job_ttl"),
+                       rd.serialize_for_redis(job_data))
+        pipeline.xadd(DELIVERY_QUEUE_STREAM, {"delivery_id": job_data["delivery_id"]}, maxlen=max_length,
+                      approximate=True if max_length else False)
+
+    try:
+        pipeline.execute()
+    except redis.RedisError as error:
+        module_logger.error(f"<<Delivery>> <<Queue>> Unable to queue {len(jobs)} deliveries: {error}")
+        return [action_result(job_data["channel"], job_data["target"], False, "Unable to queue delivery.")
+                for job_data in jobs]
+
+    results = []
+    for job_data in jobs:
+        outcome = action_result(job_data["channel"], job_data["target"], True)
+        outcome["delivery_id"] = job_data["delivery_id"]
+        results.append(outcome)
+    return results
+
+
+def get_dead_letter_destinations(rd):
+    """
+    Get every destination with dead letters and the number of dead letters for each.
+
+    Args:
+        rd (RedisCache): An instance of the RedisCache class.
+
+    Returns:
+        dict: A dictionary containing 'success' (bool), 'message' (str), and 'result' (dict destination to count).
+    """
+    destinations_result = rd.smembers(DEAD_LETTER_DESTINATIONS_KEY)
+    if not destinations_result.get("success"):
+        return {"success": False, "message": "Unable to get dead letter destinations.", "result": {}}
+
+    destinations = {}
+    for destination in destinations_result.get("result", []):
+        length_result = rd.llen(f"{DEAD_LETTER_PREFIX}{destination}")
+        destinations[destination] = length_result.get("result", 0)
+
+    return {"success": True, "message": "Dead letter destinations retrieved.", "result": destinations}
+
+
+def get_dead_letters(rd, destination, start=0, end=99):
+    """
+    Get the dead letters of a destination without their alert and call data.
+
+    Args:
+        rd (RedisCache): An instance of the RedisCache class.
+        destination (str): The destination name.
+        start (int, optional): Index of the first dead letter.
+        end (int, optional): Index of the last dead letter.
+
+    Returns:
+        dict: A dictionary containing 'success' (bool), 'message' (str), and 'result' (list of delivery jobs).
+    """
+    result = rd.lrange(f"{DEAD_LETTER_PREFIX}{destination}", start, end)
+    if not result.get("success"):
+        return {"success": False, "message": "Unable to get dead letters.", "result": []}
+
+    # The args hold the call data and transcript, the job details are enough to decide on a replay
+    dead_letters = [{key: value for key, value in job_data.items() if key != "args"}
+                    for job_data in result.get("result", []) if isinstance(job_data, dict)]
+    return {"success": True, "message": "Dead letters retrieved.", "result": dead_letters}
+
+
+def replay_dead_letters(rd, global_config_data, destination):
+    """
+    Move the dead letters of a destination back to the delivery queue with their attempts reset.
+
+    Args:
+        rd (RedisCache): An instance of the RedisCache class.
+        global_config_data (dict): Global configuration data.
+        destination (str): The destination name.
+
+    Returns:
+        dict: A dictionary containing 'success' (bool), 'message' (str), and 'result' (int number replayed).
+    """
+    queue_config = get_delivery_queue_config(global_config_data)
+    list_name = f"{DEAD_LETTER_PREFIX}{destination}"
+
+    replayed = 0
+    while True:
+        # Dead letters are popped one at a time so letters added during the replay aren't lost
+        pop_result = rd.lpop(list_name)
+        if not pop_result.get("success"):
+            return {"success": False, "message": f"Replay stopped after {replayed} dead letters.", "result": replayed}
+
+        job_data = pop_result.get("result")
+        if not job_data:
+            break
+
+        job_data.update({"attempts": 0, "last_error": None, "queued_at": time.time()})
+        job_result = rd.set(f"{DELIVERY_JOB_PREFIX}{job_data.get('delivery_id')}", job_data,
+                            ttl=queue_config.get("job_ttl"))
+        stream_result = rd.xadd(DELIVERY_QUEUE_STREAM, {"delivery_id": job_data.get("delivery_id")},
+                                max_length=queue_config.get("max_length"))
+        if not job_result.get("success") or not stream_result.get("success"):
+            # Put it back so it isn't lost
+            rd.lpush(list_name, job_data)
+            return {"success": False, "message": f"Replay stopped after {replayed} dead letters.", "result": replayed}
+
+        replayed += 1
+
+    rd.run_script(FORGET_DEAD_LETTER_DESTINATION_SCRIPT, keys=[DEAD_LETTER_DESTINATIONS_KEY, list_name],
+                  args=[destination])
+    module_logger.info(f"<<Delivery>> <<Queue>> Replayed {replayed} dead letters for {destination}")
+    return {"success": True, "message": f"Replayed {replayed} dead letters.", "result": replayed}
+
+
+class DeliveryWorker:
+    """
+    Pool of threads sending queued alert actions with retries.
+
+    A failed delivery is scheduled again in a sorted set scored by the time of its next attempt, using exponential
+    backoff with jitter. Deliveries still failing after max_attempts are moved to the dead letter list of their
+    destination. Systems and triggers are looked up in the config snapshot when the delivery is sent so credentials
+    never leave the database.
+
+    Attributes:
+        rd (RedisCache): An instance of the RedisCache class.
+        global_config_data (dict): Global configuration data.
+        config_snapshot (ConfigSnapshot): The system config snapshot.
+        worker_count (int): Number of consumer threads.
+    """
+
+    def __init__(self, rd, global_config_data, config_snapshot, worker_count=None):
+        self.rd = rd
+        self.global_config_data = global_config_data
+        self.config_snapshot = config_snapshot
+        self.queue_config = get_delivery_queue_config(global_config_data)
+        self.worker_count = worker_count if worker_count is not None else int(self.queue_config.get("workers", 4))
+        self.consumer_prefix = f"{socket.gethostname()}-{os.getpid()}"
+        self.stop_event = threading.Event()
+        self.threads = []
+
+    def start(self):
+        create_result = self.rd.xgroup_create(DELIVERY_QUEUE_STREAM, DELIVERY_QUEUE_GROUP)
+        if not create_result.get("success"):
+            module_logger.error("<<Delivery>> <<Queue>> Unable to create consumer group, workers not started.")
+            return False
+
+        for index in range(self.worker_count):
+            consumer_name = f"{self.consumer_prefix}-{index}"
+            thread = threading.Thread(target=self._run, args=(consumer_name,), daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+        module_logger.info(f"<<Delivery>> <<Queue>> Started {self.worker_count} delivery workers.")
+        return True
+
+    def stop(self, timeout=None):
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join(timeout)
+        self.threads = []
+
+    def _run(self, consumer_name):
+        last_claim = 0
+        while not self.stop_event.is_set():
+            try:
+                self._schedule_retries()
+
+                if time.time() - last_claim >= self.queue_config.get("claim_interval", 30):
+                    last_claim = time.time()
+                    self._claim_stale_entries(consumer_name)
+
+                read_result = self.rd.xreadgroup(DELIVERY_QUEUE_STREAM, DELIVERY_QUEUE_GROUP, consumer_name, count=1,
+                                                 block=self.queue_config.get("block_ms", 2000))
+                if not read_result.get("success"):
+                    time.sleep(1)
+                    continue
+
+                for entry_id, entry_fields in read_result.get("result", []):
+                    self._handle_entry(entry_id, entry_fields)
+
+            except Exception as e:
+                module_logger.error(f"<<Delivery>> <<Queue>> Unexpected error in worker {consumer_name}: {e}")
+                time.sleep(1)
+
+        module_logger.info(f"<<Delivery>> <<Queue>> Stopped worker {consumer_name}")
+
+    def _schedule_retries(self):
+        due_result = self.rd.zrangebyscore(DELIVERY_RETRY_KEY, "-inf", time.time(), start=0, num=50)
+        for delivery_id in due_result.get("result", []) if due_result.get("success") else []:
+            # Only the worker that removes the retry queues it again
+            remove_result = self.rd.zrem(DELIVERY_RETRY_KEY, delivery_id)
+            if remove_result.get("result"):
+                self.rd.xadd(DELIVERY_QUEUE_STREAM, {"delivery_id": delivery_id},
+                             max_length=self.queue_config.get("max_length"))
+
+    def _claim_stale_entries(self, consumer_name):
+        start_id = "0-0"
+        while not self.stop_event.is_set():
+            claim_result = self.rd.xautoclaim(DELIVERY_QUEUE_STREAM, DELIVERY_QUEUE_GROUP, consumer_name,
+                                              self.queue_config.get("claim_idle_ms", 300000), start_id=start_id,
+                                              count=10)
+            if not claim_result.get("success"):
+                return
+
+            for entry_id, entry_fields in claim_result.get("result", []):
+                module_logger.warning(f"<<Delivery>> <<Queue>> Claimed stale entry {entry_id} for {consumer_name}")
+                self._handle_entry(entry_id, entry_fields)
+
+            start_id = claim_result.get("cursor")
+            if not start_id or start_id == "0-0":
+                return
+
+    def _handle_entry(self, entry_id, entry_fields):
+        delivery_id = (entry_fields or {}).get("delivery_id")
+        job_result = self.rd.get(f"{DELIVERY_JOB_PREFIX}{delivery_id}") if delivery_id else {}
+        job_data = job_result.get("result") if job_result.get("success") else None
+        if not isinstance(job_data, dict):
+            # The entry was trimmed or the job expired
+            self.rd.xack(DELIVERY_QUEUE_STREAM, DELIVERY_QUEUE_GROUP, entry_id)
+            return
+
+        self._deliver(job_data)
+        self.rd.xack(DELIVERY_QUEUE_STREAM, DELIVERY_QUEUE_GROUP, entry_id)
+
+    def _deliver(self, job_data):
+        delivery_id = job_data.get("delivery_id")
+        channel, target = job_data.get("channel"), job_data.get("target")
+        job_data["attempts"] = job_data.get("attempts", 0) + 1
+
+        system_data = self.config_snapshot.get_system(system_id=job_data.get("system_id"))
+        trigger_config = None
+        if system_data and job_data.get("trigger_id") is not None:
+            trigger_config = next((trigger for trigger in system_data.get("alert_triggers", [])
+                                   if trigger.get("trigger_id") == job_data.get("trigger_id")), None)
+
+        if system_data is False:
+            # The database is unavailable, retry with the other failures
+            outcome = action_result(channel, target, False, "Unable to load system configuration.")
+        elif not system_data or (job_data.get("trigger_id") is not None and not trigger_config):
+            # The system or trigger was deleted, retrying can't help
+            job_data["last_error"] = "System or trigger no longer exists."
+            self._dead_letter(job_data)
+            return
+        else:
+            try:
+                send_result = send_action(self.global_config_data, system_data, trigger_config, channel,
+                                          job_data.get("args") or [])
+                outcome = action_result(channel, target, send_result,
+                                        send_result.get("message") if isinstance(send_result, dict) else None)
+            except Exception as e:
+                traceback.print_exc()
+                outcome = action_result(channel, target, False, str(e))
+
+        if outcome.get("status") == ACTION_SKIPPED:
+            # Nothing to send for this alert, retrying wouldn't change that
+            self.rd.delete(f"{DELIVERY_JOB_PREFIX}{delivery_id}")
+            module_logger.info(f"<<Delivery>> <<{channel.capitalize()}>> Skipped {delivery_id} for {target}")
+            return
+
+        if outcome.get("success"):
+            self.rd.delete(f"{DELIVERY_JOB_PREFIX}{delivery_id}")
+            module_logger.info(f"<<Delivery>> <<{channel.capitalize()}>> Delivered {delivery_id} for {target} "
+                               f"after {job_data['attempts']} attempts")
+            return
+
+        job_data["last_error"] = outcome.get("message") or "Delivery failed."
+        if job_data["attempts"] >= self.queue_config.get("max_attempts", 6):
+            self._dead_letter(job_data)
+            return
+
+        delay = get_retry_delay(self.queue_config, job_data["attempts"])
+        self.rd.set(f"{DELIVERY_JOB_PREFIX}{delivery_id}", job_data, ttl=self.queue_config.get("job_ttl"))
+        self.rd.zadd(DELIVERY_RETRY_KEY, {delivery_id: time.time() + delay})
+        module_logger.warning(f"<<Delivery>> <<{channel.capitalize()}>> Attempt {job_data['attempts']} failed for "
+                              f"{target}, retrying in {delay:.0f} seconds")
+
+    def _dead_letter(self, job_data):
+        destination = job_data.get("destination") or job_data.get("channel")
+        self.rd.rpush(f"{DEAD_LETTER_PREFIX}{destination}", job_data,
+                      trim_to_length=self.queue_config.get("dead_letter_max_length"))
+        self.rd.sadd(DEAD_LETTER_DESTINATIONS_KEY, destination)
+        self.rd.delete(f"{DELIVERY_JOB_PREFIX}{job_data.get('delivery_id')}")
+        module_logger.error(f"<<Delivery>> <<{job_data.get('channel', '').capitalize()}>> Delivery "
+                            f"{job_data.get('delivery_id')} moved to dead letters for {destination} after "
+                            f"{job_data.get('attempts')} attempts: {job_data.get('last_error')}")
@@ -10,6 +10,7 @@ from email.utils import formataddr
 
 from lib.config_handler import decrypt_password
 from lib.helper_handler import generate_mapped_content
+from lib.smtp_pool_handler import get_smtp_pool
 
 module_logger = logging.getLogger('icad_alerting_api.email')
 
@@ -35,6 +36,7 @@ class EmailSender:
                     system_config_data (dict): A dictionary containing system configuration data.
         """
 
+        self.global_config_data = global_config_data
         self.sender_email = system_config_data["email_address_from"]
         self.sender_name = system_config_data["email_text_from"]
         self.smtp_username = system_config_data["smtp_username"]
@@ -84,6 +86,13 @@ class EmailSender:
         message.attach(html_part)
 
         try:
+            smtp_pool = get_smtp_pool(self.global_config_data)
+            if smtp_pool and self.smtp_port in (465, 587):
+                # Reuse an authenticated connection to the server
+                smtp_pool.send_message(self.smtp_hostname, self.smtp_port, self.smtp_username, self.smtp_password,
+                                       message)
+                return {"success": True, "message": "Email sent successfully using pooled connection"}
+
             # Connect to the SMTP server and send the email based on the chosen security protocol deciphered from
             # port number
             if self.smtp_port == 465:
@@ -118,13 +127,14 @@ class EmailSender:
             return {"success": False, "message": error_message}
 
 
-def generate_system_alert_email(global_config_data, system_config_data, alert_data, call_data):
+def generate_system_alert_email(global_config_data, system_config_data, alert_data, call_data, render_context=None):
     """
     Generates the subject and body of an alert email by replacing placeholders with actual data.
 
     :param system_config_data: Dictionary containing system configuration data
     :param alert_data: Dictionary containing data about the trigger alert
     :param call_data: Dictionary containing data about the call
+    :param render_context: RenderContext shared with the other senders of the alert
     :return: Tuple containing the subject and body of the email
     """
     test_mode = global_config_data.get("general", {}).get("test_mode", True)
@@ -135,7 +145,8 @@ def generate_system_alert_email(global_config_data, system_config_data, alert_da
     email_body_template = system_config_data.get("email_alert_body",
                                         '{trigger_list} Alerted at {timestamp}<br><br>{transcript}<br><br><a href="{audio_wav_url}">Click for Alert Audio</a><br><br><a href="{stream_url}">Click for Audio Stream</a>')
 
-    email_body = generate_mapped_content(email_body_template, alert_data, call_data, stream_url, test_mode)
+    email_body = generate_mapped_content(email_body_template, alert_data, call_data, stream_url, test_mode,
+                                         render_context)
 
     if email_body is None:
         return None, None
@@ -152,13 +163,15 @@ def generate_system_alert_email(global_config_data, system_config_data, alert_da
         return None, None
 
 
-def generate_trigger_alert_email(global_config_data, system_config_data, trigger_data, alert_data, call_data):
+def generate_trigger_alert_email(global_config_data, system_config_data, trigger_data, alert_data, call_data,
+                                 render_context=None):
     """
     Generates the subject and body of an alert email by replacing placeholders with actual data.
 
     :param system_config_data: Dictionary containing system configuration data
     :param alert_data: Dictionary containing data about the trigger alert
     :param call_data: Dictionary containing data about the call
+    :param render_context: RenderContext shared with the other senders of the alert
     :return: Tuple containing the subject and body of the email
     """
     test_mode = global_config_data.get("general", {}).get("test_mode", True)
@@ -169,7 +182,8 @@ def generate_trigger_alert_email(global_config_data, system_config_data, trigger
 
     stream_url = trigger_data.get("stream_url") or system_config_data.get("stream_url", "")
 
-    email_body = generate_mapped_content(email_body_template, alert_data, call_data, stream_url, test_mode)
+    email_body = generate_mapped_content(email_body_template, alert_data, call_data, stream_url, test_mode,
+                                         render_context)
 
     if email_body is None:
         return None, None
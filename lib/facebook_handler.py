@@ -5,13 +5,14 @@ import logging
 import requests
 
 from lib.config_handler import decrypt_password
-from lib.helper_handler import generate_mapped_content
+from lib.helper_handler import generate_mapped_content, ACTION_DELIVERED, ACTION_SKIPPED, ACTION_FAILED
+from lib.http_session_handler import get_http_session, get_http_timeout
 
 module_logger = logging.getLogger('icad_alerting_api.facebook')
 
 
 class FacebookAPI:
-    def __init__(self, global_config_data, system_config_data, trigger_config_data=None):
+    def __init__(self, global_config_data, system_config_data, trigger_config_data=None, render_context=None):
         """
             Initializes the FacebookAPI class with the necessary tokens and IDs.
 
@@ -20,11 +21,13 @@ class FacebookAPI:
         self.global_config_data = global_config_data
         self.system_config_data = system_config_data
         self.trigger_config_data = trigger_config_data
+        self.render_context = render_context
         self.test_mode = self.global_config_data.get("general", {}).get("test_mode", True)
 
     def _make_request(self, method, url, payload):
         try:
-            response = requests.request(method, url, data=payload)
+            response = get_http_session(self.global_config_data, "facebook").request(
+                method, url, data=payload, timeout=get_http_timeout(self.global_config_data, "facebook"))
             response.raise_for_status()
             return {'success': True, 'message': 'Success', 'result': response.json()}
         except requests.RequestException as e:
@@ -43,6 +46,12 @@ class FacebookAPI:
         return self._make_request("POST", url, payload)
 
     def post_message(self, alert_data, call_data):
+        """
+        Post the alert to the Facebook page and comment on the post when comments are enabled.
+
+        :return: ACTION_DELIVERED once the page post is published, even if the comment fails, so the post is never
+                 published twice. ACTION_SKIPPED when no triggers are enabled for Facebook, ACTION_FAILED otherwise.
+        """
         trigger_list = []
         for trigger in alert_data:
             if trigger.get("facebook_enabled"):
@@ -50,7 +59,7 @@ class FacebookAPI:
 
         if len(trigger_list) < 1:
             module_logger.warning("Not Posting to <<Facebook>> Page no triggers enabled for Facebook.")
-            return False
+            return ACTION_SKIPPED
 
         module_logger.info("Posting to <<Facebook>> Page")
 
@@ -59,50 +68,57 @@ class FacebookAPI:
 
         if not page_id:
             module_logger.warning(f"<<Facebook>> <<Post>> <<Failed>> no page id given.")
-            return False
+            return ACTION_FAILED
 
         try:
             facebook_page_token = decrypt_password(self.system_config_data.get("facebook_page_token"),
                                                    self.global_config_data)
 
             facebook_message = self.generate_facebook_message(alert_data, call_data)
-            facebook_comment = self.generate_facebook_comment(alert_data, call_data)
 
             page_response = self.post_to_page(page_id, facebook_page_token, facebook_message)
-            if page_response.get('success', False):
-                module_logger.info("<<Facebook>> <<Post>> page successful.")
-                if comment_enabled:
-                    page_post_id = page_response.get('result', {}).get('id', "")
-                    if not page_post_id:
-                        module_logger.error("<<Facebook>> <<Post>> unable to post comment, not post id returned.")
-                        return page_response.get('success')
-
-                    comment_response = self.comment_on_page_post(page_post_id, facebook_page_token, facebook_comment)
-
-                    if comment_response.get("success"):
-                        module_logger.info("<<Facebook>> <<Post>> page comment successful.")
-
-                    return comment_response.get("success", False)
-                else:
-                    module_logger.warning("<<Facebook>> <<Post>> not posting post comment. Comment disabled.")
-            else:
-                return page_response.get("success", False)
+            if not page_response.get('success', False):
+                return ACTION_FAILED
 
         except Exception as e:
             module_logger.error(f"<<Facebook>> <<Post>> Unexpected error: {e}")
-            return False
+            return ACTION_FAILED
+
+        module_logger.info("<<Facebook>> <<Post>> page successful.")
+        if not comment_enabled:
+            module_logger.warning("<<Facebook>> <<Post>> not posting post comment. Comment disabled.")
+            return ACTION_DELIVERED
+
+        # The post is already published, a failed comment is logged but doesn't fail the delivery
+        try:
+            page_post_id = (page_response.get('result') or {}).get('id', "")
+            if not page_post_id:
+                module_logger.error("<<Facebook>> <<Post>> unable to post comment, not post id returned.")
+                return ACTION_DELIVERED
+
+            facebook_comment = self.generate_facebook_comment(alert_data, call_data)
+            comment_response = self.comment_on_page_post(page_post_id, facebook_page_token, facebook_comment)
+
+            if comment_response.get("success"):
+                module_logger.info("<<Facebook>> <<Post>> page comment successful.")
+            else:
+                module_logger.error(f"<<Facebook>> <<Post>> page comment failed: {comment_response.get('message')}")
+        except Exception as e:
+            module_logger.error(f"<<Facebook>> <<Post>> Unexpected error posting comment: {e}")
+
+        return ACTION_DELIVERED
 
     def generate_facebook_message(self, alert_data, call_data):
 
         post_body_template = self.system_config_data.get("facebook_post_body",
                                                          "{timestamp} Departments:\n{trigger_list}\n\nDispatch Audio:\n{audio_wav_url}")
 
-        post_body = generate_mapped_content(post_body_template, alert_data, call_data, self.system_config_data.get("stream_url") or "", self.test_mode)
+        post_body = generate_mapped_content(post_body_template, alert_data, call_data, self.system_config_data.get("stream_url") or "", self.test_mode, self.render_context)
         return post_body
 
     def generate_facebook_comment(self, alert_data, call_data):
         comment_body_template = self.system_config_data.get("facebook_comment_body", "{transcript}\n{stream_url}")
 
-        comment_body = generate_mapped_content(comment_body_template, alert_data, call_data, self.system_config_data.get("stream_url") or "", self.test_mode)
+        comment_body = generate_mapped_content(comment_body_template, alert_data, call_data, self.system_config_data.get("stream_url") or "", self.test_mode, self.render_context)
 
         return comment_body
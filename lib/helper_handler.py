@@ -1,12 +1,231 @@
 import json
 import logging
+import re
+import threading
+from collections import ChainMap, OrderedDict
 from datetime import datetime, timezone
+from functools import lru_cache
+from string import Formatter
 
 module_logger = logging.getLogger("icad_alerting_api.text_handler")
 
+# Results of sending an alert action. A skipped action had nothing to send and is never retried.
+ACTION_DELIVERED = "delivered"
+ACTION_SKIPPED = "skipped"
+ACTION_FAILED = "failed"
+
+TEMPLATE_CACHE_SIZE = 1024
+
+_json_template_cache = OrderedDict()
+_json_template_cache_lock = threading.Lock()
+
+
+class RenderContext(dict):
+    """
+    Placeholder values of a call and its triggered alerts, computed on first use and kept for every later render.
+
+    Missing keys are computed by __missing__ and stored, so the timestamp, trigger list and tone reports are built at
+    most once however many templates are rendered for the call. Unknown placeholders raise KeyError like a plain
+    mapping. The stream URL and test flag depend on the channel and are layered on top by the render functions.
+
+    A context is created for one set of actions of a call and passed to each of their senders. Values are never
+    recomputed, so the alert and call data must not be modified once the context is created.
+
+    Attributes:
+        alert_data (list): The triggered alerts.
+        call_data (dict): The call metadata.
+    """
+
+    def __init__(self, alert_data, call_data):
+        super().__init__()
+        self.alert_data = alert_data
+        self.call_data = call_data
+        self._json_timestamp = None
+
+    def __missing__(self, key):
+        if key == "trigger_list":
+            value = ", ".join([triggered_alert.get("trigger_name") for triggered_alert in self.alert_data])
+        elif key == "timestamp":
+            value = self._get_start_datetime().strftime('"%H:%M %b %d %Y" %Z')
+        elif key == "timestamp_epoch":
+            value = self.call_data.get("start_time")
+        elif key == "transcript":
+            value = self.call_data.get("transcript", {}).get("transcript", "No Transcript")
+        elif key == "audio_wav_url":
+            value = self.call_data.get("audio_wav_url", "")
+        elif key == "audio_m4a_url":
+            value = self.call_data.get("audio_m4a_url", "")
+        elif key == "tone_report_html":
+            value = generate_tone_data_report(self.alert_data, "html")
+        elif key == "tone_report_text":
+            value = generate_tone_data_report(self.alert_data, "text")
+        elif key == "tone_report_json":
+            value = self.alert_data
+        else:
+            raise KeyError(key)
+
+        self[key] = value
+        return value
+
+    def _get_start_datetime(self):
+        # Convert the epoch timestamp to a datetime object in the local timezone
+        return datetime.fromtimestamp(self.call_data.get("start_time", 0), tz=timezone.utc).astimezone()
+
+    @property
+    def json_timestamp(self):
+        """The timestamp as formatted in JSON templates, without the quotes used in text templates."""
+        if self._json_timestamp is None:
+            self._json_timestamp = self._get_start_datetime().strftime('%H:%M %b %d %Y %Z')
+        return self._json_timestamp
+
+
+class TemplatePlan:
+    """
+    A text template parsed once into the placeholders it references.
+
+    Templates without placeholders are rendered once when compiled. Templates with placeholders are rendered with
+    format_map against the lazy RenderContext, so only the values they reference are ever computed.
+
+    Attributes:
+        template (str): The template string.
+        fields (tuple): Names of the placeholders referenced by the template.
+        static (str or None): The rendered template if it has no placeholders.
+    """
+
+    __slots__ = ("template", "fields", "static")
+
+    def __init__(self, template):
+        self.template = template
+        self.static = None
+
+        fields = []
+        for _, field_name, format_spec, _ in Formatter().parse(template):
+            if field_name is None:
+                continue
+            # Attribute and index lookups like {call.short_name} and {tones[0]} resolve the first name
+            fields.append(re.split(r"[.\[]", field_name, 1)[0])
+            if format_spec and "{" in format_spec:
+                fields.extend(nested_field for _, nested_field, _, _ in Formatter().parse(format_spec)
+                              if nested_field is not None)
+        self.fields = tuple(dict.fromkeys(fields))
+
+        if not self.fields:
+            self.static = template.format_map({})
+
+    def render(self, mapping):
+        if self.static is not None:
+            return self.static
+        return self.template.format_map(mapping)
+
+
+class JsonTemplatePlan:
+    """
+    A JSON template with precomputed paths to the string leaves that need substitution.
+
+    Rendering copies only the containers on the way to those leaves, the rest of the tree is shared with the template
+    and must not be modified by the caller.
+
+    Attributes:
+        json_data (dict or list): The template tree.
+        leaf_plans (dict): Nested dictionary following the template tree down to the TemplatePlan of each leaf.
+        fields (tuple): Names of the placeholders referenced by the template.
+    """
+
+    __slots__ = ("json_data", "leaf_plans", "fields")
+
+    def __init__(self, json_data):
+        self.json_data = json_data
+        fields = []
+        self.leaf_plans = self._plan_node(json_data, fields)
+        self.fields = tuple(dict.fromkeys(fields))
+
+    @classmethod
+    def _plan_node(cls, node, fields):
+        if isinstance(node, dict):
+            items = node.items()
+        elif isinstance(node, list):
+            items = enumerate(node)
+        else:
+            return None
+
+        plans = {}
+        for key, value in items:
+            if isinstance(value, str):
+                leaf_plan = compile_template(value)
+                # Leaves without placeholders only need substituting when they contain escaped braces
+                if leaf_plan.fields or leaf_plan.static != value:
+                    plans[key] = leaf_plan
+                    fields.extend(leaf_plan.fields)
+            else:
+                child_plans = cls._plan_node(value, fields)
+                if child_plans:
+                    plans[key] = child_plans
+        return plans
+
+    def render(self, mapping):
+        if not self.leaf_plans:
+            return self.json_data
+        return self._render_node(self.json_data, self.leaf_plans, mapping)
+
+    @classmethod
+    def _render_node(cls, node, plans, mapping):
+        rendered = dict(node) if isinstance(node, dict) else list(node)
+        for key, plan in plans.items():
+            if isinstance(plan, TemplatePlan):
+                rendered[key] = plan.render(mapping)
+            else:
+                rendered[key] = cls._render_node(node[key], plan, mapping)
+        return rendered
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def compile_template(template):
+    """
+    Compile a text template, cached by the template string.
+
+    :param template: Template string with placeholders
+    :return: TemplatePlan for the template
+    """
+    return TemplatePlan(template)
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def _compile_json_string_template(template):
+    return JsonTemplatePlan(json.loads(template))
+
+
+def compile_json_template(template):
+    """
+    Compile a JSON template.
+
+    String templates are cached by their text. Dictionary templates are cached by identity, the webhook bodies of a
+    system are compiled when the system is loaded into the config snapshot so sends reuse their plan until the
+    configuration changes. The cache keeps a reference to the template so an identity can't be reused while cached.
+
+    :param template: Template JSON string or dictionary with placeholders
+    :return: JsonTemplatePlan for the template
+    """
+    if isinstance(template, str):
+        return _compile_json_string_template(template)
+    elif not isinstance(template, dict):
+        raise ValueError("Template must be a JSON string or a dictionary")
+
+    with _json_template_cache_lock:
+        cached = _json_template_cache.get(id(template))
+        if cached is not None and cached.json_data is template:
+            _json_template_cache.move_to_end(id(template))
+            return cached
+
+    plan = JsonTemplatePlan(template)
+    with _json_template_cache_lock:
+        _json_template_cache[id(template)] = plan
+        if len(_json_template_cache) > TEMPLATE_CACHE_SIZE:
+            _json_template_cache.popitem(last=False)
+    return plan
+
 
 def generate_mapped_content(template, alert_data, call_data, stream_url,
-                            test_mode):
+                            test_mode, render_context=None):
     """
     Generates content by replacing placeholders with actual data.
 
@@ -15,43 +234,26 @@ def generate_mapped_content(template, alert_data, call_data, stream_url,
     :param call_data: Dictionary containing data about the call
     :param stream_url: Stream URL to be used in the content
     :param test_mode: Flag indicating if the system is in test mode
+    :param render_context: RenderContext of the alert and call shared with other channels, a new one is used if None
     :return: Mapped content
     """
 
-    # Convert the epoch timestamp to a datetime object
-    current_time_dt = datetime.fromtimestamp(call_data.get("start_time", 0), tz=timezone.utc).astimezone()
-    # Format the datetime object to a human-readable string with the timezone
-    current_time = current_time_dt.strftime('"%H:%M %b %d %Y" %Z')
-
-    trigger_list = ", ".join([triggered_alert.get("trigger_name") for triggered_alert in alert_data])
-
-    tone_report = generate_tone_data_report(alert_data)
-
-    mapping = {
-        "trigger_list": trigger_list,
-        "timestamp": current_time,
-        "timestamp_epoch": call_data.get("start_time"),
-        "transcript": call_data.get("transcript", {}).get("transcript", "No Transcript"),
-        "audio_wav_url": call_data.get("audio_wav_url", ""),
-        "audio_m4a_url": call_data.get("audio_m4a_url", ""),
-        "stream_url": stream_url,
-        "tone_report_html": generate_tone_data_report(alert_data, "html"),
-        "tone_report_text": generate_tone_data_report(alert_data, "text"),
-        "tone_report_json": alert_data,
-    }
+    if render_context is None:
+        render_context = RenderContext(alert_data, call_data)
+    mapping = ChainMap({"stream_url": stream_url}, render_context)
 
     if test_mode:
         template = f"TEST TEST TEST TEST\n{template}\nTEST TEST TEST TEST"
 
     try:
-        mapped_content = template.format_map(mapping)
+        mapped_content = compile_template(template).render(mapping)
         return mapped_content
     except Exception as e:
         module_logger.exception(f"Failed to generate mapped content: {e}")
         return None
 
 
-def generate_mapped_json(template, alert_data, call_data, stream_url, test_mode):
+def generate_mapped_json(template, alert_data, call_data, stream_url, test_mode, render_context=None):
     """
     Generates JSON content by replacing placeholders with actual data.
 
@@ -60,53 +262,21 @@ def generate_mapped_json(template, alert_data, call_data, stream_url, test_mode)
     :param call_data: Dictionary containing data about the call
     :param stream_url: Stream URL to be used in the content
     :param test_mode: Flag indicating if the system is in test mode
+    :param render_context: RenderContext of the alert and call shared with other channels, a new one is used if None
     :return: Mapped JSON string or dictionary
     """
 
-    # Convert the epoch timestamp to a datetime object
-    current_time_dt = datetime.fromtimestamp(call_data.get("start_time", 0), tz=timezone.utc).astimezone()
-
-    # Format the datetime object to a human-readable string with the timezone
-    current_time = current_time_dt.strftime('%H:%M %b %d %Y %Z')
-
-    trigger_list = ", ".join([triggered_alert.get("trigger_name") for triggered_alert in alert_data])
-
-    mapping = {
-        "trigger_list": trigger_list,
-        "timestamp": current_time,
-        "timestamp_epoch": call_data.get("start_time"),
-        "transcript": call_data.get("transcript", {}).get("transcript", "No Transcript"),
-        "audio_wav_url": call_data.get("audio_wav_url", ""),
-        "audio_m4a_url": call_data.get("audio_m4a_url", ""),
-        "stream_url": stream_url,
-        "tone_report_html": generate_tone_data_report(alert_data, "html"),
-        "tone_report_text": generate_tone_data_report(alert_data, "text"),
-        "tone_report_json": alert_data,
-        "is_test": test_mode
-    }
-
     try:
-        # Check if the template is a string (JSON) or a dictionary
-        if isinstance(template, str):
-            # Load the template JSON string
-            json_data = json.loads(template)
-        elif isinstance(template, dict):
-            json_data = template
-        else:
-            raise ValueError("Template must be a JSON string or a dictionary")
-
-        # Recursively replace placeholders in the JSON data
-        def replace_placeholders(obj):
-            if isinstance(obj, dict):
-                return {k: replace_placeholders(v) for k, v in obj.items()}
-            elif isinstance(obj, list):
-                return [replace_placeholders(i) for i in obj]
-            elif isinstance(obj, str):
-                return obj.format_map(mapping)
-            else:
-                return obj
+        template_plan = compile_json_template(template)
+
+        if render_context is None:
+            render_context = RenderContext(alert_data, call_data)
+        channel_values = {"stream_url": stream_url, "is_test": test_mode}
+        if "timestamp" in template_plan.fields:
+            channel_values["timestamp"] = render_context.json_timestamp
 
-        mapped_json_data = replace_placeholders(json_data)
+        # Replace placeholders in the string leaves of the compiled JSON template
+        mapped_json_data = template_plan.render(ChainMap(channel_values, render_context))
 
         # Convert back to JSON string if the input was a string
         if isinstance(template, str):
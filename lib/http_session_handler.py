@@ -0,0 +1,92 @@
+import http.cookiejar
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+module_logger = logging.getLogger('icad_alerting_api.http_session')
+
+_http_sessions = {}
+_http_sessions_lock = threading.Lock()
+
+
+def get_http_config(global_config_data):
+    """
+    Get the outbound HTTP configuration with defaults applied.
+
+    :param global_config_data: Dictionary containing global configuration data
+    :return: Dictionary containing the HTTP configuration
+    """
+    http_config = {
+        "pool_connections": 20,
+        "pool_maxsize": 32,
+        "timeouts": {
+            "default": {"connect": 5, "read": 30},
+            "webhook": {"connect": 5, "read": 10},
+            "pushover": {"connect": 5, "read": 10},
+            "facebook": {"connect": 5, "read": 30},
+            "telegram": {"connect": 5, "read": 110},
+            "audio": {"connect": 5, "read": 60}
+        }
+    }
+    configured = global_config_data.get("http", {})
+    http_config.update({key: value for key, value in configured.items() if key != "timeouts"})
+    for provider, provider_timeouts in configured.get("timeouts", {}).items():
+        http_config["timeouts"][provider] = dict(http_config["timeouts"].get(provider, {}), **provider_timeouts)
+    return http_config
+
+
+def get_http_timeout(global_config_data, provider):
+    """
+    Get the connect and read timeouts of a provider.
+
+    :param global_config_data: Dictionary containing global configuration data
+    :param provider: Name of the provider
+    :return: Tuple of the connect and read timeouts in seconds, as accepted by requests
+    """
+    timeouts = get_http_config(global_config_data)["timeouts"]
+    provider_timeouts = dict(timeouts.get("default", {}), **timeouts.get(provider, {}))
+    return provider_timeouts.get("connect"), provider_timeouts.get("read")
+
+
+def get_http_session(global_config_data, provider):
+    """
+    Get the shared session of a provider, creating it the first time it is used.
+
+    Each provider has its own session so pool sizes and keep-alive connections aren't shared between a slow provider
+    and the others. The adapter keeps a connection pool per host, so repeated requests to the same host reuse an open
+    connection instead of doing a new TCP and TLS handshake.
+
+    :param global_config_data: Dictionary containing global configuration data
+    :param provider: Name of the provider
+    :return: requests.Session for the provider
+    """
+    session = _http_sessions.get(provider)
+    if session is not None:
+        return session
+
+    with _http_sessions_lock:
+        session = _http_sessions.get(provider)
+        if session is None:
+            http_config = get_http_config(global_config_data)
+            adapter = HTTPAdapter(pool_connections=http_config.get("pool_connections", 20),
+                                  pool_maxsize=http_config.get("pool_maxsize", 32))
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            # Sessions are shared by every system, a cookie set by one endpoint must not be sent for another
+            session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+            _http_sessions[provider] = session
+            module_logger.debug(f"<<HTTP>> <<Session>> Created session for {provider}")
+    return session
+
+
+def close_http_sessions():
+    """
+    Close every shared session and their pooled connections.
+    """
+    with _http_sessions_lock:
+        for session in _http_sessions.values():
+            session.close()
+        _http_sessions.clear()
@@ -0,0 +1,122 @@
+import hashlib
+import logging
+import time
+
+module_logger = logging.getLogger('icad_alerting_api.idempotency')
+
+IDEMPOTENCY_PREFIX = "icad_idempotency:"
+
+
+def get_idempotency_config(global_config_data):
+    """
+    Get the idempotency configuration with defaults applied.
+
+    :param global_config_data: Dictionary containing global configuration data
+    :return: Dictionary containing the idempotency configuration
+    """
+    idempotency_config = {
+        "enabled": True,
+        "ttl": 86400,
+        "processing_ttl": 300
+    }
+    idempotency_config.update(global_config_data.get("idempotency", {}))
+    return idempotency_config
+
+
+def get_idempotency_key(system_data, call_data, request_key=None):
+    """
+    Build the Redis key used to dedupe a call.
+
+    The Idempotency-Key sent by the client is used when present, otherwise the key is derived from the call short name,
+    start time and audio URL. Keys are scoped to the system so two systems can't collide.
+
+    Args:
+        system_data (dict): The system the call belongs to.
+        call_data (dict): The call metadata.
+        request_key (str, optional): The Idempotency-Key sent with the request.
+
+    Returns:
+        str or None: The Redis key, or None if the call can't be identified.
+    """
+    if request_key:
+        call_key = request_key.strip()
+    else:
+        if not call_data.get("start_time") and not call_data.get("audio_wav_url"):
+            return None
+        call_key = f"{call_data.get('short_name')}|{call_data.get('start_time')}|{call_data.get('audio_wav_url')}"
+
+    if not call_key:
+        return None
+
+    call_hash = hashlib.sha256(call_key.encode("utf-8")).hexdigest()
+    return f"{IDEMPOTENCY_PREFIX}{system_data.get('system_id')}:{call_hash}"
+
+
+def reserve_idempotency_key(rd, global_config_data, idempotency_key):
+    """
+    Atomically reserve an idempotency key before a call is processed.
+
+    Args:
+        rd (RedisCache): An instance of the RedisCache class.
+        global_config_data (dict): Global configuration data.
+        idempotency_key (str): The Redis key from get_idempotency_key.
+
+    Returns:
+        dict: A dictionary containing 'success' (bool), 'message' (str), and 'result' (None if the key was reserved
+        for this request, otherwise the record of the first request).
+    """
+    idempotency_config = get_idempotency_config(global_config_data)
+    record = {"status": "processing", "reserved_at": time.time()}
+
+    reserve_result = rd.set_nx(idempotency_key, record, ttl=idempotency_config.get("processing_ttl"))
+    if not reserve_result.get("success"):
+        # Redis is unavailable, process the call rather than dropping it
+        return {"success": False, "message": reserve_result.get("message"), "result": None}
+
+    if reserve_result.get("result"):
+        return {"success": True, "message": "Idempotency key reserved.", "result": None}
+
+    existing_result = rd.get(idempotency_key)
+    existing_record = existing_result.get("result") if existing_result.get("success") else None
+    if not isinstance(existing_record, dict):
+        # The first request finished and its record expired between the two calls
+        existing_record = {"status": "processing"}
+
+    module_logger.info(f"<<Idempotency>> Duplicate call for {idempotency_key}, status {existing_record.get('status')}")
+    return {"success": True, "message": "Duplicate call.", "result": existing_record}
+
+
+def complete_idempotency_key(rd, global_config_data, idempotency_key, response_data, status_code):
+    """
+    Store the response of a processed call so duplicates receive the same response.
+
+    Args:
+        rd (RedisCache): An instance of the RedisCache class.
+        global_config_data (dict): Global configuration data.
+        idempotency_key (str): The Redis key from get_idempotency_key.
+        response_data (dict): The response returned for the call.
+        status_code (int): The HTTP status code returned for the call.
+
+    Returns:
+        bool: True if successful, False otherwise.
+    """
+    idempotency_config = get_idempotency_config(global_config_data)
+    record = {"status": "complete", "completed_at": time.time(), "status_code": status_code,
+              "response": response_data}
+    result = rd.set(idempotency_key, record, ttl=idempotency_config.get("ttl"))
+    return result.get("success", False)
+
+
+def release_idempotency_key(rd, idempotency_key):
+    """
+    Release a reserved idempotency key so a retry of a failed call is processed again.
+
+    Args:
+        rd (RedisCache): An instance of the RedisCache class.
+        idempotency_key (str): The Redis key from get_idempotency_key.
+
+    Returns:
+        bool: True if successful, False otherwise.
+    """
+    result = rd.delete(idempotency_key)
+    return result.get("success", False)
@@ -0,0 +1,122 @@
+import logging
+from collections import deque
+
+from lib.alert_processing_handler import normalize
+
+module_logger = logging.getLogger('icad_alerting_api.keyword_matcher')
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over the normalized keywords of an alert filter.
+
+    Enabled keywords are normalized once when the filter is loaded and a transcript is matched against all of them in
+    a single pass. Matching is plain substring matching like `normalized_keyword in normalized_text`, so a keyword
+    that normalizes to an empty string always matches.
+
+    Attributes:
+        keywords (list): (keyword dict, pattern id) for each enabled keyword in filter order.
+        goto (list): Transitions of each automaton state.
+        fail (list): Failure link of each automaton state.
+        output (list): Pattern ids ending at each automaton state, including those reached by failure links.
+    """
+
+    def __init__(self, filter_keywords):
+        """
+        Build the automaton.
+
+        Args:
+            filter_keywords (list): The keywords of the alert filter.
+        """
+        self.keywords = []
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+
+        pattern_ids = {}
+        for keyword in filter_keywords or []:
+            if not keyword.get('enabled'):
+                continue
+
+            normalized_keyword = normalize(keyword['keyword'])
+            if not normalized_keyword:
+                self.keywords.append((keyword, None))
+                continue
+
+            if normalized_keyword not in pattern_ids:
+                pattern_ids[normalized_keyword] = len(pattern_ids)
+                self._add_pattern(normalized_keyword, pattern_ids[normalized_keyword])
+            self.keywords.append((keyword, pattern_ids[normalized_keyword]))
+
+        self._build_failure_links()
+
+    def _add_pattern(self, pattern, pattern_id):
+        state = 0
+        for character in pattern:
+            next_state = self.goto[state].get(character)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][character] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            state = next_state
+        self.output[state].append(pattern_id)
+
+    def _build_failure_links(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for character, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fail_state = self.fail[state]
+                while fail_state and character not in self.goto[fail_state]:
+                    fail_state = self.fail[fail_state]
+                self.fail[next_state] = self.goto[fail_state].get(character, 0)
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def search(self, normalized_text):
+        """
+        Find every keyword pattern contained in a normalized transcript.
+
+        Args:
+            normalized_text (str): The normalized transcript.
+
+        Returns:
+            set: The ids of the patterns found.
+        """
+        found = set()
+        visited_states = set()
+        state = 0
+        for character in normalized_text:
+            while state and character not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(character, 0)
+            if state and state not in visited_states:
+                visited_states.add(state)
+                found.update(self.output[state])
+        return found
+
+    def match(self, normalized_text):
+        """
+        Match a normalized transcript against the filter keywords.
+
+        Args:
+            normalized_text (str): The normalized transcript.
+
+        Returns:
+            tuple: (matched include keyword dicts in filter order, True if an excluded keyword was found)
+        """
+        found = self.search(normalized_text)
+
+        matched_keywords = []
+        exclusion_detected = False
+        for keyword, pattern_id in self.keywords:
+            if pattern_id is not None and pattern_id not in found:
+                continue
+            if keyword['is_excluded']:
+                exclusion_detected = True
+            else:
+                matched_keywords.append(keyword)
+
+        return matched_keywords, exclusion_detected
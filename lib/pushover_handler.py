@@ -1,13 +1,13 @@
 import json
 from datetime import datetime, timezone
 
-import requests
 from requests.exceptions import RequestException, HTTPError, Timeout
 import logging
 
 
 from lib.config_handler import decrypt_password
-from lib.helper_handler import generate_mapped_content
+from lib.helper_handler import generate_mapped_content, ACTION_SKIPPED
+from lib.http_session_handler import get_http_session, get_http_timeout
 
 module_logger = logging.getLogger('icad_alerting_api.pushover')
 
@@ -20,12 +20,13 @@ class PushoverSender:
         detector_data (dict): A dictionary containing detector data.
     """
 
-    def __init__(self, global_config_data, system_config_data=None, trigger_config_data=None):
+    def __init__(self, global_config_data, system_config_data=None, trigger_config_data=None, render_context=None):
         """Initializes the PushoverSender with configuration and detector data.
 
         Args:
             config_data (dict): A dictionary containing configuration data.
             detector_data (dict): A dictionary containing detector data.
+            render_context (RenderContext, optional): Render context shared with the other senders of the alert.
 
         Raises:
             ValueError: If config_data or detector_data are not dictionaries or are missing expected keys.
@@ -33,6 +34,7 @@ class PushoverSender:
         self.global_config_data = global_config_data
         self.system_config_data = system_config_data
         self.trigger_config_data = trigger_config_data
+        self.render_context = render_context
 
     def send_text_alert_push(self, alert_data, call_data):
         """Sends a push notification with the given parameters.
@@ -42,7 +44,7 @@ class PushoverSender:
             call_data (dict): A dictionary containing metadata from processed call.
 
         Returns:
-            True if successful or False if failed
+            True if successful, ACTION_SKIPPED if the tokens, subject or body aren't set or False if failed
         """
 
         test_mode = self.global_config_data.get("general", {}).get("test_mode", True)
@@ -56,12 +58,8 @@ class PushoverSender:
                 pushover_subject = self.system_config_data.get("pushover_subject")
                 pushover_body = self.system_config_data.get("pushover_body")
                 pushover_sound = self.system_config_data.get("sound")
-                pushover_group_token = decrypt_password(self.system_config_data.get("pushover_group_token"),
-                                                        self.global_config_data)
-                pushover_app_token = decrypt_password(self.system_config_data.get("pushover_app_token"),
-                                                      self.global_config_data)
-
-
+                pushover_group_token = self.system_config_data.get("pushover_group_token")
+                pushover_app_token = self.system_config_data.get("pushover_app_token")
 
                 stream_url = self.system_config_data.get("stream_url") or ""
 
@@ -84,17 +82,8 @@ class PushoverSender:
                 else:
                     pushover_sound = self.trigger_config_data.get("sound")
 
-
-                pushover_group_token = decrypt_password(self.trigger_config_data.get("pushover_group_token"),
-                                                        self.global_config_data)
-                pushover_app_token = decrypt_password(self.trigger_config_data.get("pushover_app_token"),
-                                                      self.global_config_data)
-
-                if not pushover_subject or not pushover_body:
-                    module_logger.error("<<Failed>> sending <<Pushover>> missing pushover subject or pushover body.")
-
-                if not pushover_group_token or not pushover_app_token:
-                    module_logger.error("<<Failed>> sending <<Pushover>> missing pushover app or group token.")
+                pushover_group_token = self.trigger_config_data.get("pushover_group_token")
+                pushover_app_token = self.trigger_config_data.get("pushover_app_token")
 
                 stream_url = self.trigger_config_data.get("stream_url") or ""
                 if not stream_url:
@@ -106,20 +95,33 @@ class PushoverSender:
                 module_logger.error("<<Failed>> sending <<Pushover>> no system or trigger config data.")
                 return False
 
+            # Retrying can't help until the configuration is completed
+            if not pushover_app_token or not pushover_group_token:
+                module_logger.warning(f"Skipping <<Pushover>> for {group_name} missing pushover app or group token.")
+                return ACTION_SKIPPED
+
+            if not pushover_subject or not pushover_body:
+                module_logger.warning(
+                    f"Skipping <<Pushover>> for {group_name} missing pushover subject or pushover body.")
+                return ACTION_SKIPPED
+
+            pushover_group_token = decrypt_password(pushover_group_token, self.global_config_data)
+            pushover_app_token = decrypt_password(pushover_app_token, self.global_config_data)
 
             # Use the mapping to format the strings
-            pushover_subject = generate_mapped_content(pushover_subject, alert_data, call_data, stream_url, test_mode)
-            pushover_body = generate_mapped_content(pushover_body, alert_data, call_data, stream_url, test_mode)
-
-            if pushover_app_token and pushover_group_token:
-                request_result = self._send_request(pushover_app_token, pushover_group_token, pushover_subject,
-                                                    pushover_body,
-                                                    pushover_sound, group_name)
-                return request_result
-            else:
-                module_logger.error(f"<<Pushover>> <<Failed>> Missing Pushover APP or Group Token for {group_name}")
+            pushover_subject = generate_mapped_content(pushover_subject, alert_data, call_data, stream_url, test_mode,
+                                                  self.render_context)
+            pushover_body = generate_mapped_content(pushover_body, alert_data, call_data, stream_url, test_mode,
+                                                  self.render_context)
+
+            if pushover_subject is None or pushover_body is None:
+                module_logger.error(f"<<Pushover>> <<Failed>> Unable to render Pushover subject or body for {group_name}")
                 return False
 
+            request_result = self._send_request(pushover_app_token, pushover_group_token, pushover_subject,
+                                                pushover_body,
+                                                pushover_sound, group_name)
+            return request_result
 
         except Exception as e:
             module_logger.error(f"Pushover Send Failure:\n {repr(e)}")
@@ -154,11 +156,12 @@ class PushoverSender:
                         f"<<Pushover>> <<Failed>> Unexpected error occurred while opening the image file {image_path}: {e}")
                     return False
 
-            response = requests.post(url,
-                                     data=post_data,
-                                     files=files,
-                                     timeout=10
-                                     )
+            response = get_http_session(self.global_config_data, "pushover").post(
+                url,
+                data=post_data,
+                files=files,
+                timeout=get_http_timeout(self.global_config_data, "pushover")
+            )
 
             response.raise_for_status()  # Raise an exception for HTTP errors
 
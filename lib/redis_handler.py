@@ -40,6 +40,7 @@ class RedisCache:
             }
         )
         self.client = redis.Redis(connection_pool=self.connection_pool)
+        self.scripts = {}
 
     def stop(self):
         self.client.close()
@@ -124,6 +125,28 @@ class RedisCache:
             module_logger.error(error_msg)
             return {'success': False, 'message': error_msg}
 
+    def set_nx(self, key, value, ttl=None):
+        """
+        Set a key-value pair in Redis only if the key doesn't already exist.
+
+        Args:
+            key (str): The key to set.
+            value (str): The value for the key.
+            ttl (int, optional): Expiration time in seconds.
+
+        Returns:
+            dict: A dictionary containing 'success' (bool), 'message' (str), and 'result' (bool, True if the key was set).
+        """
+        try:
+            serialized_value = self.serialize_for_redis(value)
+            was_set = self.client.set(key, serialized_value, nx=True, ex=ttl if ttl else None)
+            module_logger.debug(f"Redis SetNX Key <<success>>: {key} set: {bool(was_set)}")
+            return {'success': True, 'message': 'success', 'result': bool(was_set)}
+        except redis.RedisError as error:
+            error_msg = f"Redis SetNX Key <<failed>>: {key}, error: {error}"
+            module_logger.error(error_msg)
+            return {'success': False, 'message': error_msg}
+
     def incrby(self, key, increment=1):
         """
         Increment (or decrement) the value of a Redis key.
@@ -565,6 +588,107 @@ class RedisCache:
             module_logger.error(error_msg)
             return {'success': False, 'message': error_msg}
 
+    def zrem(self, set_name, *members):
+        """
+        Remove members from a Redis sorted set.
+
+        Args:
+            set_name (str): The name of the sorted set.
+            *members (any): One or more members to remove.
+
+        Returns:
+            dict: A dictionary containing 'success' (bool), 'message' (str), and 'result' (int number removed).
+        """
+        try:
+            serialized_members = [self.serialize_for_redis(member) for member in members]
+            removed_count = self.client.zrem(set_name, *serialized_members)
+            module_logger.debug(f"Redis ZRem from Sorted Set {set_name} <<success>>: Removed {removed_count} members")
+            return {'success': True, 'message': 'success', 'result': removed_count}
+        except redis.RedisError as error:
+            error_msg = f"Redis ZRem from Sorted Set {set_name} <<failed>>, error: {error}"
+            module_logger.error(error_msg)
+            return {'success': False, 'message': error_msg}
+
+    def sadd(self, set_name, *members):
+        """
+        Add members to a Redis set.
+
+        Args:
+            set_name (str): The name of the set.
+            *members (any): One or more members to add.
+
+        Returns:
+            dict: A dictionary containing 'success' (bool), 'message' (str), and 'result' (int number added).
+        """
+        try:
+            serialized_members = [self.serialize_for_redis(member) for member in members]
+            added_count = self.client.sadd(set_name, *serialized_members)
+            module_logger.debug(f"Redis SAdd to Set {set_name} <<success>>: Added {added_count} members")
+            return {'success': True, 'message': 'success', 'result': added_count}
+        except redis.RedisError as error:
+            error_msg = f"Redis SAdd to Set {set_name} <<failed>>, error: {error}"
+            module_logger.error(error_msg)
+            return {'success': False, 'message': error_msg}
+
+    def srem(self, set_name, *members):
+        """
+        Remove members from a Redis set.
+
+        Args:
+            set_name (str): The name of the set.
+            *members (any): One or more members to remove.
+
+        Returns:
+            dict: A dictionary containing 'success' (bool), 'message' (str), and 'result' (int number removed).
+        """
+        try:
+            serialized_members = [self.serialize_for_redis(member) for member in members]
+            removed_count = self.client.srem(set_name, *serialized_members)
+            module_logger.debug(f"Redis SRem from Set {set_name} <<success>>: Removed {removed_count} members")
+            return {'success': True, 'message': 'success', 'result': removed_count}
+        except redis.RedisError as error:
+            error_msg = f"Redis SRem from Set {set_name} <<failed>>, error: {error}"
+            module_logger.error(error_msg)
+            return {'success': False, 'message': error_msg}
+
+    def smembers(self, set_name):
+        """
+        Get every member of a Redis set.
+
+        Args:
+            set_name (str): The name of the set.
+
+        Returns:
+            dict: A dictionary containing 'success' (bool), 'message' (str), and 'result' (list of members).
+        """
+        try:
+            members = self.client.smembers(set_name)
+            decoded_members = [self.deserialize_from_redis(member.decode("utf-8")) for member in members]
+            module_logger.debug(f"Redis SMembers of Set {set_name} <<success>>")
+            return {'success': True, 'message': 'success', 'result': decoded_members}
+        except redis.RedisError as error:
+            error_msg = f"Redis SMembers of Set {set_name} <<failed>>, error: {error}"
+            module_logger.error(error_msg)
+            return {'success': False, 'message': error_msg}
+
+    def llen(self, list_name):
+        """
+        Get the length of a Redis list.
+
+        Args:
+            list_name (str): The name of the list.
+
+        Returns:
+            dict: A dictionary containing 'success' (bool), 'message' (str), and 'result' (int).
+        """
+        try:
+            length_of_list = self.client.llen(list_name)
+            return {'success': True, 'message': 'success', 'result': length_of_list}
+        except redis.RedisError as error:
+            error_msg = f"Redis LLen on List {list_name} <<failed>>, error: {error}"
+            module_logger.error(error_msg)
+            return {'success': False, 'message': error_msg}
+
     def zinterstore(self, dest, keys, aggregate=None):
         """
                 Compute the intersection of multiple sorted sets.
@@ -586,6 +710,186 @@ class RedisCache:
             module_logger.error(error_msg)
             return {'success': False, 'message': error_msg}
 
+    def xadd(self, stream_name, fields, max_length=None):
+        """
+        Append an entry to a Redis stream.
+
+        Args:
+            stream_name (str): The name of the stream.
+            fields (dict): Mapping of field names to values for the entry.
+            max_length (int, optional): If provided, approximately trims the stream to this length.
+
+        Returns:
+            dict: A dictionary containing 'success' (bool), 'message' (str), and 'result' (str entry ID).
+        """
+        try:
+            serialized_fields = {k: self.serialize_for_redis(v) for k, v in fields.items()}
+            entry_id = self.client.xadd(stream_name, serialized_fields, maxlen=max_length,
+                                        approximate=True if max_length else False)
+            entry_id = entry_id.decode("utf-8") if isinstance(entry_id, bytes) else entry_id
+
+            module_logger.debug(f"Redis XAdd to Stream {stream_name} <<success>>: {entry_id}")
+            return {'success': True, 'message': 'success', 'result': entry_id}
+        except redis.RedisError as error:
+            error_msg = f"Redis XAdd to Stream {stream_name} <<failed>>, error: {error}"
+            module_logger.error(error_msg)
+            return {'success': False, 'message': error_msg}
+
+    def xgroup_create(self, stream_name, group_name, entry_id="0"):
+        """
+        Create a consumer group for a Redis stream, creating the stream if it doesn't exist.
+
+        Args:
+            stream_name (str): The name of the stream.
+            group_name (str): The name of the consumer group.
+            entry_id (str, optional): The last delivered entry ID for the group. Defaults to "0".
+
+        Returns:
+            dict: A dictionary containing 'success' (bool) and 'message' (str).
+        """
+        try:
+            self.client.xgroup_create(stream_name, group_name, id=entry_id, mkstream=True)
+            module_logger.debug(f"Redis XGroup Create {stream_name}/{group_name} <<success>>")
+            return {'success': True, 'message': 'success', 'result': 0}
+        except redis.ResponseError as error:
+            if "BUSYGROUP" in str(error):
+                return {'success': True, 'message': 'Consumer group already exists', 'result': 0}
+            error_msg = f"Redis XGroup Create {stream_name}/{group_name} <<failed>>, error: {error}"
+            module_logger.error(error_msg)
+            return {'success': False, 'message': error_msg}
+        except redis.RedisError as error:
+            error_msg = f"Redis XGroup Create {stream_name}/{group_name} <<failed>>, error: {error}"
+            module_logger.error(error_msg)
+            return {'success': False, 'message': error_msg}
+
+    def xreadgroup(self, stream_name, group_name, consumer_name, count=1, block=None, entry_id=">"):
+        """
+        Read entries from a Redis stream as a member of a consumer group.
+
+        Args:
+            stream_name (str): The name of the stream.
+            group_name (str): The name of the consumer group.
+            consumer_name (str): The name of this consumer.
+            count (int, optional): Maximum number of entries to return. Defaults to 1.
+            block (int, optional): Milliseconds to block waiting for entries. Defaults to None (don't block).
+            entry_id (str, optional): ">" for new entries or "0" for this consumer's pending entries.
+
+        Returns:
+            dict: A dictionary containing 'success' (bool), 'message' (str), and 'result' (list of (entry ID, dict)).
+        """
+        try:
+            response = self.client.xreadgroup(group_name, consumer_name, {stream_name: entry_id}, count=count,
+                                              block=block)
+            entries = []
+            for _, stream_entries in response or []:
+                entries.extend(self._decode_stream_entries(stream_entries))
+
+            return {'success': True, 'message': 'success', 'result': entries}
+        except redis.RedisError as error:
+            error_msg = f"Redis XReadGroup {stream_name}/{group_name} <<failed>>, error: {error}"
+            module_logger.error(error_msg)
+            return {'success': False, 'message': error_msg}
+
+    def xack(self, stream_name, group_name, *entry_ids):
+        """
+        Acknowledge one or more entries of a Redis stream for a consumer group.
+
+        Args:
+            stream_name (str): The name of the stream.
+            group_name (str): The name of the consumer group.
+            *entry_ids (str): The entry IDs to acknowledge.
+
+        Returns:
+            dict: A dictionary containing 'success' (bool), 'message' (str), and 'result' (int).
+        """
+        try:
+            acknowledged = self.client.xack(stream_name, group_name, *entry_ids)
+            module_logger.debug(f"Redis XAck {stream_name}/{group_name} <<success>>: {entry_ids}")
+            return {'success': True, 'message': 'success', 'result': acknowledged}
+        except redis.RedisError as error:
+            error_msg = f"Redis XAck {stream_name}/{group_name} <<failed>>, error: {error}"
+            module_logger.error(error_msg)
+            return {'success': False, 'message': error_msg}
+
+    def xautoclaim(self, stream_name, group_name, consumer_name, min_idle_time, start_id="0-0", count=None):
+        """
+        Claim pending entries of a Redis stream that have been idle longer than min_idle_time.
+
+        Args:
+            stream_name (str): The name of the stream.
+            group_name (str): The name of the consumer group.
+            consumer_name (str): The consumer that will own the claimed entries.
+            min_idle_time (int): Minimum idle time in milliseconds for an entry to be claimed.
+            start_id (str, optional): The entry ID to start scanning from. Defaults to "0-0".
+            count (int, optional): Maximum number of entries to claim.
+
+        Returns:
+            dict: A dictionary containing 'success' (bool), 'message' (str), 'cursor' (str) and 'result'
+            (list of (entry ID, dict)).
+        """
+        try:
+            response = self.client.xautoclaim(stream_name, group_name, consumer_name, min_idle_time,
+                                              start_id=start_id, count=count)
+            next_id = response[0].decode("utf-8") if isinstance(response[0], bytes) else response[0]
+            entries = self._decode_stream_entries(response[1])
+
+            if entries:
+                module_logger.debug(f"Redis XAutoClaim {stream_name}/{group_name} <<success>>: {len(entries)} entries")
+            return {'success': True, 'cursor': next_id, 'message': 'success', 'result': entries}
+        except redis.RedisError as error:
+            error_msg = f"Redis XAutoClaim {stream_name}/{group_name} <<failed>>, error: {error}"
+            module_logger.error(error_msg)
+            return {'success': False, 'cursor': None, 'message': error_msg}
+
+    def _decode_stream_entries(self, stream_entries):
+        entries = []
+        for entry_id, fields in stream_entries:
+            # Entries that were deleted while pending are returned without fields
+            if fields is None:
+                fields = {}
+            entry_id = entry_id.decode("utf-8") if isinstance(entry_id, bytes) else entry_id
+            decoded_fields = {
+                (k.decode("utf-8") if isinstance(k, bytes) else k):
+                    self.deserialize_from_redis(v.decode("utf-8") if isinstance(v, bytes) else v)
+                for k, v in fields.items()}
+            entries.append((entry_id, decoded_fields))
+        return entries
+
+    def run_script(self, script, keys=None, args=None):
+        """
+        Run a Lua script with EVALSHA, loading it into Redis the first time it is used.
+
+        Args:
+            script (str): The Lua source of the script.
+            keys (list, optional): Key names passed to the script.
+            args (list, optional): Arguments passed to the script, serialized for Redis.
+
+        Returns:
+            dict: A dictionary containing 'success' (bool), 'message' (str), and 'result' (deserialized script result).
+        """
+        try:
+            registered_script = self.scripts.get(script)
+            if registered_script is None:
+                registered_script = self.client.register_script(script)
+                self.scripts[script] = registered_script
+
+            serialized_args = [self.serialize_for_redis(arg) for arg in args or []]
+            result = registered_script(keys=keys or [], args=serialized_args)
+
+            module_logger.debug(f"Redis Script {registered_script.sha} <<success>>")
+            return {'success': True, 'message': 'success', 'result': self._decode_script_result(result)}
+        except redis.RedisError as error:
+            error_msg = f"Redis Script <<failed>>, error: {error}"
+            module_logger.error(error_msg)
+            return {'success': False, 'message': error_msg}
+
+    def _decode_script_result(self, result):
+        if isinstance(result, list):
+            return [self._decode_script_result(item) for item in result]
+        if isinstance(result, bytes):
+            return self.deserialize_from_redis(result.decode("utf-8"))
+        return result
+
     def keys(self, pattern):
         """
                 Find all keys matching a given pattern.
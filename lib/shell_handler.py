@@ -1,5 +1,6 @@
 import logging
 import subprocess
+import threading
 
 module_logger = logging.getLogger("icad_alerting_api.shell_handler")
 
@@ -35,3 +36,100 @@ def run_command(command, timeout=None, env=None):
     except Exception as e:
         module_logger.error(f"An error occurred while running '{' '.join(command)}': {str(e)}")
         return False
+
+
+def run_command_stream(command, input_chunks=None, timeout=None, max_output_size=None, env=None):
+    """
+    Run a command feeding its stdin from an iterable of byte chunks and collecting its stdout in memory.
+
+    stdin is written and stderr drained from helper threads so a command that produces output before it has read all
+    of its input can't deadlock.
+
+    :param command: Command and arguments to run
+    :param input_chunks: Iterable of bytes written to stdin, stdin is closed once it is exhausted
+    :param timeout: Seconds before the command is killed
+    :param max_output_size: Maximum number of stdout bytes, the command is killed if it produces more
+    :param env: Environment of the command
+    :return: The stdout bytes, or None if the command failed
+    """
+    command_text = ' '.join(command)
+    try:
+        with subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                              env=env) as proc:
+            input_errors = []
+            stderr_lines = []
+
+            def write_input():
+                try:
+                    for chunk in input_chunks or ():
+                        if chunk:
+                            proc.stdin.write(chunk)
+                except BrokenPipeError:
+                    # The command exited early, its exit code tells what happened
+                    pass
+                except Exception as e:
+                    input_errors.append(e)
+                    proc.kill()
+                finally:
+                    try:
+                        proc.stdin.close()
+                    except BrokenPipeError:
+                        pass
+
+            def read_errors():
+                for line in proc.stderr:
+                    stderr_lines.append(line)
+
+            input_thread = threading.Thread(target=write_input, daemon=True)
+            error_thread = threading.Thread(target=read_errors, daemon=True)
+            input_thread.start()
+            error_thread.start()
+
+            timer = None
+            timed_out = threading.Event()
+            if timeout:
+                def kill_on_timeout():
+                    timed_out.set()
+                    proc.kill()
+
+                timer = threading.Timer(timeout, kill_on_timeout)
+                timer.start()
+
+            output = bytearray()
+            try:
+                while True:
+                    chunk = proc.stdout.read(65536)
+                    if not chunk:
+                        break
+                    output.extend(chunk)
+                    if max_output_size and len(output) > max_output_size:
+                        proc.kill()
+                        module_logger.error(f"Command '{command_text}' output exceeded {max_output_size} bytes.")
+                        return None
+                proc.wait()
+            finally:
+                if timer:
+                    timer.cancel()
+                input_thread.join()
+                error_thread.join()
+
+            for line in stderr_lines:
+                module_logger.debug(line.decode("utf-8", errors="replace").strip())
+
+            if timed_out.is_set():
+                module_logger.error(f"Command '{command_text}' timed out after {timeout} seconds.")
+                return None
+
+            if input_errors:
+                module_logger.error(f"Reading input for '{command_text}' failed: {input_errors[0]}")
+                return None
+
+            if proc.returncode != 0:
+                module_logger.warning(f"Command '{command_text}' exited with error code {proc.returncode}")
+                return None
+
+            return bytes(output)
+
+    except Exception as e:
+        module_logger.error(f"An error occurred while running '{command_text}': {str(e)}")
+        return None
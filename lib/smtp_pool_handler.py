@@ -0,0 +1,230 @@
+import logging
+import smtplib
+import ssl
+import threading
+import time
+
+module_logger = logging.getLogger('icad_alerting_api.smtp_pool')
+
+_smtp_pool = None
+_smtp_pool_lock = threading.Lock()
+
+
+def get_smtp_pool_config(global_config_data):
+    """
+    Get the SMTP connection pool configuration with defaults applied.
+
+    :param global_config_data: Dictionary containing global configuration data
+    :return: Dictionary containing the SMTP pool configuration
+    """
+    pool_config = {
+        "enabled": True,
+        "max_connections": 4,
+        "idle_timeout": 60,
+        "health_check_after": 10,
+        "timeout": 30
+    }
+    pool_config.update(global_config_data.get("smtp_pool", {}))
+    return pool_config
+
+
+def get_smtp_pool(global_config_data):
+    """
+    Get the shared SMTP connection pool, creating it the first time it is used.
+
+    :param global_config_data: Dictionary containing global configuration data
+    :return: SMTPConnectionPool, or None when pooling is disabled
+    """
+    global _smtp_pool
+    if not get_smtp_pool_config(global_config_data).get("enabled"):
+        return None
+
+    if _smtp_pool is None:
+        with _smtp_pool_lock:
+            if _smtp_pool is None:
+                _smtp_pool = SMTPConnectionPool(global_config_data)
+    return _smtp_pool
+
+
+def open_smtp_connection(hostname, port, username, password, timeout=30):
+    """
+    Open and authenticate an SMTP connection, using SSL on port 465 and STARTTLS on port 587.
+
+    :param hostname: Hostname of the SMTP server
+    :param port: Port number of the SMTP server
+    :param username: Username for the SMTP server
+    :param password: Password for the SMTP server
+    :param timeout: Socket timeout in seconds
+    :return: Logged in smtplib.SMTP connection
+    """
+    if port == 465:
+        smtp_server = smtplib.SMTP_SSL(hostname, port, context=ssl.create_default_context(), timeout=timeout)
+    elif port == 587:
+        smtp_server = smtplib.SMTP(hostname, port, timeout=timeout)
+        smtp_server.ehlo()
+        smtp_server.starttls(context=ssl.create_default_context())
+    else:
+        raise ValueError(f'Unsupported security protocol: {port}')
+
+    try:
+        smtp_server.login(username, password)
+    except Exception:
+        close_smtp_connection(smtp_server)
+        raise
+    return smtp_server
+
+
+def close_smtp_connection(smtp_server):
+    try:
+        smtp_server.quit()
+    except Exception:
+        try:
+            smtp_server.close()
+        except Exception:
+            pass
+
+
+class SMTPConnectionPool:
+    """
+    Pool of authenticated SMTP connections keyed by (hostname, port, username).
+
+    A connection is checked out for each message and returned afterwards so the many emails of a multi-trigger call
+    share the same TLS session and login. Connections idle for longer than health_check_after are checked with NOOP
+    before reuse, connections idle for longer than idle_timeout are closed. A message that fails because the server
+    dropped the connection is sent again once on a new connection.
+
+    Attributes:
+        pool_config (dict): The SMTP pool configuration.
+        idle (dict): Idle (connection, last used time) lists for each server key.
+        open_counts (dict): Number of open connections for each server key.
+    """
+
+    def __init__(self, global_config_data):
+        self.pool_config = get_smtp_pool_config(global_config_data)
+        self.idle = {}
+        self.open_counts = {}
+        self.condition = threading.Condition()
+
+    def send_message(self, hostname, port, username, password, message):
+        """
+        Send a message on a pooled connection.
+
+        Args:
+            hostname (str): Hostname of the SMTP server.
+            port (int): Port number of the SMTP server.
+            username (str): Username for the SMTP server.
+            password (str): Password for the SMTP server.
+            message (email.message.Message): The message to send.
+
+        Returns:
+            dict: Recipients refused by the server, as returned by smtplib.
+        """
+        key = (hostname, port, username)
+        for attempt in range(2):
+            smtp_server, reused = self._acquire(key, password)
+            try:
+                refused = smtp_server.send_message(message)
+            except smtplib.SMTPServerDisconnected:
+                self._discard(key, smtp_server)
+                if reused and attempt == 0:
+                    module_logger.info(f"<<SMTP>> <<Pool>> Connection to {hostname}:{port} dropped, reconnecting.")
+                    continue
+                raise
+            except smtplib.SMTPResponseException as e:
+                # The session is still usable after the server rejects a message, unless it's closing it
+                if e.smtp_code == 421:
+                    self._discard(key, smtp_server)
+                else:
+                    self._release(key, smtp_server)
+                raise
+            except Exception:
+                self._discard(key, smtp_server)
+                raise
+
+            self._release(key, smtp_server)
+            return refused
+
+    def _acquire(self, key, password):
+        expired = []
+        with self.condition:
+            while True:
+                expired.extend(self._evict_idle())
+
+                idle_connections = self.idle.get(key)
+                if idle_connections:
+                    smtp_server, last_used = idle_connections.pop()
+                    break
+
+                if self.open_counts.get(key, 0) < self.pool_config.get("max_connections", 4):
+                    self.open_counts[key] = self.open_counts.get(key, 0) + 1
+                    smtp_server = None
+                    break
+
+                self.condition.wait()
+
+        for expired_server in expired:
+            close_smtp_connection(expired_server)
+
+        if smtp_server is not None:
+            if time.monotonic() - last_used < self.pool_config.get("health_check_after", 10) or \
+                    self._is_healthy(smtp_server):
+                return smtp_server, True
+            # The slot of the dead connection is kept for its replacement
+            close_smtp_connection(smtp_server)
+
+        try:
+            smtp_server = open_smtp_connection(key[0], key[1], key[2], password, self.pool_config.get("timeout", 30))
+        except Exception:
+            with self.condition:
+                self.open_counts[key] -= 1
+                self.condition.notify()
+            raise
+
+        module_logger.debug(f"<<SMTP>> <<Pool>> Opened connection to {key[0]}:{key[1]} for {key[2]}")
+        return smtp_server, False
+
+    @staticmethod
+    def _is_healthy(smtp_server):
+        try:
+            return smtp_server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def _release(self, key, smtp_server):
+        with self.condition:
+            self.idle.setdefault(key, []).append((smtp_server, time.monotonic()))
+            self.condition.notify()
+
+    def _discard(self, key, smtp_server):
+        close_smtp_connection(smtp_server)
+        with self.condition:
+            self.open_counts[key] -= 1
+            self.condition.notify()
+
+    def _evict_idle(self):
+        # Called with the condition held, the caller closes the returned connections once it's released
+        expired = []
+        expire_before = time.monotonic() - self.pool_config.get("idle_timeout", 60)
+        for key, idle_connections in self.idle.items():
+            while idle_connections and idle_connections[0][1] < expire_before:
+                smtp_server, _ = idle_connections.pop(0)
+                self.open_counts[key] -= 1
+                expired.append(smtp_server)
+        if expired:
+            self.condition.notify_all()
+        return expired
+
+    def close(self):
+        """
+        Close every idle connection.
+        """
+        with self.condition:
+            idle = self.idle
+            self.idle = {}
+            for key, idle_connections in idle.items():
+                self.open_counts[key] -= len(idle_connections)
+            self.condition.notify_all()
+
+        for idle_connections in idle.values():
+            for smtp_server, _ in idle_connections:
+                close_smtp_connection(smtp_server)
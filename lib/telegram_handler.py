@@ -4,20 +4,28 @@ import logging
 
 import requests
 
-from lib.audio_file_handler import convert_wav_opus, download_wav_to_temp
+from lib.audio_cache_handler import AUDIO_ENCODINGS, get_audio_cache, get_audio_cache_config
+from lib.audio_file_handler import stream_convert_audio, convert_audio, download_wav_to_temp, get_audio_source_url, \
+    get_audio_extension
 from lib.config_handler import decrypt_password
-from lib.helper_handler import generate_mapped_content
+from lib.helper_handler import generate_mapped_content, ACTION_SKIPPED
+from lib.http_session_handler import get_http_session, get_http_timeout
+from lib.transcode_pool_handler import get_transcode_pool, estimate_clip_seconds
 
 module_logger = logging.getLogger('icad_alerting_api.telegram')
 
+# Telegram bots can upload files up to 50 MB
+TELEGRAM_MAX_VOICE_SIZE = 50 * 1024 * 1024
+
 
 class TelegramAPI:
 
-    def __init__(self, global_config_data, system_config_data, trigger_config_data=None):
+    def __init__(self, global_config_data, system_config_data, trigger_config_data=None, render_context=None):
         self.base_url = 'https://api.telegram.org/bot'
         self.global_config_data = global_config_data
         self.system_config_data = system_config_data
         self.trigger_config_data = trigger_config_data
+        self.render_context = render_context
         self.test_mode = self.global_config_data.get("general", {}).get("test_mode", True)
 
         self.bot_token = decrypt_password(self.system_config_data.get("telegram_bot_token", ""),
@@ -27,7 +35,8 @@ class TelegramAPI:
     def _send_request(self, method, payload, files=None):
         url = f'{self.base_url}{self.bot_token}/{method}'
         try:
-            resp = requests.post(url, data=payload, files=files)
+            resp = get_http_session(self.global_config_data, "telegram").post(
+                url, data=payload, files=files, timeout=get_http_timeout(self.global_config_data, "telegram"))
             resp.raise_for_status()
             module_logger.info("Successfully posted to telegram")
             return True
@@ -66,10 +75,10 @@ class TelegramAPI:
         if not self.bot_token or not self.channel:
             module_logger.error(f"<<Telegram>> <<Audio>> <<Post>> Bot token and channel ID must be provided,")
 
-        audio_wav_url = call_data.get("audio_wav_url", "")
-        if not audio_wav_url:
+        audio_url = get_audio_source_url(call_data)
+        if not audio_url:
             module_logger.error(f"<<Telegram>> <<Audio>> <<Post>> Audio file not in call data.")
-            return False
+            return ACTION_SKIPPED
 
         trigger_list = []
         for trigger in alert_data:
@@ -78,60 +87,104 @@ class TelegramAPI:
 
         if len(trigger_list) < 1:
             module_logger.warning("Not Posting to <<Telegram>> no triggers enabled for Telegram.")
-            return False
+            return ACTION_SKIPPED
+
+        audio_cache = get_audio_cache(self.global_config_data)
+        if audio_cache:
+            try:
+                # The cached OGG is shared with other posts of the same recording and isn't removed here
+                with audio_cache.artifact(audio_url, "opus", estimate_clip_seconds(call_data)) as opus_file:
+                    return self._post_voice(opus_file, alert_data, call_data)
+            except Exception as e:
+                module_logger.error(f"<<Telegram>> <<Audio>> <<Post>> failed: unable to get OGG file. {e}")
+                return False
 
-        opus_file = self._convert_to_opus(audio_wav_url)
-        if not opus_file:
+        # Without the cache the OGG is converted in memory straight from the download
+        opus_audio = self._convert_to_opus(audio_url, estimate_clip_seconds(call_data))
+        if not opus_audio:
             module_logger.error("<<Telegram>> <<Audio>> <<Post>> failed: no OGG file converted.")
             return False
 
+        return self._post_voice(opus_audio, alert_data, call_data)
+
+    def _post_voice(self, opus_audio, alert_data, call_data):
+        """
+        Post a voice message.
+
+        :param opus_audio: Path of the OGG file, or the OGG audio bytes
+        :return: True if the post succeeded, False otherwise
+        """
         try:
 
             post_body = self.generate_post_body(alert_data, call_data)
             if not post_body:
                 return False
 
-            with open(opus_file, 'rb') as audio_file:
-                payload = {
-                    'chat_id': self.channel,
-                    "caption": post_body
-                }
-                files = {'voice': audio_file.read()}
-                result = self._send_request('sendVoice', payload, files)
-                if result:
-                    module_logger.info(f"<<Telegram>> <<Audio>> <<Post>> Successful.")
-
-                return result
+            payload = {
+                'chat_id': self.channel,
+                "caption": post_body
+            }
+
+            if isinstance(opus_audio, bytes):
+                result = self._send_request('sendVoice', payload, {'voice': opus_audio})
+            else:
+                with open(opus_audio, 'rb') as audio_file:
+                    result = self._send_request('sendVoice', payload, {'voice': audio_file})
+
+            if result:
+                module_logger.info(f"<<Telegram>> <<Audio>> <<Post>> Successful.")
+
+            return result
         except IOError as e:
             module_logger.error(f"<<Telegram>> <<Audio>> <<Post>> Failed to open or read the OGG file: {e}")
             return False
-        finally:
-            if os.path.exists(opus_file):
-                os.remove(opus_file)
 
     def generate_post_body(self, alert_data, call_data):
         try:
             post_body_template = "{timestamp}\n{trigger_list}\n{transcript}\niCAD Dispatch"
 
-            post_body = generate_mapped_content(post_body_template, alert_data, call_data, self.system_config_data.get("stream_url", ""), self.test_mode)
+            post_body = generate_mapped_content(post_body_template, alert_data, call_data, self.system_config_data.get("stream_url", ""), self.test_mode, self.render_context)
             return post_body
         except Exception as e:
             module_logger.error(f"<<Telegram>> <<Post>> failed Unable to create telegram post body. {e}")
             return None
 
-    def _convert_to_opus(self, audio_wav_url):
+    def _convert_to_opus(self, audio_url, priority):
         try:
-            wav_temp_file = download_wav_to_temp(audio_wav_url)
-            if not wav_temp_file:
-                return None
-
-            opus_result = convert_wav_opus(wav_temp_file)
-            os.remove(wav_temp_file)
-            if opus_result:
-                return opus_result
+            extension, codec_args = AUDIO_ENCODINGS["opus"]
+            cache_config = get_audio_cache_config(self.global_config_data)
+            if get_audio_extension(audio_url) == "m4a":
+                # The M4A index can be at the end of the file, ffmpeg can't read it from a pipe
+                convert_function = self._convert_file_to_opus
+            else:
+                convert_function = stream_convert_audio
+            opus_audio = get_transcode_pool(self.global_config_data).submit(
+                convert_function, audio_url, codec_args, extension, self.global_config_data,
+                timeout=cache_config.get("transcode_timeout", 600), max_output_size=TELEGRAM_MAX_VOICE_SIZE,
+                priority=priority).result()
+            if opus_audio:
+                return opus_audio
             else:
                 module_logger.error("<<Telegram>> <<Audio>> <<Post>> Conversion to OPUS failed.")
                 return None
         except Exception as e:
             module_logger.error(f"<<Telegram>> <<Audio>> <<Post>> Unexpected error during conversion: {e}")
             return None
+
+    @staticmethod
+    def _convert_file_to_opus(audio_url, codec_args, extension, global_config_data, timeout=600,
+                              max_output_size=None):
+        source_file = download_wav_to_temp(audio_url, global_config_data)
+        opus_file = f"{os.path.splitext(source_file)[0]}.{extension}"
+        try:
+            if not convert_audio(source_file, opus_file, codec_args, timeout=timeout):
+                return None
+            if max_output_size and os.path.getsize(opus_file) > max_output_size:
+                module_logger.error(f"<<Telegram>> <<Audio>> <<Post>> OGG file is over {max_output_size} bytes.")
+                return None
+            with open(opus_file, 'rb') as audio_file:
+                return audio_file.read()
+        finally:
+            for file_path in (source_file, opus_file):
+                if os.path.exists(file_path):
+                    os.remove(file_path)
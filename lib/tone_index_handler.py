@@ -0,0 +1,141 @@
+import logging
+from bisect import bisect_left
+
+from lib.alert_trigger_handler import TRIGGER_TWO_TONE, TRIGGER_LONG_TONE, TRIGGER_HI_LOW_TONE
+
+module_logger = logging.getLogger('icad_alerting_api.tone_index')
+
+TONE_CONDITIONS = TRIGGER_TWO_TONE | TRIGGER_LONG_TONE | TRIGGER_HI_LOW_TONE
+
+
+class ToneIntervalIndex:
+    """
+    Static index of closed tone ranges answering which ranges contain a detected tone by bisection.
+
+    The range endpoints split the frequency axis into elementary segments, every endpoint and every open gap between
+    two endpoints stores the items whose range covers it. A lookup is a single bisect on the sorted endpoints.
+
+    Attributes:
+        points (list): Sorted unique range endpoints.
+        point_items (list): Items whose range contains each endpoint.
+        gap_items (list): Items whose range contains the open gap following each endpoint.
+    """
+
+    def __init__(self, ranges):
+        """
+        Build the index.
+
+        Args:
+            ranges (list): A list of (low, high, item) tuples.
+        """
+        self.points = sorted({point for low, high, _ in ranges for point in (low, high)})
+        self.point_items = [[] for _ in self.points]
+        self.gap_items = [[] for _ in self.points]
+
+        for low, high, item in ranges:
+            start = bisect_left(self.points, low)
+            end = bisect_left(self.points, high)
+            for position in range(start, end + 1):
+                self.point_items[position].append(item)
+            for position in range(start, end):
+                self.gap_items[position].append(item)
+
+    def search(self, tone):
+        """
+        Get the items whose range contains the tone.
+
+        Args:
+            tone (float): The detected tone frequency.
+
+        Returns:
+            list: The matching items.
+        """
+        position = bisect_left(self.points, tone)
+        if position < len(self.points) and self.points[position] == tone:
+            return self.point_items[position]
+        if 0 < position < len(self.points):
+            return self.gap_items[position - 1]
+        return []
+
+
+class TriggerIndex:
+    """
+    Per system index of enabled alert triggers used to find the triggers a call could match.
+
+    Two tone triggers are indexed on the A tone range, long tone triggers on the tone range and hi-low triggers on the
+    hi tone range. Triggers using a -1 wildcard for the indexed tone and triggers relying only on an alert filter are
+    always candidates. Candidates still go through the full condition checks.
+
+    Attributes:
+        two_tone_index (ToneIntervalIndex): Index of two tone A ranges.
+        long_tone_index (ToneIntervalIndex): Index of long tone ranges.
+        hi_low_tone_index (ToneIntervalIndex): Index of hi-low hi tone ranges.
+        always_candidates (set): Positions of triggers that are checked for every call.
+    """
+
+    def __init__(self, compiled_triggers):
+        """
+        Build the index from the compiled system alert triggers.
+
+        Args:
+            compiled_triggers (list): The CompiledTrigger list of a system.
+        """
+        two_tone_ranges = []
+        long_tone_ranges = []
+        hi_low_tone_ranges = []
+        self.always_candidates = set()
+
+        for trigger in compiled_triggers:
+            if not trigger.enabled:
+                continue
+
+            if trigger.conditions & TRIGGER_TWO_TONE:
+                self._add_range(two_tone_ranges, trigger, trigger.two_tone_a)
+
+            if trigger.conditions & TRIGGER_LONG_TONE:
+                self._add_range(long_tone_ranges, trigger, trigger.long_tone)
+
+            if trigger.conditions & TRIGGER_HI_LOW_TONE:
+                self._add_range(hi_low_tone_ranges, trigger, trigger.hi_low_tone_a)
+
+            if not trigger.conditions & TONE_CONDITIONS:
+                # Alert filter only triggers can't be located by tone
+                self.always_candidates.add(trigger.position)
+
+        self.two_tone_index = ToneIntervalIndex(two_tone_ranges)
+        self.long_tone_index = ToneIntervalIndex(long_tone_ranges)
+        self.hi_low_tone_index = ToneIntervalIndex(hi_low_tone_ranges)
+
+    def _add_range(self, ranges, trigger, tone_window):
+        if tone_window is None:
+            # A missing tone can never match
+            return
+        if tone_window[2]:
+            self.always_candidates.add(trigger.position)
+            return
+
+        ranges.append((tone_window[0], tone_window[1], trigger.position))
+
+    def get_candidates(self, call_data):
+        """
+        Get the triggers that could match the tones detected in a call.
+
+        Args:
+            call_data (dict): The call metadata.
+
+        Returns:
+            list: Sorted positions of the candidate triggers in the system alert triggers.
+        """
+        candidates = set(self.always_candidates)
+        tones = call_data.get("tones", {})
+
+        for tone in tones.get("two_tone", []):
+            candidates.update(self.two_tone_index.search(tone['detected'][0]))
+
+        for tone in tones.get("long_tone", []):
+            candidates.update(self.long_tone_index.search(tone["detected"]))
+
+        for tone in tones.get("hl_tone", []):
+            candidates.update(self.hi_low_tone_index.search(tone['detected'][0]))
+
+        return sorted(candidates)
@@ -0,0 +1,148 @@
+import logging
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+module_logger = logging.getLogger('icad_alerting_api.tone_matcher')
+
+
+def get_tone_matcher(compiled_triggers, engine="python"):
+    """
+    Build the tone matcher for a system.
+
+    Args:
+        compiled_triggers (list): The CompiledTrigger list of the system.
+        engine (str, optional): The matching engine, "python" or "numpy".
+
+    Returns:
+        NumpyToneMatcher or None: The matcher, or None when the pure Python checks should be used.
+    """
+    if engine != "numpy":
+        return None
+
+    if np is None:
+        module_logger.warning("<<Tone>> <<Matcher>> NumPy is not installed, using the Python tone matcher.")
+        return None
+
+    return NumpyToneMatcher(compiled_triggers)
+
+
+class NumpyToneMatcher:
+    """
+    Vectorized tone matcher packing the compiled trigger tone windows into NumPy arrays.
+
+    Every detected tone of a call is compared to every trigger in one broadcast producing a trigger by tone match
+    matrix for each tone type. The matches are the same as check_two_tone_triggers, check_long_tone_triggers and
+    check_hi_low_tone_triggers, including the -1 wildcard.
+
+    Attributes:
+        two_tone (dict): Packed two tone trigger arrays.
+        long_tone (dict): Packed long tone trigger arrays.
+        hi_low_tone (dict): Packed hi-low trigger arrays.
+    """
+
+    def __init__(self, compiled_triggers):
+        """
+        Pack the tone windows of the enabled triggers.
+
+        Args:
+            compiled_triggers (list): The CompiledTrigger list of a system.
+        """
+        two_tone_rows = []
+        long_tone_rows = []
+        hi_low_tone_rows = []
+
+        for trigger in compiled_triggers:
+            if not trigger.enabled:
+                continue
+
+            # Triggers with a missing or zero tone have no window and never match, same as the Python checks
+            if trigger.two_tone_a is not None:
+                two_tone_rows.append((trigger.position,) + trigger.two_tone_a + trigger.two_tone_b +
+                                     (trigger.two_tone_a_length, trigger.two_tone_b_length))
+
+            if trigger.long_tone is not None:
+                long_tone_rows.append((trigger.position,) + trigger.long_tone + (trigger.long_tone_length,))
+
+            if trigger.hi_low_tone_a is not None:
+                hi_low_tone_rows.append((trigger.position,) + trigger.hi_low_tone_a + trigger.hi_low_tone_b +
+                                        (trigger.hi_low_alternations,))
+
+        self.two_tone = self._pack(two_tone_rows, ("low_a", "high_a", "wild_a", "low_b", "high_b", "wild_b",
+                                                   "length_a", "length_b"))
+        self.long_tone = self._pack(long_tone_rows, ("low", "high", "wild", "length"))
+        self.hi_low_tone = self._pack(hi_low_tone_rows, ("low_a", "high_a", "wild_a", "low_b", "high_b", "wild_b",
+                                                         "alternations"))
+
+    @staticmethod
+    def _pack(rows, columns):
+        packed = {"positions": np.array([row[0] for row in rows], dtype=np.int64)}
+        for index, column in enumerate(columns, start=1):
+            dtype = bool if column.startswith("wild") else np.float64
+            # Column vectors so they broadcast against the detected tones
+            packed[column] = np.array([row[index] for row in rows], dtype=dtype).reshape(-1, 1)
+        return packed
+
+    def match(self, call_data):
+        """
+        Match the tones detected in a call against every trigger.
+
+        Args:
+            call_data (dict): The call metadata.
+
+        Returns:
+            dict: Trigger position mapped to a dict of "two_tone", "long_tone" and "hi_low_tone" matched tone lists.
+                  Triggers without a match are left out.
+        """
+        tones = call_data.get("tones", {})
+        matches = {}
+
+        two_tones = tones.get("two_tone", [])
+        if two_tones and len(self.two_tone["positions"]):
+            detected_a = np.array([tone['detected'][0] for tone in two_tones], dtype=np.float64)
+            detected_b = np.array([tone['detected'][1] for tone in two_tones], dtype=np.float64)
+            length_a = np.array([tone['tone_a_length'] for tone in two_tones], dtype=np.float64)
+            length_b = np.array([tone['tone_b_length'] for tone in two_tones], dtype=np.float64)
+            self._collect(matches, "two_tone", two_tones, self.two_tone["positions"],
+                          self._pair_matrix(self.two_tone, detected_a, detected_b,
+                                            (length_a >= self.two_tone["length_a"]) &
+                                            (length_b >= self.two_tone["length_b"])))
+
+        long_tones = tones.get("long_tone", [])
+        if long_tones and len(self.long_tone["positions"]):
+            detected = np.array([tone["detected"] for tone in long_tones], dtype=np.float64)
+            length = np.array([tone["long_tone_length"] for tone in long_tones], dtype=np.float64)
+            packed = self.long_tone
+            matrix = packed["wild"] | ((packed["low"] <= detected) & (detected <= packed["high"]) &
+                                       (length >= packed["length"]))
+            self._collect(matches, "long_tone", long_tones, packed["positions"], matrix)
+
+        hi_low_tones = tones.get("hl_tone", [])
+        if hi_low_tones and len(self.hi_low_tone["positions"]):
+            detected_hi = np.array([tone['detected'][0] for tone in hi_low_tones], dtype=np.float64)
+            detected_low = np.array([tone['detected'][1] for tone in hi_low_tones], dtype=np.float64)
+            alternations = np.array([tone['alternations'] for tone in hi_low_tones], dtype=np.float64)
+            self._collect(matches, "hi_low_tone", hi_low_tones, self.hi_low_tone["positions"],
+                          self._pair_matrix(self.hi_low_tone, detected_hi, detected_low,
+                                            alternations >= self.hi_low_tone["alternations"]))
+
+        return matches
+
+    @staticmethod
+    def _pair_matrix(packed, detected_a, detected_b, requirement_matrix):
+        both_wild = packed["wild_a"] & packed["wild_b"]
+        match_a = packed["wild_a"] | ((packed["low_a"] <= detected_a) & (detected_a <= packed["high_a"]))
+        match_b = packed["wild_b"] | ((packed["low_b"] <= detected_b) & (detected_b <= packed["high_b"]))
+        # When both tones are wildcards every detected tone matches regardless of length or alternations
+        return both_wild | (match_a & match_b & requirement_matrix)
+
+    @staticmethod
+    def _collect(matches, tone_type, detected_tones, positions, matrix):
+        # np.nonzero walks the matrix row by row so each trigger keeps the detected tone order
+        for row, column in zip(*np.nonzero(matrix)):
+            position = int(positions[row])
+            if position not in matches:
+                matches[position] = {"two_tone": [], "long_tone": [], "hi_low_tone": []}
+            matches[position][tone_type].append(detected_tones[column])
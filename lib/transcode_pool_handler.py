@@ -0,0 +1,195 @@
+import itertools
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+module_logger = logging.getLogger('icad_alerting_api.transcode_pool')
+
+# Priority of a clip whose length isn't known, in seconds of audio
+DEFAULT_CLIP_SECONDS = 60
+
+_transcode_pool = None
+_transcode_pool_lock = threading.Lock()
+
+
+class TranscodeQueueFull(Exception):
+    """Raised through the future of a job submitted while the transcoding queue is full."""
+
+
+def get_transcode_pool_config(global_config_data):
+    """
+    Get the transcoding pool configuration with defaults applied.
+
+    :param global_config_data: Dictionary containing global configuration data
+    :return: Dictionary containing the transcoding pool configuration
+    """
+    pool_config = {
+        "workers": None,
+        "max_queue": 100
+    }
+    pool_config.update(global_config_data.get("transcode_pool", {}))
+    if not pool_config.get("workers"):
+        # Leave a core for the web and alert workers
+        pool_config["workers"] = max(1, (os.cpu_count() or 2) - 1)
+    return pool_config
+
+
+def get_transcode_pool(global_config_data):
+    """
+    Get the shared transcoding pool, starting it the first time it is used.
+
+    :param global_config_data: Dictionary containing global configuration data
+    :return: TranscodePool
+    """
+    global _transcode_pool
+    if _transcode_pool is None:
+        with _transcode_pool_lock:
+            if _transcode_pool is None:
+                _transcode_pool = TranscodePool(global_config_data)
+                _transcode_pool.start()
+    return _transcode_pool
+
+
+def estimate_clip_seconds(call_data=None, file_path=None):
+    """
+    Estimate the length of a clip used as its transcoding priority.
+
+    :param call_data: Dictionary containing data about the call, its call_length is used when present
+    :param file_path: Path of the source audio, its size is used when the call length isn't known
+    :return: Estimated length of the clip in seconds
+    """
+    if call_data and call_data.get("call_length"):
+        return float(call_data.get("call_length"))
+
+    if file_path and os.path.exists(file_path):
+        # 8 kHz 16 bit mono WAV is 16000 bytes per second, compressed sources only rank earlier
+        return os.path.getsize(file_path) / 16000
+
+    return DEFAULT_CLIP_SECONDS
+
+
+class TranscodePool:
+    """
+    Fixed pool of threads each running one ffmpeg job at a time, so the number of concurrent ffmpeg processes is
+    bounded by the worker count whatever the number of alerts.
+
+    Jobs wait in a bounded priority queue, shorter clips first and in submission order for equal lengths. A job
+    submitted to a full queue fails right away with TranscodeQueueFull instead of blocking the caller.
+
+    Attributes:
+        worker_count (int): Number of jobs run at once.
+        max_queue (int): Maximum number of jobs waiting.
+        metrics (dict): Counters and timings reported by get_metrics.
+    """
+
+    def __init__(self, global_config_data):
+        pool_config = get_transcode_pool_config(global_config_data)
+        self.worker_count = int(pool_config.get("workers"))
+        self.max_queue = int(pool_config.get("max_queue", 100))
+        self.jobs = queue.PriorityQueue(maxsize=self.max_queue)
+        self.sequence = itertools.count()
+        self.threads = []
+        self.metrics_lock = threading.Lock()
+        self.metrics = {
+            "submitted": 0,
+            "rejected": 0,
+            "completed": 0,
+            "failed": 0,
+            "running": 0,
+            "encode_seconds_total": 0.0,
+            "encode_seconds_max": 0.0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0
+        }
+
+    def start(self):
+        for index in range(self.worker_count):
+            thread = threading.Thread(target=self._run, name=f"transcode-{index}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        module_logger.info(f"<<Transcode>> <<Pool>> Started {self.worker_count} transcoding workers.")
+
+    def submit(self, function, *args, priority=DEFAULT_CLIP_SECONDS, **kwargs):
+        """
+        Queue a transcoding job.
+
+        Args:
+            function (callable): The function running the transcode.
+            *args: Positional arguments of the function.
+            priority (float, optional): Estimated clip length in seconds, shorter clips run first.
+            **kwargs: Keyword arguments of the function.
+
+        Returns:
+            concurrent.futures.Future: Resolves to the return value of the function.
+        """
+        future = Future()
+        try:
+            self.jobs.put_nowait((priority, next(self.sequence), future, function, args, kwargs, time.monotonic()))
+        except queue.Full:
+            with self.metrics_lock:
+                self.metrics["rejected"] += 1
+            module_logger.error(f"<<Transcode>> <<Pool>> Queue full with {self.max_queue} jobs, rejecting job.")
+            future.set_exception(TranscodeQueueFull(f"Transcoding queue is full ({self.max_queue} jobs)."))
+            return future
+
+        with self.metrics_lock:
+            self.metrics["submitted"] += 1
+        return future
+
+    def _run(self):
+        while True:
+            _, _, future, function, args, kwargs, queued_at = self.jobs.get()
+            try:
+                if not future.set_running_or_notify_cancel():
+                    continue
+
+                wait_seconds = time.monotonic() - queued_at
+                with self.metrics_lock:
+                    self.metrics["running"] += 1
+                    self.metrics["wait_seconds_total"] += wait_seconds
+                    self.metrics["wait_seconds_max"] = max(self.metrics["wait_seconds_max"], wait_seconds)
+
+                start_time = time.monotonic()
+                try:
+                    result = function(*args, **kwargs)
+                except Exception as e:
+                    self._record(start_time, failed=True)
+                    future.set_exception(e)
+                else:
+                    # ffmpeg helpers report failure with a falsy result
+                    self._record(start_time, failed=not result)
+                    future.set_result(result)
+            finally:
+                self.jobs.task_done()
+
+    def _record(self, start_time, failed):
+        encode_seconds = time.monotonic() - start_time
+        with self.metrics_lock:
+            self.metrics["running"] -= 1
+            self.metrics["failed" if failed else "completed"] += 1
+            self.metrics["encode_seconds_total"] += encode_seconds
+            self.metrics["encode_seconds_max"] = max(self.metrics["encode_seconds_max"], encode_seconds)
+
+    def get_metrics(self):
+        """
+        Get the queue depth and timing metrics of the pool.
+
+        Returns:
+            dict: The pool metrics, times are in seconds.
+        """
+        with self.metrics_lock:
+            metrics = dict(self.metrics)
+
+        finished = metrics["completed"] + metrics["failed"]
+        started = finished + metrics["running"]
+        metrics.update({
+            "workers": self.worker_count,
+            "max_queue": self.max_queue,
+            "queue_depth": self.jobs.qsize(),
+            "encode_seconds_avg": metrics["encode_seconds_total"] / finished if finished else 0.0,
+            "wait_seconds_avg": metrics["wait_seconds_total"] / started if started else 0.0
+        })
+        return metrics
@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import threading
+
+from lib.http_session_handler import get_http_timeout
+
+module_logger = logging.getLogger('icad_alerting_api.webhook_engine')
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+_webhook_engine = None
+_webhook_engine_lock = threading.Lock()
+_aiohttp_missing_logged = False
+
+
+def get_webhook_engine_config(global_config_data):
+    """
+    Get the webhook engine configuration with defaults applied.
+
+    :param global_config_data: Dictionary containing global configuration data
+    :return: Dictionary containing the webhook engine configuration
+    """
+    engine_config = {
+        "engine": "requests",
+        "max_connections": 500,
+        "max_connections_per_host": 20
+    }
+    engine_config.update(global_config_data.get("webhook_engine", {}))
+    return engine_config
+
+
+def get_webhook_engine(global_config_data):
+    """
+    Get the shared asyncio webhook engine, starting it the first time it is used.
+
+    :param global_config_data: Dictionary containing global configuration data
+    :return: AsyncWebhookEngine, or None when webhooks should be sent with the requests session
+    """
+    global _webhook_engine, _aiohttp_missing_logged
+    if _webhook_engine is not None:
+        return _webhook_engine
+
+    if get_webhook_engine_config(global_config_data).get("engine") != "aiohttp":
+        return None
+
+    if aiohttp is None:
+        if not _aiohttp_missing_logged:
+            _aiohttp_missing_logged = True
+            module_logger.warning("<<Webhook>> <<Engine>> aiohttp is not installed, using the requests session.")
+        return None
+
+    with _webhook_engine_lock:
+        if _webhook_engine is None:
+            _webhook_engine = AsyncWebhookEngine(global_config_data)
+            _webhook_engine.start()
+    return _webhook_engine
+
+
+def stop_webhook_engine():
+    """
+    Stop the shared webhook engine if it was started.
+    """
+    global _webhook_engine
+    with _webhook_engine_lock:
+        if _webhook_engine is not None:
+            _webhook_engine.stop()
+            _webhook_engine = None
+
+
+class AsyncWebhookEngine:
+    """
+    Webhook sender running every POST on a single asyncio event loop in a background thread.
+
+    Webhooks are submitted from any thread and return a concurrent.futures.Future, so hundreds of POSTs can be in
+    flight without holding a thread each. The aiohttp connector bounds the open connections overall and per host, and
+    every request is given the connect and read timeouts of the webhook provider.
+
+    Attributes:
+        global_config_data (dict): Global configuration data.
+        engine_config (dict): The webhook engine configuration.
+        loop (asyncio.AbstractEventLoop): The event loop the requests run on.
+        session (aiohttp.ClientSession): The session shared by every request.
+    """
+
+    def __init__(self, global_config_data):
+        self.global_config_data = global_config_data
+        self.engine_config = get_webhook_engine_config(global_config_data)
+        self.loop = asyncio.new_event_loop()
+        self.session = None
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.loop.run_forever, name="webhook-engine", daemon=True)
+        self.thread.start()
+        # The session has to be created on the loop it is used from
+        self.session = asyncio.run_coroutine_threadsafe(self._create_session(), self.loop).result()
+        module_logger.info(f"<<Webhook>> <<Engine>> Started with {self.engine_config.get('max_connections')} "
+                           f"connections, {self.engine_config.get('max_connections_per_host')} per host.")
+
+    def stop(self, timeout=10):
+        if self.session is not None:
+            asyncio.run_coroutine_threadsafe(self.session.close(), self.loop).result(timeout)
+            self.session = None
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        if self.thread:
+            self.thread.join(timeout)
+            self.thread = None
+
+    async def _create_session(self):
+        connector = aiohttp.TCPConnector(limit=self.engine_config.get("max_connections", 500),
+                                         limit_per_host=self.engine_config.get("max_connections_per_host", 20))
+        # The session is shared by every system, a cookie set by one webhook endpoint must not be sent for another
+        return aiohttp.ClientSession(connector=connector, cookie_jar=aiohttp.DummyCookieJar())
+
+    def submit(self, url, webhook_headers, webhook_body):
+        """
+        Submit a webhook POST to the event loop.
+
+        Args:
+            url (str): The webhook URL.
+            webhook_headers (dict): Headers sent with the request.
+            webhook_body (dict): The rendered JSON body.
+
+        Returns:
+            concurrent.futures.Future: Resolves to True if the webhook was delivered, False otherwise.
+        """
+        return asyncio.run_coroutine_threadsafe(self._post(url, webhook_headers, webhook_body), self.loop)
+
+    async def _post(self, url, webhook_headers, webhook_body):
+        connect_timeout, read_timeout = get_http_timeout(self.global_config_data, "webhook")
+        timeout = aiohttp.ClientTimeout(total=(connect_timeout or 0) + (read_timeout or 0) or None,
+                                        sock_connect=connect_timeout, sock_read=read_timeout)
+        try:
+            async with self.session.post(url, json=webhook_body, headers=webhook_headers, timeout=timeout) as response:
+                if response.status >= 400:
+                    module_logger.error(f"<<Webhook>> <<Failed>> HTTP error occurred for URL {url}: "
+                                        f"{response.status} {await response.text()}")
+                    return False
+
+            module_logger.debug(f"<<Webhook>> Successful: URL {url}")
+            return True
+        except asyncio.TimeoutError as e:
+            module_logger.error(f"<<Webhook>> <<Failed>> Timeout error occurred for URL {url}: {e}")
+            return False
+        except aiohttp.ClientConnectionError as e:
+            module_logger.error(f"<<Webhook>> <<Failed>> Connection error occurred for URL {url}: {e}")
+            return False
+        except aiohttp.ClientError as e:
+            module_logger.error(f"<<Webhook>> <<Failed>> Request error occurred for URL {url}: {e}")
+            return False
+        except Exception as e:
+            module_logger.error(f"<<Webhook>> <<Failed>> Unexpected error occurred for URL {url}: {e}")
+            return False
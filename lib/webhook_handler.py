@@ -1,12 +1,14 @@
 import json
 import logging
 import traceback
+from concurrent.futures import Future
 from datetime import datetime, timezone
 
-import requests
 from requests import HTTPError, Timeout, RequestException
 
 from lib.helper_handler import generate_mapped_json
+from lib.http_session_handler import get_http_session, get_http_timeout
+from lib.webhook_engine_handler import get_webhook_engine
 
 module_logger = logging.getLogger("icad_alerting_api.webhook_handler")
 
@@ -111,27 +113,39 @@ def update_trigger_webhooks(db, trigger_id, webhooks_data):
 
 
 class WebHook:
-    def __init__(self, global_config_data, system_config_data, trigger_config_data=None):
+    def __init__(self, global_config_data, system_config_data, trigger_config_data=None, render_context=None):
         self.global_config_data = global_config_data
         self.system_config_data = system_config_data
         self.trigger_config_data = trigger_config_data
+        self.render_context = render_context
+
+    @staticmethod
+    def _get_headers(webhook_headers):
+        if webhook_headers is None:
+            return {'Content-Type': 'application/json'}
+        elif 'Content-Type' not in webhook_headers:
+            # Copy so the shared webhook config isn't modified by concurrent sends
+            return dict(webhook_headers, **{'Content-Type': 'application/json'})
+        return webhook_headers
 
     def _send_request(self, url, webhook_headers, webhook_body):
         try:
-            if webhook_headers is None:
-                webhook_headers = {'Content-Type': 'application/json'}
-            elif 'Content-Type' not in webhook_headers:
-                webhook_headers['Content-Type'] = 'application/json'
+            webhook_headers = self._get_headers(webhook_headers)
 
             if webhook_body is None:
-                module_logger.error(F'No Webhook Body Can not post webhook.')
-                return
+                module_logger.error(f"<<Webhook>> <<Failed>> Unable to render webhook body for URL {url}")
+                return {"success": False, "message": "Unable to render webhook body."}
+
+            webhook_engine = get_webhook_engine(self.global_config_data)
+            if webhook_engine:
+                return webhook_engine.submit(url, webhook_headers, webhook_body).result()
 
-            response = requests.post(url,
-                                     json=webhook_body,
-                                     headers=webhook_headers,
-                                     timeout=10
-                                     )
+            response = get_http_session(self.global_config_data, "webhook").post(
+                url,
+                json=webhook_body,
+                headers=webhook_headers,
+                timeout=get_http_timeout(self.global_config_data, "webhook")
+            )
 
             response.raise_for_status()  # Raise an exception for HTTP errors
 
@@ -155,8 +169,7 @@ class WebHook:
             module_logger.error(f"<<Webhook>> <<Failed>> Unexpected error occurred for URL {url}: {e}")
             return False
 
-    def send_webhook(self, webhook_url, wehbook_headers, webhook_body, alert_data, call_data):
-
+    def _render_body(self, webhook_body, alert_data, call_data):
         test_mode = self.global_config_data.get("general", {}).get("test_mode", True)
 
         if self.system_config_data and not self.trigger_config_data:
@@ -169,12 +182,37 @@ class WebHook:
         else:
             stream_url = self.global_config_data.get("stream_url") or ""
 
-        try:
+        webhook_json = generate_mapped_json(webhook_body, alert_data, call_data, stream_url, test_mode,
+                                            self.render_context)
+
+        # Log the webhook JSON to debug issues with the payload
+        module_logger.debug(f"Webhook JSON: {webhook_json}")
+        return webhook_json
 
-            webhook_json = generate_mapped_json(webhook_body, alert_data, call_data, stream_url, test_mode)
+    def submit_webhook(self, webhook_url, wehbook_headers, webhook_body, alert_data, call_data):
+        """
+        Render a webhook and submit it to the asyncio webhook engine without waiting for it to be sent.
 
-            # Log the webhook JSON to debug issues with the payload
-            module_logger.debug(f"Webhook JSON: {webhook_json}")
+        :return: concurrent.futures.Future resolving to True if the webhook was delivered, a failed result dictionary when
+                 its body couldn't be rendered, or None when the engine isn't enabled and send_webhook should be used
+                 instead
+        """
+        webhook_engine = get_webhook_engine(self.global_config_data)
+        if not webhook_engine:
+            return None
+
+        webhook_json = self._render_body(webhook_body, alert_data, call_data)
+        if webhook_json is None:
+            module_logger.error(f"<<Webhook>> <<Failed>> Unable to render webhook body for URL {webhook_url}")
+            future = Future()
+            future.set_result({"success": False, "message": "Unable to render webhook body."})
+            return future
+
+        return webhook_engine.submit(webhook_url, self._get_headers(wehbook_headers), webhook_json)
+
+    def send_webhook(self, webhook_url, wehbook_headers, webhook_body, alert_data, call_data):
+        try:
+            webhook_json = self._render_body(webhook_body, alert_data, call_data)
 
             post_result = self._send_request(webhook_url, wehbook_headers, webhook_json)
             return post_result